@@ -0,0 +1,8 @@
+"""gunicorn settings - read from the working directory (see plant-tracker.service)"""
+from plant_tracker.core.engines import ENGINE_REGISTRY
+
+
+def post_fork(server, worker):
+    # A worker must never reuse pooled connections inherited from the master (e.g., when the app is preloaded):
+    #   give it fresh pools without closing the master's connections
+    ENGINE_REGISTRY.dispose_all(close=False)
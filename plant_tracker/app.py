@@ -14,7 +14,6 @@ from werkzeug.http import HTTP_STATUS_CODES
 
 from plant_tracker.config import DevelopmentConfig
 from plant_tracker.core.db import DBAdmin
-from plant_tracker.flask_base import db
 from plant_tracker.routes.altname import bp_altname
 from plant_tracker.routes.family import bp_family
 from plant_tracker.routes.helpers import (
@@ -75,9 +74,6 @@ def create_app(*args, **kwargs) -> Flask:
     # Reduce the amount of 404s by disabling strict slashes (e.g., when a forward slash is appended to a url)
     app.url_map.strict_slashes = False
 
-    # Initialize database ops
-    db.init_app(app)
-
     # Initialize logger
     logger = get_logger(app.config.get('NAME'), log_dir_path=app.config.get('LOG_DIR'),
                         show_backtrace=app.config.get('DEBUG'), base_level=app.config.get('LOG_LEVEL'))
@@ -98,8 +94,6 @@ def create_app(*args, **kwargs) -> Flask:
             except ValueError:
                 pass
 
-    app.config['db'] = db
-
     eng = DBAdmin(log=logger, env=config_class.ENV, tables=[])
     app.extensions.setdefault('eng', eng)
 
@@ -7,9 +7,8 @@ import string
 from typing import Dict
 
 from loguru import logger
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
+from plant_tracker.core.engines import ENGINE_REGISTRY
 from plant_tracker.model import Base
 
 
@@ -55,9 +54,29 @@ class BaseConfig(object):
     BACKUP_DIR = DATA_DIR.joinpath('backups')
     BACKUP_DIR.mkdir(exist_ok=True)
 
+    # Pre-rendered map tiles (see scripts/render_tiles.py)
+    TILE_DIR = DATA_DIR.joinpath('tiles')
+    TILE_DIR.mkdir(exist_ok=True)
+
+    # Where the garden is, for sun exposure estimates: latitude (degrees, north is positive) &
+    #   the compass bearing (degrees clockwise from true north) of the map's "up"
+    SUN_LATITUDE = 30.27
+    MAP_NORTH_BEARING = 0
+
     # backend
     SQLALCHEMY_DATABASE_URI = 'postgresql+psycopg2://{usr}:{pwd}@{host}:{port}/{database}'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool, shared by everything in a process - each gunicorn worker holds at most
+    #   DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE = 5
+    DB_MAX_OVERFLOW = 5
+    DB_POOL_PRE_PING = True
+    # Seconds before a pooled connection gets replaced
+    DB_POOL_RECYCLE = 1800
+    # Writes that lose a serialization conflict / deadlock are replayed up to DB_RETRY_ATTEMPTS times in all,
+    #   waiting a random 0 - DB_RETRY_BACKOFF * 2^n seconds (never more than DB_RETRY_MAX_BACKOFF) in between
+    DB_RETRY_ATTEMPTS = 5
+    DB_RETRY_BACKOFF = 0.05
+    DB_RETRY_MAX_BACKOFF = 1.0
     SECRETS = None
     ENGINE = None
     SESSION = None
@@ -72,14 +91,16 @@ class BaseConfig(object):
 
     @classmethod
     def build_db_engine(cls):
-        """Builds database engine, sets SESSION"""
+        """Sets ENGINE & SESSION to the process' shared engine for this database, building it on first use"""
         if cls.SECRETS is None:
             cls.load_secrets()
         cls.SQLALCHEMY_DATABASE_URI = cls.SQLALCHEMY_DATABASE_URI.format(**cls.SECRETS)
-        engine = create_engine(cls.SQLALCHEMY_DATABASE_URI, isolation_level='SERIALIZABLE')
+        engine, session = ENGINE_REGISTRY.get(cls.SQLALCHEMY_DATABASE_URI, pool_size=cls.DB_POOL_SIZE,
+                                              max_overflow=cls.DB_MAX_OVERFLOW, pool_pre_ping=cls.DB_POOL_PRE_PING,
+                                              pool_recycle=cls.DB_POOL_RECYCLE)
         Base.metadata.bind = engine
         cls.ENGINE = engine
-        cls.SESSION = sessionmaker(bind=engine)
+        cls.SESSION = session
 
     SECRET_KEY_PATH = KEY_DIR.joinpath('plant-tracker-secret')
     if not SECRET_KEY_PATH.exists():
@@ -1,18 +1,41 @@
 from contextlib import contextmanager
+import time
 from typing import (
+    Callable,
     List,
-    Optional
+    Optional,
+    TypeVar
 )
 
+from geoalchemy2.shape import from_shape
 from pukr import PukrLog
+from sqlalchemy import (
+    insert,
+    text,
+    update
+)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 
 from plant_tracker.config import DevelopmentConfig, ProductionConfig
+from plant_tracker.core.geodata import (
+    POSTGIS_STATUS,
+    geodata_to_shape
+)
+from plant_tracker.core.retry import (
+    RETRY_STATS,
+    backoff_delay,
+    get_sqlstate,
+    is_retryable
+)
+from plant_tracker.core.utils import COLUMN_STATUS
 from plant_tracker.model import (
     Base,
     TableAlternateNames,
     TableGeodata,
+    TableGeodataHistory,
     TableImage,
+    TableIrrigationZone,
     TableMaintenanceLog,
     TableObservationLog,
     TablePlant,
@@ -24,16 +47,21 @@ from plant_tracker.model import (
     TableScheduledMaintenanceLog,
     TableScheduledWateringLog,
     TableSpecies,
+    TableSunEstimate,
     TableWateringLog
 )
 
+T = TypeVar('T')
+
 
 class DBAdmin:
     """For holding all the various ETL processes, delimited by table name or function of data stored"""
     TABLES = [
         TableAlternateNames,
         TableGeodata,
+        TableGeodataHistory,
         TableImage,
+        TableIrrigationZone,
         TableMaintenanceLog,
         TableObservationLog,
         TablePlant,
@@ -45,21 +73,26 @@ class DBAdmin:
         TableScheduledMaintenanceLog,
         TableScheduledWateringLog,
         TableSpecies,
+        TableSunEstimate,
         TableWateringLog,
     ]
 
     def __init__(self, log: PukrLog, env: str = 'dev', tables: List = None):
         self.log = log
 
-        self.log.debug('Obtaining credential file...')
         conf = ProductionConfig if env.upper() == 'PROD' else DevelopmentConfig
-        conf.load_secrets()
+        if conf.SECRETS is None:
+            self.log.debug('Obtaining credential file...')
+            conf.load_secrets()
         self.props = conf.SECRETS
 
-        self.log.debug('Opening up the database...')
+        # Shares the process' engine (& connection pool) w/ every other DBAdmin
         conf.build_db_engine()
         self.session = conf.SESSION
         self.eng = conf.ENGINE
+        self.retry_attempts = conf.DB_RETRY_ATTEMPTS
+        self.retry_backoff = conf.DB_RETRY_BACKOFF
+        self.retry_max_backoff = conf.DB_RETRY_MAX_BACKOFF
 
         self.tables = self.TABLES if tables is None else tables
 
@@ -71,7 +104,89 @@ class DBAdmin:
             tbl_objs.append(Base.metadata.tables.get(f'{table.__table_args__.get("schema")}.{table.__tablename__}'))
         Base.metadata.drop_all(self.eng, tables=tbl_objs)
         self.log.debug('Establishing database...')
+        # Leaves out geodata.geom, so PostGIS has to be (re)added w/ migrate_geodata_geom
         Base.metadata.create_all(self.eng)
+        POSTGIS_STATUS.clear()
+        COLUMN_STATUS.clear()
+
+    def migrate_geodata_geom(self):
+        """Adds the PostGIS geometry column (w/ GiST index) to geodata and backfills it from the text data"""
+        tbl_name = f'{TableGeodata.__table__.schema}.{TableGeodata.__tablename__}'
+        self.log.debug('Ensuring PostGIS & the geodata.geom column exist...')
+        with self.eng.begin() as conn:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS postgis'))
+            conn.execute(text(f'ALTER TABLE {tbl_name} ADD COLUMN IF NOT EXISTS geom geometry(GEOMETRY, 0)'))
+        POSTGIS_STATUS.clear()
+
+        with self.session_mgr() as session:
+            rows = session.query(TableGeodata.geodata_id, TableGeodata.is_polygon, TableGeodata.data)\
+                .filter(TableGeodata.data.isnot(None)).all()
+            self.log.debug(f'Backfilling geometry for {len(rows)} geodata rows...')
+            geoms = [
+                {'geodata_id': gid, 'geom': from_shape(geodata_to_shape(data, is_polygon=is_polygon), srid=0)}
+                for gid, is_polygon, data in rows
+            ]
+            if len(geoms) > 0:
+                session.execute(update(TableGeodata), geoms)
+
+        self.log.debug('Building spatial index...')
+        with self.eng.begin() as conn:
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS idx_{TableGeodata.__tablename__}_geom '
+                              f'ON {tbl_name} USING gist (geom)'))
+            conn.execute(text(f'ANALYZE {tbl_name}'))
+
+    def migrate_geodata_history(self):
+        """Adds the geodata history table (w/ a GiST index on each row's validity range) and opens a
+        history row for every geodata item that isn't tracked yet"""
+        tbl_name = f'{TableGeodataHistory.__table__.schema}.{TableGeodataHistory.__tablename__}'
+        self.log.debug('Ensuring the geodata history table exists...')
+        TableGeodataHistory.__table__.create(self.eng, checkfirst=True)
+
+        with self.session_mgr() as session:
+            tracked = session.query(TableGeodataHistory.geodata_key).filter(TableGeodataHistory.valid_to.is_(None))
+            rows = session.query(TableGeodata).filter(TableGeodata.geodata_id.not_in(tracked)).all()
+            self.log.debug(f'Opening history for {len(rows)} geodata rows...')
+            # Earlier edits were never recorded, so the current shape is the best guess back to the row's creation
+            history = [
+                {'geodata_key': x.geodata_id, 'geodata_type': x.geodata_type, 'name': x.name,
+                 'is_polygon': x.is_polygon, 'data': x.data, 'valid_from': x.created_date or x.update_date}
+                for x in rows
+            ]
+            if len(history) > 0:
+                session.execute(insert(TableGeodataHistory), history)
+
+        self.log.debug('Building validity range index...')
+        with self.eng.begin() as conn:
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS idx_{TableGeodataHistory.__tablename__}_validity '
+                              f"ON {tbl_name} USING gist (tsrange(valid_from, valid_to, '[)'))"))
+            conn.execute(text(f'ANALYZE {tbl_name}'))
+
+    def migrate_irrigation_zones(self):
+        """Adds the irrigation zone table"""
+        self.log.debug('Ensuring the irrigation zone table exists...')
+        TableIrrigationZone.__table__.create(self.eng, checkfirst=True)
+
+    def migrate_structure_heights(self):
+        """Adds the geodata height column used to cast shadows from structures"""
+        tbl_name = f'{TableGeodata.__table__.schema}.{TableGeodata.__tablename__}'
+        self.log.debug('Ensuring the geodata.height_mm column exists...')
+        with self.eng.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {tbl_name} ADD COLUMN IF NOT EXISTS height_mm INTEGER'))
+        COLUMN_STATUS.clear()
+
+    def migrate_species_spacing(self):
+        """Adds the species spacing column used by the plant spacing report"""
+        tbl_name = f'{TableSpecies.__table__.schema}.{TableSpecies.__tablename__}'
+        self.log.debug('Ensuring the species.spacing_mm column exists...')
+        with self.eng.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {tbl_name} ADD COLUMN IF NOT EXISTS spacing_mm INTEGER'))
+        COLUMN_STATUS.clear()
+
+    def migrate_sun_estimates(self):
+        """Adds the table the per plant location sun estimates are stored in"""
+        self.log.debug('Ensuring the sun estimate table exists...')
+        TableSunEstimate.__table__.create(self.eng, checkfirst=True)
+        COLUMN_STATUS.clear()
 
     @contextmanager
     def session_mgr(self):
@@ -85,6 +200,49 @@ class DBAdmin:
         finally:
             session.close()
 
+    @contextmanager
+    def read_session(self):
+        """For reads (page views & API GETs): a READ ONLY, READ COMMITTED transaction that never flushes
+        and is never committed, so it doesn't take the predicate locks a SERIALIZABLE one would or conflict
+        with writers. Objects are detached once it closes, so lazy loaded attributes need touching inside it."""
+        with self.eng.connect() as conn:
+            conn.execution_options(isolation_level='READ COMMITTED', postgresql_readonly=True)
+            session = self.session(bind=conn, autoflush=False)
+            try:
+                yield session
+            finally:
+                # Closing the connection rolls back the transaction & resets its isolation level for the pool
+                session.close()
+
+    def unit_of_work(self, func: Callable[[Session], T]) -> T:
+        """Runs func(session) in a transaction of its own & commits, returning whatever func returns.
+        When the transaction loses a serialization conflict or deadlock, it's rolled back & func replayed
+        from the start in a fresh session, after a jittered, exponentially growing wait, up to
+        retry_attempts times in all.
+
+        func gets replayed, so it shouldn't commit or have side effects outside the database (flash messages,
+        file writes) - it can return what those need instead. Its objects are expired once committed."""
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                with self.session_mgr() as session:
+                    result = func(session)
+            except DBAPIError as err:
+                if not is_retryable(err):
+                    raise
+                if attempt == self.retry_attempts:
+                    RETRY_STATS.record_exhausted()
+                    self.log.error(f'Transaction failed after {attempt} attempts ({get_sqlstate(err)})')
+                    raise
+                RETRY_STATS.record_retry(get_sqlstate(err))
+                delay = backoff_delay(attempt, base=self.retry_backoff, cap=self.retry_max_backoff)
+                self.log.warning(f'Transaction attempt {attempt} hit {get_sqlstate(err)}, '
+                                 f'retrying in {delay:.3f}s')
+                time.sleep(delay)
+                continue
+            if attempt > 1:
+                RETRY_STATS.record_recovered()
+            return result
+
     def refresh_table_objects(self, tbl_objs: List, session: Session = None):
         new_objs = []
         if session is None:
@@ -0,0 +1,208 @@
+"""Page loaders for the plant & species detail pages.
+
+Each loads everything its page shows in a fixed handful of queries - the row w/ its many-to-ones joined in,
+then one batched select per collection - and copies it into frozen view objects, so nothing gets lazy loaded
+while the page renders and the query count doesn't grow w/ a plant's history.
+"""
+from dataclasses import (
+    dataclass,
+    fields
+)
+import datetime
+from typing import (
+    Optional,
+    Tuple
+)
+
+from sqlalchemy.orm import (
+    Session,
+    undefer
+)
+
+from plant_tracker.core.utils import has_column
+from plant_tracker.model import (
+    PLANT_DETAIL_LOADERS,
+    SPECIES_DETAIL_LOADERS,
+    TablePlant,
+    TableSpecies
+)
+
+
+@dataclass(frozen=True)
+class ImageView:
+    image_id: int
+    image_path: str
+
+
+@dataclass(frozen=True)
+class ObservationView:
+    observation_log_id: int
+    observation_type: str
+    plant_rating: Optional[int]
+    plant_height_mm: Optional[int]
+    plant_width_mm: Optional[int]
+    observation_date: datetime.date
+    notes: Optional[str]
+
+
+@dataclass(frozen=True)
+class MaintenanceView:
+    maintenance_log_id: int
+    maintenance_type: str
+    maintenance_date: datetime.date
+    notes: Optional[str]
+
+
+@dataclass(frozen=True)
+class WateringView:
+    watering_log_id: int
+    watering_date: datetime.date
+    notes: Optional[str]
+
+
+@dataclass(frozen=True)
+class SpeciesSummary:
+    species_id: int
+    common_name: str
+    scientific_name: Optional[str]
+    is_native: Optional[bool]
+
+
+@dataclass(frozen=True)
+class PlantDetail:
+    plant_id: int
+    species: SpeciesSummary
+    plant_source: Optional[str]
+    date_planted: datetime.date
+    is_drip_irrigated: Optional[bool]
+    is_in_container: Optional[bool]
+    is_dead: Optional[bool]
+    notes: Optional[str]
+    # The plant's place on the map, None when it doesn't have one
+    geodata_key: Optional[int]
+    images: Tuple[ImageView, ...]
+    observation_logs: Tuple[ObservationView, ...]
+    maintenance_logs: Tuple[MaintenanceView, ...]
+    watering_logs: Tuple[WateringView, ...]
+
+
+@dataclass(frozen=True)
+class FamilySummary:
+    scientific_name: str
+    common_name: Optional[str]
+
+
+@dataclass(frozen=True)
+class AlternateNameView:
+    alternate_name_id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class ScheduledMaintenanceView:
+    maintenance_schedule_id: int
+    maintenance_type: str
+    maintenance_frequency: str
+    maintenance_period_start: datetime.date
+    maintenance_period_end: datetime.date
+    notes: Optional[str]
+
+
+@dataclass(frozen=True)
+class SpeciesDetail:
+    species_id: int
+    common_name: str
+    scientific_name: Optional[str]
+    plant_family: Optional[FamilySummary]
+    habit: Optional[str]
+    is_native: Optional[bool]
+    duration: Optional[str]
+    water_requirement: Optional[str]
+    light_requirement: Optional[str]
+    soil_moisture: Optional[str]
+    leaf_retention: Optional[str]
+    spacing_mm: Optional[int]
+    is_drought_tolerant: Optional[bool]
+    is_heat_tolerant: Optional[bool]
+    is_freeze_tolerant: Optional[bool]
+    usda_symbol: Optional[str]
+    bloom_start_month: Optional[int]
+    bloom_end_month: Optional[int]
+    bloom_notes: Optional[str]
+    care_notes: Optional[str]
+    propagation_notes: Optional[str]
+    plant_ids: Tuple[int, ...]
+    # Map places of the species' plants that have one
+    geodata_keys: Tuple[int, ...]
+    alternate_names: Tuple[AlternateNameView, ...]
+    images: Tuple[ImageView, ...]
+    scheduled_maintenance_logs: Tuple[ScheduledMaintenanceView, ...]
+
+
+def _copy(view_cls, obj):
+    """Builds a flat view from the same-named attributes of obj"""
+    return view_cls(**{f.name: getattr(obj, f.name) for f in fields(view_cls)})
+
+
+def _copy_all(view_cls, objs) -> Tuple:
+    return tuple(_copy(view_cls, x) for x in objs)
+
+
+def load_plant_detail(session: Session, plant_id: int) -> Optional[PlantDetail]:
+    plant = session.query(TablePlant).options(*PLANT_DETAIL_LOADERS)\
+        .filter(TablePlant.plant_id == plant_id).one_or_none()  # type: Optional[TablePlant]
+    if plant is None:
+        return None
+    return PlantDetail(
+        plant_id=plant.plant_id,
+        species=_copy(SpeciesSummary, plant.species),
+        plant_source=plant.plant_source,
+        date_planted=plant.date_planted,
+        is_drip_irrigated=plant.is_drip_irrigated,
+        is_in_container=plant.is_in_container,
+        is_dead=plant.is_dead,
+        notes=plant.notes,
+        geodata_key=None if plant.plant_location is None else plant.plant_location.geodata_key,
+        images=_copy_all(ImageView, plant.images),
+        observation_logs=_copy_all(ObservationView, plant.observation_logs),
+        maintenance_logs=_copy_all(MaintenanceView, plant.maintenance_logs),
+        watering_logs=_copy_all(WateringView, plant.watering_logs)
+    )
+
+
+def load_species_detail(session: Session, species_id: int) -> Optional[SpeciesDetail]:
+    has_spacing = has_column(session, TableSpecies, 'spacing_mm')
+    query = session.query(TableSpecies).options(*SPECIES_DETAIL_LOADERS)
+    if has_spacing:
+        query = query.options(undefer(TableSpecies.spacing_mm))
+    species = query.filter(TableSpecies.species_id == species_id).one_or_none()  # type: Optional[TableSpecies]
+    if species is None:
+        return None
+    return SpeciesDetail(
+        species_id=species.species_id,
+        common_name=species.common_name,
+        scientific_name=species.scientific_name,
+        plant_family=None if species.plant_family is None else _copy(FamilySummary, species.plant_family),
+        habit=None if species.habit is None else species.habit.plant_habit,
+        is_native=species.is_native,
+        duration=species.duration,
+        water_requirement=species.water_requirement,
+        light_requirement=species.light_requirement,
+        soil_moisture=species.soil_moisture,
+        leaf_retention=species.leaf_retention,
+        spacing_mm=species.spacing_mm if has_spacing else None,
+        is_drought_tolerant=species.is_drought_tolerant,
+        is_heat_tolerant=species.is_heat_tolerant,
+        is_freeze_tolerant=species.is_freeze_tolerant,
+        usda_symbol=species.usda_symbol,
+        bloom_start_month=species.bloom_start_month,
+        bloom_end_month=species.bloom_end_month,
+        bloom_notes=species.bloom_notes,
+        care_notes=species.care_notes,
+        propagation_notes=species.propagation_notes,
+        plant_ids=tuple(x.plant_id for x in species.plants),
+        geodata_keys=tuple(x.plant_location.geodata_key for x in species.plants if x.plant_location is not None),
+        alternate_names=_copy_all(AlternateNameView, species.alternate_names),
+        images=_copy_all(ImageView, species.images),
+        scheduled_maintenance_logs=_copy_all(ScheduledMaintenanceView, species.scheduled_maintenance_logs)
+    )
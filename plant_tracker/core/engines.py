@@ -0,0 +1,41 @@
+"""Process-wide registry of SQLAlchemy engines, one per database url.
+
+Everything in a process (the app, DBAdmin, the ETL, scripts) shares the same engine & connection pool,
+so each process holds at most `pool_size + max_overflow` connections per database.
+"""
+import threading
+from typing import Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+
+class EngineRegistry:
+
+    def __init__(self):
+        self._engines = {}  # url -> (engine, session factory)
+        self._lock = threading.Lock()
+
+    def get(self, url: str, pool_size: int = 5, max_overflow: int = 5, pool_pre_ping: bool = True,
+            pool_recycle: int = 1800) -> Tuple[Engine, sessionmaker]:
+        """The engine & session factory for the url, created with the given pool settings on first use
+        (later calls get the existing engine, whatever settings they pass)"""
+        with self._lock:
+            if url not in self._engines:
+                engine = create_engine(url, isolation_level='SERIALIZABLE', pool_size=pool_size,
+                                       max_overflow=max_overflow, pool_pre_ping=pool_pre_ping,
+                                       pool_recycle=pool_recycle)
+                self._engines[url] = (engine, sessionmaker(bind=engine))
+            return self._engines[url]
+
+    def dispose_all(self, close: bool = True):
+        """Drops every engine's pooled connections, so new ones get opened on next use.
+        In a freshly forked process, pass close=False: the parent's connections are left alone rather than
+        closed out from under it, and the child starts on a new, empty pool."""
+        with self._lock:
+            for engine, _ in self._engines.values():
+                engine.dispose(close=close)
+
+
+ENGINE_REGISTRY = EngineRegistry()
@@ -1,21 +1,39 @@
+from collections import OrderedDict
 from dataclasses import dataclass
+import datetime
+import threading
 from typing import (
     Dict,
     List,
     Optional,
+    Tuple,
     Union
 )
 
+from geoalchemy2.shape import from_shape
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.errors import GEOSException
 from shapely.geometry import Point
+from shapely.geometry.base import BaseGeometry
 from shapely.geometry.polygon import Polygon
+from sqlalchemy import TIMESTAMP
 from sqlalchemy.sql import (
     and_,
-    not_
+    cast,
+    func,
+    not_,
+    or_,
+    text
 )
 
+from plant_tracker.core.utils import has_column
 from plant_tracker.model import (
     GeodataType,
     TableGeodata,
+    TableGeodataHistory,
+    TableIrrigationZone,
     TablePlant,
     TablePlantLocation,
     TablePlantRegion,
@@ -23,109 +41,517 @@ from plant_tracker.model import (
 )
 
 
-@dataclass
+DEFAULT_POINT_RADIUS = 250
+# Full map extents (mm) & the width (px) the map is drawn at on overview pages
+MAP_WIDTH_MM = 12780
+MAP_HEIGHT_MM = 35210
+MAP_WIDTH_PX = 1100
+OVERVIEW_SCALE = MAP_WIDTH_MM / MAP_WIDTH_PX
+# Tolerances (mm) that polygon simplifications get precomputed at
+LOD_TOLERANCES = (5, 10, 25, 50, 100)
+
+
+def tolerance_for_scale(scale: Optional[float]) -> Optional[int]:
+    """Picks the coarsest precomputed tolerance that's still under a pixel at the given scale (mm per px)"""
+    if scale is None:
+        return None
+    fitting = [x for x in LOD_TOLERANCES if x <= scale]
+    return fitting[-1] if len(fitting) > 0 else None
+
+
+@dataclass(slots=True, eq=False)
 class GeodataPoint:
-    gid: int
+    """A single point (w/ radius). Coordinates are held as a (2,) float array."""
+    gid: Optional[int]
     name: str
-    geo_type: GeodataType
-    x: float
-    y: float
-    r: float = 250
+    geo_type: Optional[GeodataType]
+    coords: np.ndarray
+    r: float = DEFAULT_POINT_RADIUS
+
+    @property
+    def x(self) -> float:
+        return float(self.coords[0])
+
+    @property
+    def y(self) -> float:
+        return float(self.coords[1])
 
     @classmethod
-    def from_string(cls, gd_pt: str, name: str, geo_type: GeodataType, gid: int = None):
-        cls.geo_type = geo_type
-        cls.gid = gid
-        cls.name = name
+    def from_string(cls, gd_pt: str, name: str, geo_type: Optional[GeodataType], gid: int = None) -> 'GeodataPoint':
         pts = [x.strip() for x in gd_pt.split(',')]
-        if len(pts) == 3:
-            cls.x, cls.y, cls.r = tuple(map(float, pts))
-        elif len(pts) == 2:
-            cls.x, cls.y = tuple(map(float, pts[:2]))
-        else:
+        if len(pts) not in [2, 3]:
             raise ValueError(f'Incorrect number of points: {len(pts)}. Expected 2 or 3')
-        return cls
+        vals = np.array(pts, dtype=np.float64)
+        r = float(vals[2]) if len(vals) == 3 else DEFAULT_POINT_RADIUS
+        return cls(gid=gid, name=name, geo_type=geo_type, coords=np.ascontiguousarray(vals[:2]), r=r)
 
-    @classmethod
-    def to_string(cls) -> str:
-        return f'{cls.x},{cls.y},{cls.r}'
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return self.x - self.r, self.y - self.r, self.x + self.r, self.y + self.r
 
-    @classmethod
-    def to_json(cls, is_focus: bool = False) -> Dict:
+    @property
+    def centroid(self) -> Tuple[float, float]:
+        return self.x, self.y
+
+    @property
+    def area(self) -> float:
+        return float(np.pi * self.r ** 2)
+
+    def to_shapely(self) -> Point:
+        return shapely.points(self.coords)
+
+    def to_string(self) -> str:
+        return f'{self.x},{self.y},{self.r}'
+
+    def anchors(self) -> Dict:
+        """Where the map draws this item's markers (the center) & label (top left of the circle)"""
+        return {
+            'anchor': [self.x, self.y],
+            'label': [self.x - self.r, self.y - self.r],
+            'bbox': list(self.bounds)
+        }
+
+    def to_json(self, is_focus: bool = False) -> Dict:
         return {
-            'gid': cls.gid,
-            'name': cls.name,
-            'type': cls.geo_type.value,
-            'x': cls.x,
-            'y': cls.y,
-            'r': cls.r,
-            'class': 'focus original' if is_focus else cls.geo_type.value
+            'gid': self.gid,
+            'name': self.name,
+            'type': self.geo_type.value,
+            'x': self.x,
+            'y': self.y,
+            'r': self.r,
+            'class': 'focus original' if is_focus else self.geo_type.value,
+            **self.anchors()
         }
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class GeodataPolygon:
+    """A polygon's (unclosed) ring. Coordinates are held as a contiguous (n, 2) float array."""
     gid: Optional[int]
     name: str
-    geo_type: GeodataType
-    points: List[List[float]]
+    geo_type: Optional[GeodataType]
+    coords: np.ndarray
 
-    @classmethod
-    def from_string(cls, gd_pts: str, name: str, geo_type: GeodataType, gid: int = None):
-        cls.geo_type = geo_type
-        cls.name = name
-        cls.gid = gid
-        pts = []
-        coords = gd_pts.split('\n')
-        for coord in coords:
-            coord = coord.strip()
-            if coord == '':
-                continue
-            pts.append([float(x.strip()) for x in coord.split(',')])
-        cls.points = pts
-        return cls
+    @property
+    def points(self) -> np.ndarray:
+        return self.coords
 
     @classmethod
-    def to_string(cls) -> str:
-        points = cls.points.copy()  # type: List[List[float]]
-        points_str = []
-        for i, coord in enumerate(points):
-            points_str.append(','.join(list(map(str, coord))))
-        return '\n'.join(points_str)
+    def from_string(cls, gd_pts: str, name: str, geo_type: Optional[GeodataType], gid: int = None) -> \
+            'GeodataPolygon':
+        rows = [coord.split(',') for coord in gd_pts.split('\n') if coord.strip() != '']
+        coords = np.array(rows, dtype=np.float64)
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            raise ValueError('Polygon coordinates should be one "x,y" pair per line')
+        return cls(gid=gid, name=name, geo_type=geo_type, coords=np.ascontiguousarray(coords))
 
-    @classmethod
-    def to_json(cls, is_focus: bool = False) -> Dict:
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        mins = self.coords.min(axis=0)
+        maxs = self.coords.max(axis=0)
+        return float(mins[0]), float(mins[1]), float(maxs[0]), float(maxs[1])
+
+    def _shoelace(self) -> Tuple[np.ndarray, float]:
+        x = self.coords[:, 0]
+        y = self.coords[:, 1]
+        cross = x * np.roll(y, -1) - np.roll(x, -1) * y
+        return cross, float(cross.sum() / 2)
+
+    @property
+    def area(self) -> float:
+        return abs(self._shoelace()[1])
+
+    @property
+    def centroid(self) -> Tuple[float, float]:
+        cross, signed_area = self._shoelace()
+        if signed_area == 0:
+            # Degenerate (e.g., collinear) ring - fall back to the vertex average
+            mean = self.coords.mean(axis=0)
+            return float(mean[0]), float(mean[1])
+        x = self.coords[:, 0]
+        y = self.coords[:, 1]
+        cx = ((x + np.roll(x, -1)) * cross).sum() / (6 * signed_area)
+        cy = ((y + np.roll(y, -1)) * cross).sum() / (6 * signed_area)
+        return float(cx), float(cy)
+
+    def to_shapely(self) -> Polygon:
+        return shapely.polygons(self.coords)
+
+    @staticmethod
+    def coords_to_string(coords: np.ndarray) -> str:
+        return '\n'.join([','.join(map(str, coord)) for coord in coords.tolist()])
+
+    def to_string(self) -> str:
+        return self.coords_to_string(self.coords)
+
+    def lod_strings(self, tolerances: Tuple[int, ...] = LOD_TOLERANCES) -> Dict[int, str]:
+        """Topology-preserving simplifications of the ring at each tolerance, as data strings.
+        Tolerances that wouldn't drop any vertices are left out."""
+        simplified = shapely.simplify(self.to_shapely(), np.array(tolerances, dtype=np.float64),
+                                      preserve_topology=True)
+        lods = {}
+        for tolerance, poly in zip(tolerances, simplified):
+            # Rings come back closed; the stored format leaves that implied
+            coords = shapely.get_coordinates(shapely.get_exterior_ring(poly))[:-1]
+            if 2 < len(coords) < len(self.coords):
+                lods[tolerance] = self.coords_to_string(coords)
+        return lods
+
+    def anchors(self) -> Dict:
+        """Where the map draws this item's markers & label.
+        Markers go on a point guaranteed to be inside the ring (unlike the centroid), labels on the bbox's top left."""
+        try:
+            pt = self.to_shapely().representative_point()
+            anchor = [round(pt.x, 1), round(pt.y, 1)]
+        except GEOSException:
+            # Self-intersecting rings can't always produce one
+            anchor = [round(x, 1) for x in self.centroid]
+        bounds = self.bounds
         return {
-            'gid': cls.gid,
-            'name': cls.name,
-            'type': cls.geo_type.value,
-            'points': cls.to_string(),
-            'class': 'focus original' if is_focus else cls.geo_type.value
+            'anchor': anchor,
+            'label': [bounds[0], bounds[1]],
+            'bbox': list(bounds)
         }
 
+    def to_json(self, is_focus: bool = False) -> Dict:
+        return {
+            'gid': self.gid,
+            'name': self.name,
+            'type': self.geo_type.value,
+            'points': self.to_string(),
+            'class': 'focus original' if is_focus else self.geo_type.value,
+            **self.anchors()
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedGeodata:
+    """What gets cached per geodata row: its (non-focused) json dict & any simplified variants of its points"""
+    json: Dict
+    lod_points: Dict[int, str]
+
+    def to_json(self, tolerance: int = None) -> Dict:
+        data_dict = self.json.copy()
+        if tolerance is not None and tolerance in self.lod_points:
+            data_dict['points'] = self.lod_points[tolerance]
+        return data_dict
+
+
+class GeometryCache:
+    """Process-level LRU of parsed geodata, keyed by (geodata_id, update_date).
+
+    Entries are the focus-agnostic ParsedGeodata built from TableGeodata.data, so a warm map render
+    doesn't need to touch (or parse) the data column at all. An edit bumps update_date, so stale
+    entries can't be served, but they're also dropped explicitly through `invalidate`.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._items = OrderedDict()  # type: OrderedDict[Tuple[int, datetime.datetime], ParsedGeodata]
+        self._key_by_gid = {}  # type: Dict[int, Tuple[int, datetime.datetime]]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, gid: int, update_date: datetime.datetime) -> Optional[ParsedGeodata]:
+        key = (gid, update_date)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, gid: int, update_date: datetime.datetime, item: ParsedGeodata):
+        key = (gid, update_date)
+        with self._lock:
+            old_key = self._key_by_gid.get(gid)
+            if old_key is not None and old_key != key:
+                self._items.pop(old_key, None)
+            self._items[key] = item
+            self._items.move_to_end(key)
+            self._key_by_gid[gid] = key
+            while len(self._items) > self.max_size:
+                evicted_key, _ = self._items.popitem(last=False)
+                if self._key_by_gid.get(evicted_key[0]) == evicted_key:
+                    del self._key_by_gid[evicted_key[0]]
+
+    def invalidate(self, gid: int):
+        with self._lock:
+            key = self._key_by_gid.pop(gid, None)
+            if key is not None:
+                self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._key_by_gid.clear()
+
+
+GEOMETRY_CACHE = GeometryCache()
+
+
+def invalidate_geodata_cache(gid: Optional[int]):
+    """Drops any parsed geometry held for the given geodata id"""
+    if gid is not None:
+        GEOMETRY_CACHE.invalidate(gid)
+    # Same-second edits don't always move the map version, so don't rely on it in this process
+    MAP_LAYER_CACHE.clear()
+
+
+def parse_geodata(gid: int, name: str, geo_type: GeodataType, data: str) -> ParsedGeodata:
+    """Parses a TableGeodata.data string into its (non-focused) json dict & simplified variants"""
+    if geo_type in [GeodataType.PLANT_POINT, GeodataType.OTHER_POINT]:
+        geodata = GeodataPoint.from_string(data, name=name, geo_type=geo_type, gid=gid)
+        return ParsedGeodata(json=geodata.to_json(), lod_points={})
+    geodata = GeodataPolygon.from_string(data, name=name, geo_type=geo_type, gid=gid)
+    return ParsedGeodata(json=geodata.to_json(), lod_points=geodata.lod_strings())
+
+
+def get_all_geodata(session, focus_ids: List[int] = None, geodata_ids: List[int] = None,
+                    scale: float = None) -> Dict[GeodataType, List[Dict]]:
+    """Collects all geodata points/polygons (or just those in geodata_ids), compiles them for processing in jinja
 
-def get_all_geodata(session, focus_ids: List[int] = None) -> Dict[GeodataType, List[Dict]]:
-    """Collects all geodata points/polygons, compiles them for processing in jinja"""
+    When the map's scale (mm per px) is given, polygons come back simplified to the matching level of detail.
+    Focused items are always left at full resolution.
+    """
     if focus_ids is None:
         focus_ids = []
+    tolerance = tolerance_for_scale(scale)
     items = {k: [] for k in list(GeodataType)}
-    geodatas = session.query(TableGeodata).order_by(TableGeodata.geodata_type.asc()).all()
-    geoids_and_plant_ids = session.query(TableGeodata.geodata_id, TablePlant.plant_id, TablePlant.is_drip_irrigated)\
-        .join(TablePlantLocation, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
-        .join(TablePlant, TablePlantLocation.plant_location_id == TablePlant.plant_location_key)\
-        .filter(not_(TablePlant.is_dead)).all()
-    geoid_to_plant = {x[0]: {'plant_id': x[1], 'is_irrigated': x[2]} for x in geoids_and_plant_ids}
-    for gd in geodatas:
-        if gd.geodata_type in ([GeodataType.PLANT_POINT, GeodataType.OTHER_POINT]):
-            data = GeodataPoint.from_string(gd.data, name=gd.name, geo_type=gd.geodata_type, gid=gd.geodata_id)
+    if geodata_ids is not None and len(geodata_ids) == 0:
+        return items
+    # This is the cheap "what changed" query - the data/name columns are only pulled for cache misses
+    query = session.query(TableGeodata.geodata_id, TableGeodata.geodata_type, TableGeodata.update_date,
+                          TablePlant.plant_id, TablePlant.is_drip_irrigated)\
+        .outerjoin(TablePlantLocation, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
+        .outerjoin(TablePlant, and_(TablePlantLocation.plant_location_id == TablePlant.plant_location_key,
+                                    not_(TablePlant.is_dead)))
+    if geodata_ids is not None:
+        query = query.filter(TableGeodata.geodata_id.in_(geodata_ids))
+    geodata_rows = query.order_by(TableGeodata.geodata_type.asc(), TableGeodata.geodata_id.asc()).all()
+
+    parsed = {}
+    misses = []
+    for gid, geo_type, update_date, _, _ in geodata_rows:
+        if gid in parsed:
+            continue
+        cached = GEOMETRY_CACHE.get(gid, update_date)
+        if cached is None:
+            misses.append(gid)
+        parsed[gid] = cached
+
+    if len(misses) > 0:
+        missed_geodatas = session.query(TableGeodata.geodata_id, TableGeodata.name, TableGeodata.geodata_type,
+                                        TableGeodata.update_date, TableGeodata.data)\
+            .filter(TableGeodata.geodata_id.in_(misses)).all()
+        for gid, name, geo_type, update_date, data in missed_geodatas:
+            parsed[gid] = parse_geodata(gid=gid, name=name, geo_type=geo_type, data=data)
+            GEOMETRY_CACHE.put(gid, update_date, parsed[gid])
+
+    irrigated_ids = get_irrigated_geodata_ids(session)
+    seen_gids = set()
+    for gid, geo_type, _, plant_id, is_irrigated in geodata_rows:
+        if gid in seen_gids or parsed.get(gid) is None:
+            # Either a duplicate from the plant join or a row that was removed between queries
+            continue
+        seen_gids.add(gid)
+        if gid in focus_ids:
+            data_dict = parsed[gid].to_json()
+            data_dict['class'] = 'focus original'
         else:
-            data = GeodataPolygon.from_string(gd.data, name=gd.name, geo_type=gd.geodata_type, gid=gd.geodata_id)
-        data_dict = data.to_json(is_focus=gd.geodata_id in focus_ids)
-        if gd.geodata_type in [GeodataType.PLANT_GROUP, GeodataType.PLANT_POINT]:
-            gd_dict = geoid_to_plant.get(gd.geodata_id)
-            data_dict['is_irrigated'] = gd_dict['is_irrigated']
-            data_dict['plant_id'] = gd_dict['plant_id']
-        items[gd.geodata_type].append(data_dict)
+            data_dict = parsed[gid].to_json(tolerance=tolerance)
+        if geo_type in [GeodataType.PLANT_GROUP, GeodataType.PLANT_POINT]:
+            # Zones decide irrigation once there are any
+            data_dict['is_irrigated'] = is_irrigated if irrigated_ids is None else \
+                plant_id is not None and gid in irrigated_ids
+            data_dict['plant_id'] = plant_id
+        items[geo_type].append(data_dict)
+    return items
+
+
+def _ring_to_grid(coords: np.ndarray, translate: np.ndarray, quantum: float) -> List[Tuple[int, int]]:
+    """Quantizes a polygon's ring onto the integer grid, dropping vertices that quantizing collapses together"""
+    ring = []
+    for pt in map(tuple, np.rint((coords - translate) / quantum).astype(np.int64).tolist()):
+        if len(ring) == 0 or ring[-1] != pt:
+            ring.append(pt)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    return ring
+
+
+def _find_junctions(rings: List[List[Tuple[int, int]]]) -> set:
+    """Vertices where rings meet or part ways - the same vertex showing up with different neighbours"""
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        for i, pt in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % len(ring)]))
+            if neighbours.setdefault(pt, pair) != pair:
+                junctions.add(pt)
+    return junctions
+
+
+def _cut_ring(ring: List[Tuple[int, int]], junctions: set) -> List[List[Tuple[int, int]]]:
+    """Splits a ring into arcs running from junction to junction. Each arc includes both of its ends."""
+    cuts = [i for i, pt in enumerate(ring) if pt in junctions]
+    if len(cuts) == 0:
+        # A ring that touches nothing is one closed arc, started from its smallest vertex so that
+        #   any identical copies of it line up
+        start = ring.index(min(ring))
+        rotated = ring[start:] + ring[:start]
+        return [rotated + [rotated[0]]]
+    rotated = ring[cuts[0]:] + ring[:cuts[0]] + [ring[cuts[0]]]
+    offsets = [i - cuts[0] for i in cuts] + [len(ring)]
+    return [rotated[start:end + 1] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _simplify_arcs(arcs: List[List[Tuple[int, int]]], tolerance: float) -> List[List[Tuple[int, int]]]:
+    """Simplifies each arc on its own. Arc ends stay put, so neighbouring polygons stay stitched together."""
+    lines = shapely.simplify([shapely.linestrings(arc) for arc in arcs], tolerance)
+    simplified = []
+    for arc, line in zip(arcs, lines):
+        coords = [tuple(x) for x in shapely.get_coordinates(line).astype(np.int64).tolist()]
+        if arc[0] == arc[-1] and len(coords) < 4:
+            # Don't let a closed arc collapse into a line
+            coords = arc
+        simplified.append(coords)
+    return simplified
+
+
+def encode_topology(features: Dict[GeodataType, List[Dict]], quantum: float = 1,
+                    tolerance: float = None) -> Dict:
+    """Serializes get_all_geodata's output TopoJSON-style, for a compact map payload.
+
+    Coordinates are quantized to integer steps of `quantum` mm. Polygon rings are cut into arcs wherever
+    neighbouring rings meet, and any arc shared between polygons (e.g., a sub region's edge along its region)
+    is only sent once - polygons refer to arcs by index, with ~index meaning the arc is walked in reverse.
+    Arcs are delta-encoded, so all but their first coordinate are small offsets.
+    When a tolerance (mm) is given, arcs are simplified after being shared, which keeps neighbours gap-free.
+    """
+    polygon_coords = {}
+    mins = []
+    for items in features.values():
+        for item in items:
+            if 'x' in item:
+                mins.append([item['x'], item['y']])
+            elif item.get('points'):
+                polygon_coords[item['gid']] = GeodataPolygon.from_string(item['points'], name='', geo_type=None).coords
+                mins.append(polygon_coords[item['gid']].min(axis=0))
+    translate = np.floor(np.min(mins, axis=0)) if len(mins) > 0 else np.zeros(2)
+
+    objects = {}
+    polygons = []  # type: List[Tuple[Dict, List[Tuple[int, int]]]]
+    for g_type, items in features.items():
+        objects[g_type] = []
+        for item in items:
+            # bbox & label are recoverable from the decoded geometry, so they're left out to keep the payload small
+            obj = {k: v for k, v in item.items() if k not in ['type', 'x', 'y', 'points', 'bbox', 'label']}
+            if obj.get('class') == g_type:
+                # The decoder falls back to the type as the class
+                del obj['class']
+            if 'x' in item:
+                obj['coordinates'] = np.rint((np.array([item['x'], item['y']]) - translate) / quantum)\
+                    .astype(np.int64).tolist()
+            elif item['gid'] in polygon_coords:
+                ring = _ring_to_grid(polygon_coords[item['gid']], translate=translate, quantum=quantum)
+                if len(ring) >= 3:
+                    polygons.append((obj, ring))
+            objects[g_type].append(obj)
+
+    junctions = _find_junctions([ring for _, ring in polygons])
+    arc_ids = {}
+    arcs = []
+    for obj, ring in polygons:
+        obj['arcs'] = []
+        for arc in _cut_ring(ring, junctions):
+            key = tuple(arc)
+            if key in arc_ids:
+                obj['arcs'].append(arc_ids[key])
+            elif key[::-1] in arc_ids:
+                obj['arcs'].append(~arc_ids[key[::-1]])
+            else:
+                arc_ids[key] = len(arcs)
+                obj['arcs'].append(len(arcs))
+                arcs.append(arc)
+
+    if tolerance is not None and len(arcs) > 0:
+        arcs = _simplify_arcs(arcs, tolerance / quantum)
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [quantum, quantum], 'translate': translate.tolist()},
+        'arcs': [np.diff(np.array(arc, dtype=np.int64), axis=0, prepend=[[0, 0]]).tolist() for arc in arcs],
+        'objects': objects
+    }
+
+
+def record_geodata_version(session, geo_obj: TableGeodata):
+    """Closes the geodata's open history row (if any) and opens a new one with its current state.
+    Saves that didn't change anything don't add a version."""
+    if geo_obj.geodata_id is not None:
+        current = session.query(TableGeodataHistory.geodata_type, TableGeodataHistory.name,
+                                TableGeodataHistory.is_polygon, TableGeodataHistory.data)\
+            .filter(TableGeodataHistory.geodata_key == geo_obj.geodata_id, TableGeodataHistory.valid_to.is_(None))\
+            .first()
+        state = (geo_obj.geodata_type, geo_obj.name, geo_obj.is_polygon, geo_obj.data)
+        if current is not None and tuple(current) == state:
+            return
+        close_geodata_history(session, geo_obj.geodata_id)
+    session.add(TableGeodataHistory(
+        geodata=geo_obj,
+        geodata_type=geo_obj.geodata_type,
+        name=geo_obj.name,
+        is_polygon=geo_obj.is_polygon,
+        data=geo_obj.data
+    ))
+
+
+def close_geodata_history(session, gid: int):
+    """Ends the validity of the geodata's current history row, e.g., when it's deleted.
+    now() is fixed for the transaction, so this lines up exactly with the valid_from of any row opened after it."""
+    session.query(TableGeodataHistory)\
+        .filter(TableGeodataHistory.geodata_key == gid, TableGeodataHistory.valid_to.is_(None))\
+        .update({TableGeodataHistory.valid_to: func.now()}, synchronize_session=False)
+
+
+def history_valid_at(session, as_of: datetime.datetime):
+    """Filter for history rows whose validity range contains the timestamp"""
+    if session.get_bind().dialect.name == 'postgresql':
+        # Written to match the GiST index on the range (see DBAdmin.migrate_geodata_history)
+        return func.tsrange(TableGeodataHistory.valid_from, TableGeodataHistory.valid_to, '[)')\
+            .op('@>')(cast(as_of, TIMESTAMP))
+    return and_(TableGeodataHistory.valid_from <= as_of,
+                or_(TableGeodataHistory.valid_to.is_(None), TableGeodataHistory.valid_to > as_of))
+
+
+def get_geodata_as_of(session, as_of: datetime.datetime, scale: float = None) -> Dict[GeodataType, List[Dict]]:
+    """Collects geodata as it was at the given time, in the same shape as get_all_geodata.
+
+    Every row valid at that time is picked out in one (range-indexed) query, so no edits get replayed.
+    Plant flags (alive, irrigated) aren't versioned, so they come from the plant as it is now.
+    """
+    tolerance = tolerance_for_scale(scale)
+    items = {k: [] for k in list(GeodataType)}
+    rows = session.query(TableGeodataHistory.geodata_key, TableGeodataHistory.geodata_type,
+                         TableGeodataHistory.name, TableGeodataHistory.data,
+                         TablePlant.plant_id, TablePlant.is_drip_irrigated)\
+        .outerjoin(TablePlantLocation, TablePlantLocation.geodata_key == TableGeodataHistory.geodata_key)\
+        .outerjoin(TablePlant, and_(TablePlantLocation.plant_location_id == TablePlant.plant_location_key,
+                                    not_(TablePlant.is_dead)))\
+        .filter(history_valid_at(session, as_of), TableGeodataHistory.data.isnot(None))\
+        .order_by(TableGeodataHistory.geodata_type.asc(), TableGeodataHistory.geodata_key.asc()).all()
+    seen_gids = set()
+    for gid, geo_type, name, data, plant_id, is_irrigated in rows:
+        if gid in seen_gids:
+            continue
+        seen_gids.add(gid)
+        data_dict = parse_geodata(gid=gid, name=name, geo_type=geo_type, data=data).to_json(tolerance=tolerance)
+        if geo_type in [GeodataType.PLANT_GROUP, GeodataType.PLANT_POINT]:
+            data_dict['is_irrigated'] = is_irrigated
+            data_dict['plant_id'] = plant_id
+        items[geo_type].append(data_dict)
     return items
 
 
@@ -146,6 +572,613 @@ def get_boundaries(session) -> List[Dict]:
     return boundaries
 
 
+def geodata_version(session, geo_types: List[GeodataType] = None) -> Tuple:
+    """Cheap aggregate over geodata that changes whenever a row of the given types is added, edited or removed"""
+    query = session.query(func.count(TableGeodata.geodata_id), func.max(TableGeodata.geodata_id),
+                          func.max(TableGeodata.update_date))
+    if geo_types is not None:
+        query = query.filter(TableGeodata.geodata_type.in_(geo_types))
+    return tuple(query.one())
+
+
+def plant_version(session) -> Tuple:
+    """Same as geodata_version, for plant rows (their flags, species & location change without touching geodata)"""
+    return tuple(session.query(func.count(TablePlant.plant_id), func.max(TablePlant.plant_id),
+                               func.max(TablePlant.update_date)).one())
+
+
+def map_version(session) -> Tuple:
+    """Signature of everything drawn on the map's base layer: all geodata plus the plant flags shown with it
+    (alive/irrigated) & the irrigation zones, since those change without touching geodata"""
+    return geodata_version(session) + plant_version(session) + irrigation_zone_version(session)
+
+
+class MapLayerCache:
+    """Process-level cache of pre-rendered map base layers (SVG fragments), keyed by (map version, variant).
+
+    Only layers for the latest version seen are kept - once the map changes, everything older is garbage.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._layers = {}  # type: Dict[str, str]
+        self._lock = threading.Lock()
+
+    def get(self, version: Tuple, variant: str) -> Optional[str]:
+        with self._lock:
+            if version != self._version:
+                return None
+            return self._layers.get(variant)
+
+    def put(self, version: Tuple, variant: str, layer: str):
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._layers = {}
+            self._layers[variant] = layer
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._layers = {}
+
+
+MAP_LAYER_CACHE = MapLayerCache()
+
+
+@dataclass(frozen=True)
+class PolygonIndex:
+    """STRtree over a set of polygons, mapping tree positions back to their table ids"""
+    ids: np.ndarray
+    polygons: np.ndarray
+    tree: STRtree
+
+    @classmethod
+    def build(cls, id_and_polygons: List[Tuple[int, Polygon]]) -> 'PolygonIndex':
+        ids = np.array([x[0] for x in id_and_polygons], dtype=np.int64)
+        polygons = np.array([x[1] for x in id_and_polygons], dtype=object)
+        return cls(ids=ids, polygons=polygons, tree=STRtree(polygons))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def covering(self, geom) -> Optional[int]:
+        """Returns the id of the first (lowest id) polygon that covers the geometry, if any"""
+        idxs = self.tree.query(geom, predicate='covered_by')
+        if len(idxs) == 0:
+            return None
+        return int(self.ids[idxs.min()])
+
+
+class RegionIndex:
+    """Process-level region & sub-region polygon indexes. These only get rebuilt when
+    a region or sub-region boundary changes (per `geodata_version`)"""
+    GEO_TYPES = [GeodataType.REGION, GeodataType.SUB_REGION]
+
+    def __init__(self):
+        self._version = None
+        self._indexes = None  # type: Optional[Tuple[PolygonIndex, PolygonIndex]]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_polygons(session, table_obj: Union[TablePlantRegion, TablePlantSubRegion], pid_col) -> \
+            List[Tuple[int, Polygon]]:
+        rows = session.query(pid_col, TableGeodata.data)\
+            .join(TableGeodata, table_obj.geodata_key == TableGeodata.geodata_id)\
+            .filter(TableGeodata.data.isnot(None))\
+            .order_by(pid_col.asc()).all()
+        id_and_polygons = []
+        for pid, data in rows:
+            id_and_polygons.append((pid, GeodataPolygon.from_string(data, name='', geo_type=None).to_shapely()))
+        return id_and_polygons
+
+    def get(self, session) -> Tuple[PolygonIndex, PolygonIndex]:
+        """Returns the (region, sub-region) indexes, rebuilding them first if any boundary changed"""
+        version = geodata_version(session, self.GEO_TYPES)
+        with self._lock:
+            if self._indexes is None or version != self._version:
+                self._indexes = (
+                    PolygonIndex.build(self._load_polygons(session, TablePlantRegion, TablePlantRegion.region_id)),
+                    PolygonIndex.build(self._load_polygons(session, TablePlantSubRegion,
+                                                           TablePlantSubRegion.sub_region_id)),
+                )
+                self._version = version
+            return self._indexes
+
+    def clear(self):
+        with self._lock:
+            self._indexes = None
+            self._version = None
+
+
+REGION_INDEX = RegionIndex()
+
+
+POSTGIS_STATUS = {}  # type: Dict[str, bool]
+
+
+def has_postgis(session) -> bool:
+    """Whether the bound database has PostGIS & a migrated geodata.geom column.
+    Everything spatial below falls back to pure Python (shapely) when this is False."""
+    eng = session.get_bind()
+    key = str(eng.url)
+    if key not in POSTGIS_STATUS:
+        if eng.dialect.name != 'postgresql':
+            POSTGIS_STATUS[key] = False
+        else:
+            POSTGIS_STATUS[key] = bool(session.execute(text(
+                'SELECT EXISTS (SELECT 1 FROM information_schema.columns '
+                'WHERE table_schema = :schema AND table_name = :table AND column_name = :col)'
+            ), {'schema': TableGeodata.__table__.schema, 'table': TableGeodata.__tablename__, 'col': 'geom'}).scalar())
+    return POSTGIS_STATUS[key]
+
+
+def geodata_to_shape(data: str, is_polygon: bool) -> BaseGeometry:
+    """Converts a TableGeodata.data string to its shapely geometry"""
+    if is_polygon:
+        return GeodataPolygon.from_string(data, name='', geo_type=None).to_shapely()
+    return GeodataPoint.from_string(data, name='', geo_type=None).to_shapely()
+
+
+def set_geom(session, geodata_obj: TableGeodata, shape: BaseGeometry):
+    """Keeps the native geometry column in sync with the text data (when there is one)"""
+    if has_postgis(session):
+        geodata_obj.geom = from_shape(shape, srid=0)
+
+
+@dataclass(frozen=True)
+class GeodataIndex:
+    """STRtree over every geodata geometry. This backs the bbox & nearest queries on non-PostGIS databases."""
+    ids: np.ndarray
+    geo_types: np.ndarray
+    geometries: np.ndarray
+    tree: STRtree
+
+    def type_mask(self, geo_types: List[GeodataType] = None) -> np.ndarray:
+        if geo_types is None:
+            return np.ones(len(self.ids), dtype=bool)
+        return np.isin(self.geo_types, [x.value for x in geo_types])
+
+
+class GeodataIndexCache:
+    """Process-level GeodataIndex, rebuilt only when geodata changes"""
+
+    def __init__(self):
+        self._version = None
+        self._index = None  # type: Optional[GeodataIndex]
+        self._lock = threading.Lock()
+
+    def get(self, session) -> GeodataIndex:
+        version = geodata_version(session)
+        with self._lock:
+            if self._index is None or version != self._version:
+                rows = session.query(TableGeodata.geodata_id, TableGeodata.geodata_type, TableGeodata.is_polygon,
+                                     TableGeodata.data)\
+                    .filter(TableGeodata.data.isnot(None))\
+                    .order_by(TableGeodata.geodata_id.asc()).all()
+                geometries = np.array([geodata_to_shape(x[3], is_polygon=x[2]) for x in rows], dtype=object)
+                self._index = GeodataIndex(
+                    ids=np.array([x[0] for x in rows], dtype=np.int64),
+                    geo_types=np.array([GeodataType(x[1]).value for x in rows], dtype=object),
+                    geometries=geometries,
+                    tree=STRtree(geometries)
+                )
+                self._version = version
+            return self._index
+
+
+GEODATA_INDEX = GeodataIndexCache()
+
+
+def find_covering_id(session, table_obj: Union[TablePlantRegion, TablePlantSubRegion], pid_col, pt: Point) -> \
+        Optional[int]:
+    """Gets the id of the first region/sub-region covering the point (ST_Covers in PostGIS, STRtree otherwise)"""
+    if has_postgis(session):
+        return session.query(pid_col)\
+            .join(TableGeodata, table_obj.geodata_key == TableGeodata.geodata_id)\
+            .filter(func.ST_Covers(TableGeodata.geom, func.ST_MakePoint(pt.x, pt.y)))\
+            .order_by(pid_col.asc()).limit(1).scalar()
+    region_index, sub_region_index = REGION_INDEX.get(session)
+    return (region_index if table_obj is TablePlantRegion else sub_region_index).covering(pt)
+
+
+def find_location_parents(session, pt: Point) -> Tuple[Optional[int], Optional[int]]:
+    """(sub region, region) keys for a plant location anchored at the point: its sub region & that sub region's
+    region, or just the covering region when it's in no sub region. None where nothing covers it - the same rule
+    location_assignment.reassign_plant_locations applies in bulk"""
+    sub_region_id = find_covering_id(session, TablePlantSubRegion, TablePlantSubRegion.sub_region_id, pt)
+    if sub_region_id is not None:
+        return sub_region_id, session.query(TablePlantSubRegion.region_key)\
+            .filter(TablePlantSubRegion.sub_region_id == sub_region_id).scalar()
+    return None, find_covering_id(session, TablePlantRegion, TablePlantRegion.region_id, pt)
+
+
+def get_geodata_ids_in_bbox(session, bbox: Tuple[float, float, float, float],
+                            geo_types: List[GeodataType] = None) -> List[int]:
+    """Gets ids of all geodata whose bounding box intersects the given (minx, miny, maxx, maxy) box"""
+    if has_postgis(session):
+        query = session.query(TableGeodata.geodata_id)\
+            .filter(TableGeodata.geom.op('&&')(func.ST_MakeEnvelope(*bbox, 0)))
+        if geo_types is not None:
+            query = query.filter(TableGeodata.geodata_type.in_(geo_types))
+        return [x[0] for x in query.order_by(TableGeodata.geodata_id.asc()).all()]
+    index = GEODATA_INDEX.get(session)
+    idxs = np.sort(index.tree.query(shapely.box(*bbox)))
+    idxs = idxs[index.type_mask(geo_types)[idxs]]
+    return index.ids[idxs].tolist()
+
+
+def get_nearest_geodata_ids(session, x: float, y: float, k: int = 5,
+                            geo_types: List[GeodataType] = None) -> List[Tuple[int, float]]:
+    """Gets the k nearest geodata items (id, distance) to a point, closest first"""
+    if has_postgis(session):
+        pt = func.ST_MakePoint(x, y)
+        query = session.query(TableGeodata.geodata_id, func.ST_Distance(TableGeodata.geom, pt))\
+            .filter(TableGeodata.geom.isnot(None))
+        if geo_types is not None:
+            query = query.filter(TableGeodata.geodata_type.in_(geo_types))
+        return [(gid, float(dist)) for gid, dist in query.order_by(TableGeodata.geom.op('<->')(pt)).limit(k).all()]
+    index = GEODATA_INDEX.get(session)
+    idxs = np.flatnonzero(index.type_mask(geo_types))
+    if len(idxs) == 0:
+        return []
+    distances = shapely.distance(index.geometries[idxs], Point(x, y))
+    order = np.argsort(distances, kind='stable')[:k]
+    return [(int(index.ids[idxs[i]]), float(distances[i])) for i in order]
+
+
+def plant_footprint(data: str, is_polygon: bool) -> BaseGeometry:
+    """The area a plant covers on the map - its group's polygon or the circle around its point"""
+    if is_polygon:
+        return GeodataPolygon.from_string(data, name='', geo_type=None).to_shapely()
+    point = GeodataPoint.from_string(data, name='', geo_type=None)
+    return shapely.buffer(point.to_shapely(), point.r)
+
+
+@dataclass(frozen=True)
+class PlantIndexSnapshot:
+    """Immutable view of the plant spatial index: a bulk-built STRtree plus the footprints changed since.
+
+    Tree entries that have since been edited or removed are tombstoned instead of rebuilding the tree,
+    and their current footprints (if any) are checked linearly from the small delta arrays.
+    """
+    ids: np.ndarray
+    footprints: np.ndarray
+    tree: STRtree
+    tombstones: frozenset
+    delta_ids: np.ndarray
+    delta_footprints: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self.tombstones) + len(self.delta_ids)
+
+    def _collect(self, tree_idxs: np.ndarray, delta_mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Merges tree hits (minus tombstones) with delta hits into (ids, footprints)"""
+        if len(self.tombstones) > 0 and len(tree_idxs) > 0:
+            tree_idxs = tree_idxs[~np.isin(self.ids[tree_idxs], list(self.tombstones))]
+        ids = np.concatenate([self.ids[tree_idxs], self.delta_ids[delta_mask]])
+        footprints = np.concatenate([self.footprints[tree_idxs], self.delta_footprints[delta_mask]])
+        return ids, footprints
+
+    def at(self, x: float, y: float) -> List[Tuple[int, float]]:
+        """Footprints under the point, smallest first (so a plant inside a plant group comes before the group)"""
+        pt = Point(x, y)
+        ids, footprints = self._collect(self.tree.query(pt, predicate='intersects'),
+                                        shapely.intersects(self.delta_footprints, pt))
+        order = np.lexsort((ids, shapely.area(footprints)))
+        return [(int(ids[i]), 0.0) for i in order]
+
+    def within(self, x: float, y: float, distance: float) -> List[Tuple[int, float]]:
+        """Footprints within the distance (mm) of the point, closest first"""
+        pt = Point(x, y)
+        ids, footprints = self._collect(self.tree.query(pt, predicate='dwithin', distance=distance),
+                                        shapely.dwithin(self.delta_footprints, pt, distance))
+        distances = shapely.distance(footprints, pt)
+        order = np.lexsort((ids, distances))
+        return [(int(ids[i]), float(distances[i])) for i in order]
+
+    def nearest(self, x: float, y: float, k: int = 5) -> List[Tuple[int, float]]:
+        """The k footprints closest to the point, closest first.
+        This widens a dwithin search until it holds k items, which is exact since every closer item is included."""
+        if k <= 0 or len(self) == 0:
+            return []
+        pt = Point(x, y)
+        radius = 1.0
+        if len(self.ids) > 0:
+            # Nearest tree item (tombstoned or not) is a good first guess at the radius
+            radius = max(radius, float(self.tree.query_nearest(pt, return_distance=True)[1][0]))
+        while True:
+            hits = self.within(x, y, radius)
+            if len(hits) >= k or len(hits) == len(self):
+                return hits[:k]
+            radius *= 2
+
+
+class PlantSpatialIndex:
+    """Process-level spatial index over plant points & plant groups, kept incrementally up to date.
+
+    Rather than rebuilding on every change, a refresh only pulls the rows edited since the last one
+    (plus the id list, to catch removals) and puts them in the snapshot's delta. The tree itself is
+    only rebuilt once enough of it is stale.
+    """
+    GEO_TYPES = [GeodataType.PLANT_POINT, GeodataType.PLANT_GROUP]
+    REBUILD_RATIO = 0.1
+    MIN_REBUILD_SIZE = 64
+    # update_date is when the writing transaction started, so rows committed by slower transactions can
+    #   land behind the last refresh - always look back a bit
+    REFRESH_OVERLAP = datetime.timedelta(minutes=5)
+
+    def __init__(self):
+        self._version = None
+        self._is_stale = False
+        self._snapshot = None  # type: Optional[PlantIndexSnapshot]
+        self._entries = {}  # type: Dict[int, Tuple[str, BaseGeometry]]
+        self._tree_ids = set()
+        self._delta = {}  # type: Dict[int, BaseGeometry]
+        self._tombstones = set()
+        self._max_update_date = None
+        self._lock = threading.Lock()
+
+    def _load_rows(self, session, since: datetime.datetime = None, geodata_ids: List[int] = None) -> List[Tuple]:
+        query = session.query(TableGeodata.geodata_id, TableGeodata.data, TableGeodata.is_polygon,
+                              TableGeodata.update_date)\
+            .filter(TableGeodata.geodata_type.in_(self.GEO_TYPES), TableGeodata.data.isnot(None))
+        if since is not None:
+            query = query.filter(TableGeodata.update_date >= since)
+        if geodata_ids is not None:
+            query = query.filter(TableGeodata.geodata_id.in_(geodata_ids))
+        return query.all()
+
+    def _track_update_date(self, rows: List[Tuple]):
+        dates = [x[3] for x in rows if x[3] is not None]
+        if len(dates) > 0:
+            self._max_update_date = max(dates + ([self._max_update_date] if self._max_update_date else []))
+
+    def _build_snapshot(self):
+        self._snapshot = PlantIndexSnapshot(
+            ids=self._snapshot.ids,
+            footprints=self._snapshot.footprints,
+            tree=self._snapshot.tree,
+            tombstones=frozenset(self._tombstones),
+            delta_ids=np.array(list(self._delta.keys()), dtype=np.int64),
+            delta_footprints=np.array(list(self._delta.values()), dtype=object)
+        )
+
+    def _rebuild_tree(self):
+        ids = sorted(self._entries.keys())
+        footprints = np.array([self._entries[x][1] for x in ids], dtype=object)
+        self._snapshot = PlantIndexSnapshot(
+            ids=np.array(ids, dtype=np.int64),
+            footprints=footprints,
+            tree=STRtree(footprints),
+            tombstones=frozenset(),
+            delta_ids=np.array([], dtype=np.int64),
+            delta_footprints=np.array([], dtype=object)
+        )
+        self._tree_ids = set(ids)
+        self._delta = {}
+        self._tombstones = set()
+
+    def _load_all(self, session):
+        rows = self._load_rows(session)
+        self._entries = {gid: (data, plant_footprint(data, is_polygon=is_poly)) for gid, data, is_poly, _ in rows}
+        self._max_update_date = None
+        self._track_update_date(rows)
+        self._rebuild_tree()
+
+    def _refresh(self, session):
+        live_ids = {x[0] for x in session.query(TableGeodata.geodata_id)
+                    .filter(TableGeodata.geodata_type.in_(self.GEO_TYPES), TableGeodata.data.isnot(None)).all()}
+        since = None if self._max_update_date is None else self._max_update_date - self.REFRESH_OVERLAP
+        rows = self._load_rows(session, since=since)
+        missing = live_ids - self._entries.keys() - {x[0] for x in rows}
+        if len(missing) > 0:
+            # New rows with an older timestamp than the overlap covers
+            rows += self._load_rows(session, geodata_ids=list(missing))
+        self._track_update_date(rows)
+
+        for gid in self._entries.keys() - live_ids:
+            del self._entries[gid]
+            self._delta.pop(gid, None)
+            if gid in self._tree_ids:
+                self._tombstones.add(gid)
+        for gid, data, is_polygon, _ in rows:
+            if gid in self._entries and self._entries[gid][0] == data:
+                continue
+            footprint = plant_footprint(data, is_polygon=is_polygon)
+            self._entries[gid] = (data, footprint)
+            self._delta[gid] = footprint
+            if gid in self._tree_ids:
+                self._tombstones.add(gid)
+
+        if len(self._tombstones) + len(self._delta) > max(self.MIN_REBUILD_SIZE,
+                                                          self.REBUILD_RATIO * len(self._tree_ids)):
+            self._rebuild_tree()
+        else:
+            self._build_snapshot()
+
+    def get(self, session) -> PlantIndexSnapshot:
+        version = geodata_version(session, self.GEO_TYPES)
+        with self._lock:
+            if self._snapshot is None:
+                self._load_all(session)
+            elif self._is_stale or version != self._version:
+                self._refresh(session)
+            self._version = version
+            self._is_stale = False
+            return self._snapshot
+
+    def mark_stale(self):
+        """Forces a refresh on the next lookup, for edits the version signature can't see (same count, same second)"""
+        with self._lock:
+            self._is_stale = True
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._snapshot = None
+            self._entries = {}
+
+
+PLANT_SPATIAL_INDEX = PlantSpatialIndex()
+
+
+def describe_plant_hits(session, hits: List[Tuple[int, float]]) -> List[Dict]:
+    """Attaches names & (live) plant ids to (geodata_id, distance) results, keeping their order"""
+    if len(hits) == 0:
+        return []
+    rows = session.query(TableGeodata.geodata_id, TableGeodata.name, TableGeodata.geodata_type, TablePlant.plant_id)\
+        .outerjoin(TablePlantLocation, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
+        .outerjoin(TablePlant, and_(TablePlantLocation.plant_location_id == TablePlant.plant_location_key,
+                                    not_(TablePlant.is_dead)))\
+        .filter(TableGeodata.geodata_id.in_([x[0] for x in hits])).all()
+    details = {}
+    for gid, name, geo_type, plant_id in rows:
+        if details.get(gid, {}).get('plant_id') is None:
+            details[gid] = {'gid': gid, 'name': name, 'type': GeodataType(geo_type).value, 'plant_id': plant_id}
+    return [dict(details[gid], distance=round(distance, 1)) for gid, distance in hits if gid in details]
+
+
+def get_plants_at(session, x: float, y: float) -> List[Dict]:
+    """Which plants are under this point"""
+    return describe_plant_hits(session, PLANT_SPATIAL_INDEX.get(session).at(x, y))
+
+
+def get_plants_within(session, x: float, y: float, distance: float) -> List[Dict]:
+    """All plants within the distance (mm) of this point, closest first"""
+    return describe_plant_hits(session, PLANT_SPATIAL_INDEX.get(session).within(x, y, distance))
+
+
+def get_nearest_plants(session, x: float, y: float, k: int = 5) -> List[Dict]:
+    """The k plants nearest to this point, closest first"""
+    return describe_plant_hits(session, PLANT_SPATIAL_INDEX.get(session).nearest(x, y, k))
+
+
+def irrigation_zone_version(session) -> Tuple:
+    """Changes whenever a zone is added/removed or a zone's polygon is edited"""
+    return tuple(session.query(func.count(TableIrrigationZone.zone_id), func.max(TableIrrigationZone.zone_id),
+                               func.max(TableIrrigationZone.update_date), func.max(TableGeodata.update_date))
+                 .join(TableGeodata, TableIrrigationZone.geodata_key == TableGeodata.geodata_id).one())
+
+
+class IrrigationCoverage:
+    """Process-level spatial join of plant locations against irrigation zones.
+
+    A plant is covered by the zones its anchor (a point's center, or a point inside a group) falls in.
+    Zones are few, so a zone change redoes the join for every plant in one vectorized tree query,
+    while a plant location change only rejoins the locations edited since the last refresh.
+    """
+    GEO_TYPES = PlantSpatialIndex.GEO_TYPES
+    REFRESH_OVERLAP = PlantSpatialIndex.REFRESH_OVERLAP
+
+    def __init__(self):
+        self._zone_version = None
+        self._location_version = None
+        self._is_stale = False
+        self._zones = None  # type: Optional[PolygonIndex]
+        self._zone_names = {}  # type: Dict[int, str]
+        self._plant_data = {}  # type: Dict[int, str]
+        self._coverage = {}  # type: Dict[int, Tuple[int, ...]]
+        self._max_update_date = None
+        self._lock = threading.Lock()
+
+    def _load_zones(self, session):
+        rows = session.query(TableIrrigationZone.zone_id, TableIrrigationZone.zone_name, TableGeodata.data)\
+            .join(TableGeodata, TableIrrigationZone.geodata_key == TableGeodata.geodata_id)\
+            .filter(TableGeodata.is_polygon, TableGeodata.data.isnot(None))\
+            .order_by(TableIrrigationZone.zone_id.asc()).all()
+        self._zones = PolygonIndex.build([(zid, geodata_to_shape(data, is_polygon=True)) for zid, _, data in rows])
+        self._zone_names = {zid: name for zid, name, _ in rows}
+
+    def _load_plant_rows(self, session, since: datetime.datetime = None) -> List[Tuple]:
+        query = session.query(TableGeodata.geodata_id, TableGeodata.data, TableGeodata.is_polygon,
+                              TableGeodata.update_date)\
+            .filter(TableGeodata.geodata_type.in_(self.GEO_TYPES), TableGeodata.data.isnot(None))
+        if since is not None:
+            query = query.filter(TableGeodata.update_date >= since)
+        return query.all()
+
+    def _join(self, rows: List[Tuple]):
+        """Recomputes the covering zones for the (geodata_id, data, is_polygon, update_date) rows"""
+        if len(rows) == 0:
+            return
+        dates = [x[3] for x in rows if x[3] is not None] + ([self._max_update_date] if self._max_update_date else [])
+        self._max_update_date = max(dates) if len(dates) > 0 else None
+        for gid, data, _, _ in rows:
+            self._plant_data[gid] = data
+            self._coverage.pop(gid, None)
+        if len(self._zones) == 0:
+            return
+        anchors = shapely.point_on_surface(np.array([geodata_to_shape(x[1], is_polygon=x[2]) for x in rows],
+                                                    dtype=object))
+        anchor_idxs, zone_idxs = self._zones.tree.query(anchors, predicate='covered_by')
+        covering = {}
+        for anchor_idx, zone_idx in zip(anchor_idxs.tolist(), zone_idxs.tolist()):
+            covering.setdefault(rows[anchor_idx][0], []).append(int(self._zones.ids[zone_idx]))
+        for gid, zone_ids in covering.items():
+            self._coverage[gid] = tuple(sorted(zone_ids))
+
+    def _refresh(self, session):
+        live_ids = {x[0] for x in session.query(TableGeodata.geodata_id)
+                    .filter(TableGeodata.geodata_type.in_(self.GEO_TYPES), TableGeodata.data.isnot(None)).all()}
+        for gid in self._plant_data.keys() - live_ids:
+            del self._plant_data[gid]
+            self._coverage.pop(gid, None)
+        since = None if self._max_update_date is None else self._max_update_date - self.REFRESH_OVERLAP
+        rows = [x for x in self._load_plant_rows(session, since=since) if self._plant_data.get(x[0]) != x[1]]
+        missing = live_ids - self._plant_data.keys() - {x[0] for x in rows}
+        if len(missing) > 0:
+            # New rows with an older timestamp than the overlap covers
+            rows += [x for x in self._load_plant_rows(session) if x[0] in missing]
+        self._join(rows)
+
+    def get(self, session) -> Tuple[Dict[int, Tuple[int, ...]], Dict[int, str]]:
+        """Returns the zone ids covering each plant location's geodata id (uncovered ones are left out),
+        along with the zone names by id"""
+        zone_version = irrigation_zone_version(session)
+        location_version = geodata_version(session, self.GEO_TYPES)
+        with self._lock:
+            if self._zones is None or zone_version != self._zone_version:
+                self._load_zones(session)
+                self._plant_data = {}
+                self._coverage = {}
+                self._max_update_date = None
+                self._join(self._load_plant_rows(session))
+            elif self._is_stale or location_version != self._location_version:
+                self._refresh(session)
+            self._zone_version = zone_version
+            self._location_version = location_version
+            self._is_stale = False
+            return dict(self._coverage), dict(self._zone_names)
+
+    def mark_stale(self):
+        with self._lock:
+            self._is_stale = True
+
+    def clear(self):
+        with self._lock:
+            self._zone_version = None
+            self._zones = None
+
+
+IRRIGATION_COVERAGE = IrrigationCoverage()
+
+
+def get_irrigated_geodata_ids(session) -> Optional[set]:
+    """Geodata ids of all plant locations inside an irrigation zone.
+    None when no zones are set up, in which case plants' own (hand-set) irrigation flags apply."""
+    coverage, zone_names = IRRIGATION_COVERAGE.get(session)
+    if len(zone_names) == 0:
+        return None
+    return set(coverage.keys())
+
+
+def get_irrigation_zones_for(session, gid: int) -> List[str]:
+    """Names of the irrigation zones covering a plant location's geodata"""
+    coverage, zone_names = IRRIGATION_COVERAGE.get(session)
+    return [zone_names[x] for x in coverage.get(gid, ())]
+
+
 GEODATA_TABLE_OBJ_TYPE = Union[TableGeodata, TablePlantLocation, TablePlantSubRegion, TablePlantRegion]
 
 
@@ -162,17 +1195,23 @@ def process_gdata_and_assign_location(session, table_obj: GEODATA_TABLE_OBJ_TYPE
         is_polygon = True
 
     if geo_type in [GeodataType.OTHER_POINT, GeodataType.OTHER_POLYGON]:
+        invalidate_geodata_cache(table_obj.geodata_id)
         table_obj.name = geodata_name
         table_obj.data = geodata.to_string()
         table_obj.is_polygon = is_polygon
         table_obj.geodata_type = geo_type
+        if geo_type == GeodataType.OTHER_POLYGON and 'height_mm' in form_data and \
+                has_column(session, TableGeodata, 'height_mm'):
+            table_obj.height_mm = int(form_data['height_mm']) if form_data['height_mm'] not in [None, ''] else None
+        geo_obj = table_obj
     elif table_obj.geodata:
         # Apply new geodata to existing geodata object
+        invalidate_geodata_cache(table_obj.geodata.geodata_id)
         table_obj.geodata.name = geodata_name
         table_obj.geodata.data = geodata.to_string()
         table_obj.geodata.is_polygon = is_polygon
         table_obj.geodata.geodata_type = geo_type
-
+        geo_obj = table_obj.geodata
     else:
         # Create a new geodata object, bind to the other object
         geo_obj = TableGeodata(
@@ -182,36 +1221,31 @@ def process_gdata_and_assign_location(session, table_obj: GEODATA_TABLE_OBJ_TYPE
             data=geodata.to_string()
         )
         table_obj.geodata = geo_obj
+    set_geom(session, geo_obj, geodata_to_shape(geo_obj.data, is_polygon=is_polygon))
+    record_geodata_version(session, geo_obj)
+    MAP_LAYER_CACHE.clear()
+
+    if geo_type in RegionIndex.GEO_TYPES:
+        # Other workers pick this up through geodata_version, but this one shouldn't wait on a new timestamp
+        REGION_INDEX.clear()
+    elif geo_type in PlantSpatialIndex.GEO_TYPES:
+        PLANT_SPATIAL_INDEX.mark_stale()
+        IRRIGATION_COVERAGE.mark_stale()
+    elif geo_type == GeodataType.OTHER_POLYGON:
+        # Could be an irrigation zone
+        IRRIGATION_COVERAGE.clear()
 
     # Extract first or only point for next section
-    if is_polygon:
-        pt = Point(geodata.points[0])
-    else:
-        pt = Point(geodata.x, geodata.y)
+    pt = shapely.points(geodata.points[0] if is_polygon else geodata.coords)
 
     if isinstance(table_obj, TablePlantRegion):
         table_obj.region_name = geodata_name
         return table_obj
     elif isinstance(table_obj, TablePlantSubRegion):
         table_obj.sub_region_name = geodata_name
-        regions: List[TablePlantRegion]
-        regions = session.query(TablePlantRegion).all()
-        for region in regions:
-            region_poly = Polygon(GeodataPolygon.from_string(
-                region.geodata.data, name=region.geodata.name, geo_type=region.geodata.geodata_type).points)
-            if region_poly.covers(pt):
-                table_obj.region_key = region.region_id
-                break
+        # Cleared when nothing covers it anymore, as the bulk reassignment does
+        table_obj.region_key = find_covering_id(session, TablePlantRegion, TablePlantRegion.region_id, pt)
     elif isinstance(table_obj, TablePlantLocation):
         table_obj.plant_location_name = geodata_name
-
-        sub_regions: List[TablePlantSubRegion]
-        sub_regions = session.query(TablePlantSubRegion).all()
-        for sub_region in sub_regions:
-            sub_region_poly = Polygon(GeodataPolygon.from_string(
-                sub_region.geodata.data, name=sub_region.geodata.name, geo_type=sub_region.geodata.geodata_type).points)
-            if sub_region_poly.covers(pt):
-                table_obj.sub_region_key = sub_region.sub_region_id
-                table_obj.region_key = sub_region.region_key
-                break
+        table_obj.sub_region_key, table_obj.region_key = find_location_parents(session, pt)
     return table_obj
@@ -0,0 +1,271 @@
+"""Streaming geodata export, as GeoJSON or a FlatGeobuf-style binary file w/ a packed Hilbert R-tree index.
+
+Rows come off a server-side cursor a batch at a time & are written out as they arrive, so memory use doesn't
+grow with the number of features. (The binary index is the one exception - it's 40 bytes per feature and has to
+be complete before the features it points to, so the features are spooled to a temp file while it's built.)
+
+Binary layout (all little-endian):
+    magic       8 bytes, MAGIC
+    header_len  uint32
+    header      UTF-8 JSON: feature_count, bbox, columns, index_node_size & index_levels ([start, count] of
+                each level's nodes, root level first)
+    index       index nodes, each (minx, miny, maxx, maxy: float64, offset: uint64). A leaf's offset is its
+                feature's byte offset into the feature section, any other node's is the index of its first child
+    features    each a uint32 length, followed by a uint32 WKB length, the WKB geometry & UTF-8 JSON properties
+"""
+import json
+import struct
+import tempfile
+from typing import (
+    IO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import (
+    and_,
+    func,
+    not_
+)
+
+from plant_tracker.core.geodata import (
+    GeodataPoint,
+    GeodataPolygon
+)
+from plant_tracker.model import (
+    TableGeodata,
+    TablePlant,
+    TablePlantLocation,
+    TablePlantRegion,
+    TablePlantSubRegion,
+    TableSpecies
+)
+
+EXPORT_FORMATS = {
+    'geojson': {'mimetype': 'application/geo+json', 'ext': 'geojson'},
+    'binary': {'mimetype': 'application/octet-stream', 'ext': 'ptgb'},
+}
+# Rows fetched from the cursor at a time
+BATCH_SIZE = 1000
+MAGIC = b'PTGB\x00\x00\x00\x01'
+INDEX_NODE_SIZE = 16
+NODE_DTYPE = np.dtype([('minx', '<f8'), ('miny', '<f8'), ('maxx', '<f8'), ('maxy', '<f8'), ('offset', '<u8')])
+HILBERT_MAX = (1 << 16) - 1
+# Property columns on each exported feature
+COLUMNS = ['geodata_id', 'geodata_type', 'name', 'r', 'plant_id', 'common_name', 'scientific_name',
+           'region_name', 'sub_region_name']
+
+
+def iter_export_rows(session, batch_size: int = BATCH_SIZE) -> Iterator[Tuple]:
+    """All geodata w/ their (alive) plant, species, region & sub region, streamed off a server-side cursor.
+    A geodata's own region/sub region counts for boundaries; plant locations get the ones they're assigned to."""
+    own_region = aliased(TablePlantRegion)
+    own_sub_region = aliased(TablePlantSubRegion)
+    region = aliased(TablePlantRegion)
+    sub_region = aliased(TablePlantSubRegion)
+    region_id = func.coalesce(TablePlantLocation.region_key, own_sub_region.region_key, own_region.region_id)
+    sub_region_id = func.coalesce(TablePlantLocation.sub_region_key, own_sub_region.sub_region_id)
+    query = session.query(TableGeodata.geodata_id, TableGeodata.geodata_type, TableGeodata.name,
+                          TableGeodata.is_polygon, TableGeodata.data, TablePlant.plant_id, TableSpecies.common_name,
+                          TableSpecies.scientific_name, region.region_name, sub_region.sub_region_name)\
+        .outerjoin(TablePlantLocation, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
+        .outerjoin(TablePlant, and_(TablePlantLocation.plant_location_id == TablePlant.plant_location_key,
+                                    not_(TablePlant.is_dead)))\
+        .outerjoin(TableSpecies, TablePlant.species_key == TableSpecies.species_id)\
+        .outerjoin(own_region, own_region.geodata_key == TableGeodata.geodata_id)\
+        .outerjoin(own_sub_region, own_sub_region.geodata_key == TableGeodata.geodata_id)\
+        .outerjoin(region, region.region_id == region_id)\
+        .outerjoin(sub_region, sub_region.sub_region_id == sub_region_id)\
+        .filter(TableGeodata.data.isnot(None))\
+        .order_by(TableGeodata.geodata_id.asc())\
+        .execution_options(stream_results=True, yield_per=batch_size)
+    last_gid = None
+    for row in query:
+        if row[0] == last_gid:
+            # A second plant at the same location - the geometry's already been exported
+            continue
+        last_gid = row[0]
+        yield tuple(row)
+
+
+def row_to_feature(row: Tuple) -> Tuple[Dict, Dict]:
+    """Splits an export row into its GeoJSON geometry & properties"""
+    gid, geo_type, name, is_polygon, data, plant_id, common_name, scientific_name, region_name, sub_region_name = row
+    props = {'geodata_id': gid, 'geodata_type': str(geo_type), 'name': name, 'r': None, 'plant_id': plant_id,
+             'common_name': common_name, 'scientific_name': scientific_name, 'region_name': region_name,
+             'sub_region_name': sub_region_name}
+    if is_polygon:
+        coords = GeodataPolygon.from_string(data, name=name, geo_type=geo_type).coords.tolist()
+        geometry = {'type': 'Polygon', 'coordinates': [coords + coords[:1]]}
+    else:
+        point = GeodataPoint.from_string(data, name=name, geo_type=geo_type)
+        props['r'] = point.r
+        geometry = {'type': 'Point', 'coordinates': [point.x, point.y]}
+    return geometry, props
+
+
+def iter_geojson(rows: Iterator[Tuple]) -> Iterator[str]:
+    """Writes a GeoJSON FeatureCollection piece by piece, one feature per chunk"""
+    yield '{"type": "FeatureCollection", "features": ['
+    sep = '\n'
+    for row in rows:
+        geometry, props = row_to_feature(row)
+        yield sep + json.dumps({'type': 'Feature', 'geometry': geometry, 'properties': props})
+        sep = ',\n'
+    yield '\n]}\n'
+
+
+def hilbert_values(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Hilbert curve position of each (x, y) on a 65536 x 65536 grid (vectorized; after threadlocalmutex.com)"""
+    x = x.astype(np.uint32)
+    y = y.astype(np.uint32)
+    a = x ^ y
+    b = HILBERT_MAX ^ a
+    c = HILBERT_MAX ^ (x | y)
+    d = x & (y ^ HILBERT_MAX)
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+    for shift in [2, 4, 8]:
+        a, b, c, d = A, B, C, D
+        if shift != 8:
+            A = (a & (a >> shift)) ^ (b & (b >> shift))
+            B = (a & (b >> shift)) ^ (b & ((a ^ b) >> shift))
+        C = C ^ ((a & (c >> shift)) ^ (b & (d >> shift)))
+        D = D ^ ((b & (c >> shift)) ^ ((a ^ b) & (d >> shift)))
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+    i0 = x ^ y
+    i1 = b | (HILBERT_MAX ^ (i0 | a))
+    for shift, mask in [(8, 0x00FF00FF), (4, 0x0F0F0F0F), (2, 0x33333333), (1, 0x55555555)]:
+        i0 = (i0 | (i0 << shift)) & mask
+        i1 = (i1 | (i1 << shift)) & mask
+    return (i1 << 1) | i0
+
+
+def build_packed_rtree(bboxes: np.ndarray, offsets: np.ndarray, node_size: int = INDEX_NODE_SIZE) -> \
+        Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Packs the (n, 4) feature bboxes into a static R-tree: leaves sorted along the Hilbert curve, each parent
+    covering node_size children. Returns the nodes (root level first) & each level's [start, count]."""
+    extent = np.concatenate([bboxes[:, :2].min(axis=0), bboxes[:, 2:].max(axis=0)])
+    size = np.maximum(extent[2:] - extent[:2], 1e-9)
+    centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+    grid = np.floor((centers - extent[:2]) / size * HILBERT_MAX)
+    order = np.argsort(hilbert_values(grid[:, 0], grid[:, 1]), kind='stable')
+
+    leaves = np.empty(len(bboxes), dtype=NODE_DTYPE)
+    for i, col in enumerate(['minx', 'miny', 'maxx', 'maxy']):
+        leaves[col] = bboxes[order, i]
+    leaves['offset'] = offsets[order]
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        children = levels[-1]
+        starts = np.arange(0, len(children), node_size)
+        parents = np.empty(len(starts), dtype=NODE_DTYPE)
+        for col, reducer in [('minx', np.minimum), ('miny', np.minimum), ('maxx', np.maximum), ('maxy', np.maximum)]:
+            parents[col] = reducer.reduceat(children[col], starts)
+        parents['offset'] = starts
+        levels.append(parents)
+
+    # Root first: child offsets become absolute node indexes
+    level_bounds = []
+    start = 0
+    for level in reversed(levels):
+        level_bounds.append((start, len(level)))
+        start += len(level)
+    for i, level in enumerate(reversed(levels[1:])):
+        level['offset'] += level_bounds[i + 1][0]
+    return np.concatenate(list(reversed(levels))), level_bounds
+
+
+def write_binary(rows: Iterator[Tuple], out: IO[bytes], node_size: int = INDEX_NODE_SIZE) -> int:
+    """Writes the export rows to `out` in the binary format described above. Returns the feature count."""
+    bboxes = []
+    offsets = []
+    with tempfile.TemporaryFile() as spool:
+        pos = 0
+        for row in rows:
+            geometry, props = row_to_feature(row)
+            geom = shape(geometry)
+            bboxes.append(geom.bounds if props['r'] is None else
+                          (geom.x - props['r'], geom.y - props['r'], geom.x + props['r'], geom.y + props['r']))
+            wkb = shapely.to_wkb(geom)
+            body = struct.pack('<I', len(wkb)) + wkb + json.dumps(props).encode()
+            spool.write(struct.pack('<I', len(body)) + body)
+            offsets.append(pos)
+            pos += 4 + len(body)
+
+        if len(bboxes) > 0:
+            nodes, level_bounds = build_packed_rtree(np.array(bboxes, dtype=np.float64),
+                                                     np.array(offsets, dtype=np.uint64), node_size=node_size)
+            bbox = [float(nodes[0][x]) for x in ['minx', 'miny', 'maxx', 'maxy']]
+        else:
+            nodes, level_bounds, bbox = np.empty(0, dtype=NODE_DTYPE), [], None
+        header = json.dumps({
+            'feature_count': len(offsets),
+            'bbox': bbox,
+            'columns': COLUMNS,
+            'index_node_size': node_size,
+            'index_levels': level_bounds,
+        }).encode()
+        out.write(MAGIC + struct.pack('<I', len(header)) + header)
+        out.write(nodes.tobytes())
+        spool.seek(0)
+        while chunk := spool.read(1 << 20):
+            out.write(chunk)
+    return len(offsets)
+
+
+def iter_binary(rows: Iterator[Tuple], chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """The binary export in chunks, for streaming responses (written to a temp file first for the index)"""
+    with tempfile.TemporaryFile() as out:
+        write_binary(rows, out)
+        out.seek(0)
+        while chunk := out.read(chunk_size):
+            yield chunk
+
+
+def read_binary_header(f: IO[bytes]) -> Tuple[Dict, np.ndarray, int]:
+    """Reads the header & index of a binary export. Returns them along with where the features start."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a plant tracker binary geodata export')
+    header_len, = struct.unpack('<I', f.read(4))
+    header = json.loads(f.read(header_len))
+    n_nodes = sum(x[1] for x in header['index_levels'])
+    nodes = np.frombuffer(f.read(n_nodes * NODE_DTYPE.itemsize), dtype=NODE_DTYPE)
+    return header, nodes, len(MAGIC) + 4 + header_len + n_nodes * NODE_DTYPE.itemsize
+
+
+def search_binary(f: IO[bytes], bbox: Optional[Tuple[float, float, float, float]] = None) -> \
+        Iterator[Tuple[bytes, Dict]]:
+    """Yields (WKB, properties) for the features of a binary export whose bbox intersects the given one
+    (or all of them), walking the index down from the root instead of scanning every feature"""
+    header, nodes, features_start = read_binary_header(f)
+    levels = header['index_levels']
+    if len(levels) == 0:
+        return
+    idxs = np.arange(levels[0][0], levels[0][0] + levels[0][1])
+    for depth in range(len(levels)):
+        if bbox is not None:
+            level_nodes = nodes[idxs]
+            idxs = idxs[(level_nodes['minx'] <= bbox[2]) & (level_nodes['maxx'] >= bbox[0])
+                        & (level_nodes['miny'] <= bbox[3]) & (level_nodes['maxy'] >= bbox[1])]
+        if depth == len(levels) - 1:
+            break
+        level_end = levels[depth + 1][0] + levels[depth + 1][1]
+        firsts = nodes['offset'][idxs].astype(np.int64)
+        idxs = np.concatenate([np.arange(x, min(x + header['index_node_size'], level_end)) for x in firsts]) \
+            if len(firsts) > 0 else np.empty(0, dtype=np.int64)
+    for offset in np.sort(nodes['offset'][idxs]):
+        f.seek(features_start + int(offset))
+        length, wkb_len = struct.unpack('<II', f.read(8))
+        body = f.read(length - 4)
+        yield body[:wkb_len], json.loads(body[wkb_len:])
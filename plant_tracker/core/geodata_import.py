@@ -0,0 +1,303 @@
+"""Bulk geodata import from GeoJSON FeatureCollections & KML, streamed feature by feature.
+
+Coordinates are taken as they are - in map mm, like everything else in geodata - since the map has no
+geographic reference to project lon/lat onto.
+"""
+import io
+import json
+import re
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+from xml.etree import ElementTree
+
+from geoalchemy2.shape import from_shape
+import numpy as np
+from sqlalchemy import insert
+
+from plant_tracker.core.geodata import (
+    MAP_LAYER_CACHE,
+    PLANT_SPATIAL_INDEX,
+    REGION_INDEX,
+    GeodataPoint,
+    GeodataPolygon,
+    geodata_to_shape,
+    has_postgis
+)
+from plant_tracker.core.location_assignment import reassign_plant_locations
+from plant_tracker.core.validation import (
+    SAFE_REPAIRS,
+    check_geometries,
+    repair_data
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TableGeodataHistory,
+    TablePlantLocation,
+    TablePlantRegion,
+    TablePlantSubRegion
+)
+
+FORMAT_EXTENSIONS = {
+    '.geojson': 'geojson',
+    '.json': 'geojson',
+    '.kml': 'kml',
+}
+# Rows are inserted (and checked) this many features at a time
+BATCH_SIZE = 1000
+# Feature properties read for each field, first one found wins
+TYPE_PROPERTIES = ['geodata_type', 'type']
+NAME_PROPERTIES = ['name', 'title']
+RADIUS_PROPERTIES = ['r', 'radius']
+POINT_TYPES = [GeodataType.OTHER_POINT, GeodataType.PLANT_POINT]
+# Tables the imported geodata gets bound to (everything else is a bare geodata row), along w/ their name column
+LINKED_TABLES = {
+    GeodataType.REGION: (TablePlantRegion, 'region_name'),
+    GeodataType.SUB_REGION: (TablePlantSubRegion, 'sub_region_name'),
+    GeodataType.PLANT_POINT: (TablePlantLocation, 'plant_location_name'),
+    GeodataType.PLANT_GROUP: (TablePlantLocation, 'plant_location_name'),
+}
+# Only this many skipped features are described in the results
+MAX_REPORTED_SKIPS = 50
+
+
+def detect_format(filename: str) -> str:
+    for ext, file_format in FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(ext):
+            return file_format
+    raise ValueError(f'Unable to tell the format of "{filename}" - expected one of {", ".join(FORMAT_EXTENSIONS)}')
+
+
+def iter_geojson_features(f: IO[str], chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """Yields the features of a GeoJSON FeatureCollection one at a time, so only the feature being read
+    (and not the whole file) is ever held in memory"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    while True:
+        chunk = f.read(chunk_size)
+        buf += chunk
+        match = re.search(r'"features"\s*:\s*\[', buf)
+        if match is not None:
+            buf = buf[match.end():]
+            break
+        if chunk == '':
+            raise ValueError('No "features" list found - expected a GeoJSON FeatureCollection')
+        # Keep enough of the tail for a key split across chunks
+        buf = buf[-64:]
+    is_eof = False
+    while True:
+        buf = buf.lstrip(' \t\r\n,')
+        if buf.startswith(']'):
+            return
+        try:
+            feature, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            if is_eof:
+                raise ValueError('GeoJSON ended in the middle of its features')
+            chunk = f.read(chunk_size)
+            is_eof = chunk == ''
+            buf += chunk
+            continue
+        yield feature
+        buf = buf[end:]
+
+
+def _local_name(tag: str) -> str:
+    # KML comes with (any one of several) namespaces
+    return tag.rsplit('}', 1)[-1]
+
+
+def _kml_coordinates(text: str) -> List[List[float]]:
+    return [[float(x) for x in coord.split(',')[:2]] for coord in text.split()]
+
+
+def _placemark_to_feature(placemark: ElementTree.Element) -> Dict:
+    """Converts a KML Placemark into the GeoJSON-style feature the importer works with"""
+    properties = {}
+    geometry = None
+    for elem in placemark.iter():
+        tag = _local_name(elem.tag)
+        if tag == 'name' and 'name' not in properties:
+            properties['name'] = (elem.text or '').strip()
+        elif tag == 'Data':
+            value = next((x.text for x in elem if _local_name(x.tag) == 'value'), None)
+            properties[elem.get('name')] = (value or '').strip()
+        elif tag == 'SimpleData':
+            properties[elem.get('name')] = (elem.text or '').strip()
+        elif geometry is None and tag in ['Point', 'Polygon']:
+            if tag == 'Point':
+                coord_elem = next((x for x in elem.iter() if _local_name(x.tag) == 'coordinates'), None)
+                coords = _kml_coordinates(coord_elem.text)[0] if coord_elem is not None else None
+            else:
+                outer = next((x for x in elem.iter() if _local_name(x.tag) == 'outerBoundaryIs'), elem)
+                coord_elem = next((x for x in outer.iter() if _local_name(x.tag) == 'coordinates'), None)
+                coords = [_kml_coordinates(coord_elem.text)] if coord_elem is not None else None
+            geometry = {'type': tag, 'coordinates': coords}
+    return {'type': 'Feature', 'properties': properties, 'geometry': geometry}
+
+
+def iter_kml_features(f: IO[bytes]) -> Iterator[Dict]:
+    """Yields each KML Placemark as a GeoJSON-style feature, parsing the file incrementally"""
+    for _, elem in ElementTree.iterparse(f, events=('end', )):
+        if _local_name(elem.tag) == 'Placemark':
+            yield _placemark_to_feature(elem)
+            # Parsed placemarks would otherwise pile up under the document
+            elem.clear()
+
+
+def _iter_geojson_bytes(f: IO[bytes]) -> Iterator[Dict]:
+    text_f = io.TextIOWrapper(f, encoding='utf-8')
+    try:
+        yield from iter_geojson_features(text_f)
+    finally:
+        # The wrapper would otherwise close f along with itself, & f belongs to the caller (who may read it again)
+        text_f.detach()
+
+
+def iter_features(f: IO[bytes], file_format: str) -> Iterator[Dict]:
+    """Streams the features out of a binary file object of the given format ('geojson' or 'kml')"""
+    if file_format == 'geojson':
+        return _iter_geojson_bytes(f)
+    elif file_format == 'kml':
+        return iter_kml_features(f)
+    raise ValueError(f'Unsupported import format: {file_format}')
+
+
+def _first_property(properties: Dict, keys: List[str]) -> Optional[Any]:
+    return next((properties[x] for x in keys if properties.get(x) not in [None, '']), None)
+
+
+def feature_to_geodata(feature: Dict) -> Tuple[str, GeodataType, bool, str]:
+    """Maps a GeoJSON-style feature to (name, geodata type, is_polygon, data).
+
+    The type comes from its `geodata_type` (or `type`) property, defaulting to an 'other' point/polygon;
+    the name from `name` (or `title`) and a point's radius from `r` (or `radius`). Polygon holes are dropped,
+    since geodata only stores the outer ring.
+    """
+    properties = feature.get('properties') or {}
+    geometry = feature.get('geometry') or {}
+    shape_type = geometry.get('type')
+    coords = geometry.get('coordinates')
+    if shape_type not in ['Point', 'Polygon'] or not coords:
+        raise ValueError(f'Unsupported geometry: {shape_type} (only Point & Polygon can be imported)')
+    is_polygon = shape_type == 'Polygon'
+
+    type_val = _first_property(properties, TYPE_PROPERTIES)
+    if type_val is None:
+        geo_type = GeodataType.OTHER_POLYGON if is_polygon else GeodataType.OTHER_POINT
+    else:
+        try:
+            geo_type = GeodataType(str(type_val).lower())
+        except ValueError:
+            raise ValueError(f'Unknown geodata type: {type_val}')
+    if is_polygon == (geo_type in POINT_TYPES):
+        raise ValueError(f'A {shape_type} can\'t be imported as a {geo_type}')
+    name = str(_first_property(properties, NAME_PROPERTIES) or geo_type.value)
+
+    if is_polygon:
+        ring = np.array(coords[0], dtype=np.float64)
+        if ring.ndim != 2 or ring.shape[1] < 2:
+            raise ValueError('Polygon coordinates should be a list of [x, y] pairs')
+        ring = ring[:, :2]
+        if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+            # GeoJSON/KML rings are closed, geodata rings aren't
+            ring = ring[:-1]
+        data = GeodataPolygon.coords_to_string(ring)
+    else:
+        radius = _first_property(properties, RADIUS_PROPERTIES)
+        point = GeodataPoint.from_string(','.join(map(str, coords[:2])), name=name, geo_type=geo_type)
+        if radius is not None:
+            point.r = float(radius)
+        data = point.to_string()
+    return name, geo_type, is_polygon, data
+
+
+def _insert_batch(session, rows: List[Tuple[str, GeodataType, bool, str]], is_postgis: bool) -> int:
+    """Bulk inserts a batch of checked geodata, along w/ their history & region/sub-region/location rows"""
+    geodata_rows = []
+    for name, geo_type, is_polygon, data in rows:
+        geodata_row = {'geodata_type': geo_type, 'name': name, 'is_polygon': is_polygon, 'data': data}
+        if is_postgis:
+            geodata_row['geom'] = from_shape(geodata_to_shape(data, is_polygon=is_polygon), srid=0)
+        geodata_rows.append(geodata_row)
+    gids = session.scalars(
+        insert(TableGeodata).returning(TableGeodata.geodata_id, sort_by_parameter_order=True),
+        geodata_rows
+    ).all()
+    session.execute(insert(TableGeodataHistory), [
+        {'geodata_key': gid, 'geodata_type': x['geodata_type'], 'name': x['name'], 'is_polygon': x['is_polygon'],
+         'data': x['data']} for gid, x in zip(gids, geodata_rows)
+    ])
+    linked_rows = {}
+    for gid, x in zip(gids, geodata_rows):
+        if x['geodata_type'] in LINKED_TABLES:
+            table_obj, name_col = LINKED_TABLES[x['geodata_type']]
+            linked_rows.setdefault(table_obj, []).append({name_col: x['name'], 'geodata_key': gid})
+    for table_obj, table_rows in linked_rows.items():
+        session.execute(insert(table_obj), table_rows)
+    return len(gids)
+
+
+def import_geodata(session, features: Iterable[Dict], batch_size: int = BATCH_SIZE) -> Dict:
+    """Imports a stream of GeoJSON-style features.
+
+    Features are checked with the same (vectorized) validation as the map input, a batch at a time:
+    trivial problems get fixed and features with anything worse are skipped. The rest are bulk inserted,
+    then all plant locations & sub regions get their region/sub region in a single spatial join at the end.
+    Returns counts along with the reasons for (up to MAX_REPORTED_SKIPS) skipped features.
+    """
+    is_postgis = has_postgis(session)
+    imported = 0
+    skipped = []
+
+    def _flush_batch(batch: List[Tuple[int, str, GeodataType, bool, str]]):
+        nonlocal imported
+        issues, _ = check_geometries(batch)
+        fixable = {x.gid for x in issues if x.problem in SAFE_REPAIRS}
+        blocking = {}
+        for issue in issues:
+            if issue.problem not in SAFE_REPAIRS:
+                blocking.setdefault(issue.gid, issue)
+        rows = []
+        for num, name, geo_type, is_polygon, data in batch:
+            if num in blocking:
+                skipped.append(f'#{num} {name}: {blocking[num].problem.replace("_", " ")} - {blocking[num].detail}')
+                continue
+            if num in fixable:
+                data = repair_data(is_polygon, data)
+            rows.append((name, geo_type, is_polygon, data))
+        if len(rows) > 0:
+            imported += _insert_batch(session, rows, is_postgis=is_postgis)
+
+    batch = []
+    for num, feature in enumerate(features, start=1):
+        try:
+            batch.append((num, *feature_to_geodata(feature)))
+        except (ValueError, TypeError, IndexError) as err:
+            skipped.append(f'#{num}: {err}')
+            continue
+        if len(batch) >= batch_size:
+            _flush_batch(batch)
+            batch = []
+    if len(batch) > 0:
+        _flush_batch(batch)
+
+    stats = {'imported': imported, 'skipped': len(skipped), 'skip_reasons': skipped[:MAX_REPORTED_SKIPS],
+             'locations_changed': 0, 'sub_regions_changed': 0}
+    if imported > 0:
+        session.flush()
+        REGION_INDEX.clear()
+        MAP_LAYER_CACHE.clear()
+        PLANT_SPATIAL_INDEX.mark_stale()
+        assignment = reassign_plant_locations(session)
+        stats['locations_changed'] = assignment['locations_changed']
+        stats['sub_regions_changed'] = assignment['sub_regions_changed']
+    return stats
@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+import threading
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.errors import GEOSException
+from sqlalchemy import update
+from sqlalchemy.sql import or_
+
+from plant_tracker.core.geodata import (
+    REGION_INDEX,
+    GeodataPolygon,
+    PolygonIndex,
+    geodata_version
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TablePlantLocation,
+    TablePlantSubRegion
+)
+
+
+def anchor_from_data(data: str) -> Tuple[float, float]:
+    """Pulls the first (or only) coordinate out of a TableGeodata.data string.
+    This is the point region assignment is based on for both points & polygons"""
+    first_line = data.strip().split('\n', maxsplit=1)[0]
+    x, y = first_line.split(',')[:2]
+    return float(x), float(y)
+
+
+@dataclass(frozen=True)
+class AnchorIndex:
+    """STRtree over the anchor points of all plant locations"""
+    ids: np.ndarray
+    tree: STRtree
+
+    def intersecting(self, area) -> List[int]:
+        """Plant location ids whose anchor falls in (or on the edge of) the area"""
+        return self.ids[self.tree.query(area, predicate='intersects')].tolist()
+
+
+class PlantAnchorIndex:
+    """Process-level anchor index for plant locations, rebuilt only when a plant's geodata changes"""
+    GEO_TYPES = [GeodataType.PLANT_POINT, GeodataType.PLANT_GROUP]
+
+    def __init__(self):
+        self._version = None
+        self._index = None  # type: Optional[AnchorIndex]
+        self._lock = threading.Lock()
+
+    def get(self, session) -> AnchorIndex:
+        version = geodata_version(session, self.GEO_TYPES)
+        with self._lock:
+            if self._index is None or version != self._version:
+                rows = session.query(TablePlantLocation.plant_location_id, TableGeodata.data)\
+                    .join(TableGeodata, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
+                    .filter(TableGeodata.data.isnot(None)).all()
+                anchors = np.array([anchor_from_data(x[1]) for x in rows], dtype=np.float64).reshape(-1, 2)
+                self._index = AnchorIndex(
+                    ids=np.array([x[0] for x in rows], dtype=np.int64),
+                    tree=STRtree(shapely.points(anchors))
+                )
+                self._version = version
+            return self._index
+
+
+PLANT_ANCHOR_INDEX = PlantAnchorIndex()
+
+
+def assign_all(index: PolygonIndex, anchors: np.ndarray) -> np.ndarray:
+    """Finds the covering polygon id for each anchor (n x 2) in one vectorized tree query.
+    Returns an array of ids, with -1 where nothing covered the anchor"""
+    if len(anchors) == 0 or len(index) == 0:
+        return np.full(len(anchors), -1, dtype=np.int64)
+    points = shapely.points(anchors)
+    point_idxs, tree_idxs = index.tree.query(points, predicate='covered_by')
+    # Mirror the single-save behavior: when polygons overlap, the lowest id wins
+    best = np.full(len(anchors), len(index), dtype=np.int64)
+    np.minimum.at(best, point_idxs, tree_idxs)
+    found = best < len(index)
+    assigned = np.full(len(anchors), -1, dtype=np.int64)
+    assigned[found] = index.ids[best[found]]
+    return assigned
+
+
+def _key_or_none(val: int) -> Optional[int]:
+    return None if val < 0 else int(val)
+
+
+def reassign_sub_regions(session, region_index: PolygonIndex) -> Tuple[Dict[int, Optional[int]], List[Dict]]:
+    """Recomputes the parent region of every sub-region.
+    Returns the full sub_region_id -> region_id map along with the rows that changed"""
+    rows = session.query(TablePlantSubRegion.sub_region_id, TablePlantSubRegion.region_key, TableGeodata.data)\
+        .join(TableGeodata, TablePlantSubRegion.geodata_key == TableGeodata.geodata_id)\
+        .filter(TableGeodata.data.isnot(None)).all()
+    if len(rows) == 0:
+        return {}, []
+    anchors = np.array([anchor_from_data(x[2]) for x in rows], dtype=np.float64)
+    region_ids = assign_all(region_index, anchors)
+    sub_region_to_region = {}
+    changes = []
+    for (sub_region_id, current_region_key, _), new_region_id in zip(rows, region_ids):
+        new_region_key = _key_or_none(new_region_id)
+        sub_region_to_region[sub_region_id] = new_region_key
+        if new_region_key != current_region_key:
+            changes.append({'sub_region_id': sub_region_id, 'region_key': new_region_key})
+    return sub_region_to_region, changes
+
+
+def reassign_plant_locations(session, changed_area=None) -> Dict[str, int]:
+    """Recomputes region & sub-region keys for plant locations.
+
+    Polygons and locations are loaded once, every containment is computed in a single vectorized
+    pass and only the rows whose keys actually changed get written back, in one batched UPDATE per table.
+    When a changed area is given, only plant locations anchored in that area (or in a sub region that just
+    moved to another region) are rechecked - everything else can't have changed parents.
+    """
+    region_index, sub_region_index = REGION_INDEX.get(session)
+    sub_region_to_region, sub_region_changes = reassign_sub_regions(session, region_index)
+
+    query = session.query(TablePlantLocation.plant_location_id, TablePlantLocation.sub_region_key,
+                          TablePlantLocation.region_key, TableGeodata.data)\
+        .join(TableGeodata, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
+        .filter(TableGeodata.data.isnot(None))
+    if changed_area is not None:
+        affected_ids = PLANT_ANCHOR_INDEX.get(session).intersecting(changed_area)
+        moved_sub_region_ids = [x['sub_region_id'] for x in sub_region_changes]
+        if len(affected_ids) == 0 and len(moved_sub_region_ids) == 0:
+            rows = []
+        else:
+            rows = query.filter(or_(
+                TablePlantLocation.plant_location_id.in_(affected_ids),
+                TablePlantLocation.sub_region_key.in_(moved_sub_region_ids)
+            )).all()
+    else:
+        rows = query.all()
+
+    location_changes = []
+    if len(rows) > 0:
+        anchors = np.array([anchor_from_data(x[3]) for x in rows], dtype=np.float64)
+        sub_region_ids = assign_all(sub_region_index, anchors)
+        # Locations outside any sub region can still sit directly in a region
+        region_ids = np.full(len(rows), -1, dtype=np.int64)
+        no_sub_region = sub_region_ids < 0
+        region_ids[no_sub_region] = assign_all(region_index, anchors[no_sub_region])
+        for (loc_id, current_sub_region_key, current_region_key, _), new_sub_region_id, new_region_id in \
+                zip(rows, sub_region_ids, region_ids):
+            new_sub_region_key = _key_or_none(new_sub_region_id)
+            if new_sub_region_key is None:
+                new_region_key = _key_or_none(new_region_id)
+            else:
+                new_region_key = sub_region_to_region.get(new_sub_region_key)
+            if (new_sub_region_key, new_region_key) != (current_sub_region_key, current_region_key):
+                location_changes.append({
+                    'plant_location_id': loc_id,
+                    'sub_region_key': new_sub_region_key,
+                    'region_key': new_region_key
+                })
+
+    if len(sub_region_changes) > 0:
+        session.execute(update(TablePlantSubRegion), sub_region_changes)
+    if len(location_changes) > 0:
+        session.execute(update(TablePlantLocation), location_changes)
+
+    return {
+        'locations_checked': len(rows),
+        'locations_changed': len(location_changes),
+        'sub_regions_changed': len(sub_region_changes),
+    }
+
+
+def get_changed_area(old_data: Optional[str], new_data: Optional[str]):
+    """Area that changed hands between two versions of a boundary (the symmetric difference of old & new)"""
+    shapes = []
+    for data in [old_data, new_data]:
+        if data is not None and data.strip() != '':
+            shapes.append(GeodataPolygon.from_string(data, name='', geo_type=None).to_shapely())
+    if len(shapes) == 0:
+        return None
+    elif len(shapes) == 1:
+        return shapes[0]
+    try:
+        return shapes[0].symmetric_difference(shapes[1])
+    except GEOSException:
+        # Self-intersecting boundaries can't be diffed; fall back to everything either shape touched
+        return shapely.box(*shapely.total_bounds(shapes))
+
+
+def reassign_for_boundary_change(session, old_data: Optional[str], new_data: Optional[str]) -> Dict[str, int]:
+    """Rechecks parents for only the plant locations affected by a region/sub-region boundary edit"""
+    changed_area = get_changed_area(old_data, new_data)
+    if changed_area is None or changed_area.is_empty:
+        return {'locations_checked': 0, 'locations_changed': 0, 'sub_regions_changed': 0}
+    return reassign_plant_locations(session, changed_area=changed_area)
@@ -0,0 +1,72 @@
+"""Replaying transactions that lose a serialization conflict or deadlock.
+
+Under SERIALIZABLE isolation, Postgres aborts one of two conflicting transactions (SQLSTATE 40001) and breaks
+deadlocks the same way (40P01). Running the aborted one again from the start, after a short random wait,
+almost always goes through.
+"""
+import random
+import threading
+from typing import (
+    Dict,
+    Optional
+)
+
+from sqlalchemy.exc import DBAPIError
+
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+
+
+def get_sqlstate(err: DBAPIError) -> Optional[str]:
+    """The SQLSTATE of the driver's error (psycopg2 calls it pgcode, psycopg 3 sqlstate)"""
+    return getattr(err.orig, 'pgcode', None) or getattr(err.orig, 'sqlstate', None)
+
+
+def is_retryable(err: Exception) -> bool:
+    return isinstance(err, DBAPIError) and get_sqlstate(err) in RETRYABLE_SQLSTATES
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Seconds to wait before the next attempt: a random amount up to base * 2^(attempt - 1), capped.
+    The randomness keeps transactions that just collided from colliding again on the replay."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RetryStats:
+    """Process-level counts of replayed transactions: replays by SQLSTATE, transactions that went through
+    after a replay & ones that used up their attempts"""
+
+    def __init__(self):
+        self._retries = {}  # type: Dict[str, int]
+        self._recovered = 0
+        self._exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_retry(self, sqlstate: str):
+        with self._lock:
+            self._retries[sqlstate] = self._retries.get(sqlstate, 0) + 1
+
+    def record_recovered(self):
+        with self._lock:
+            self._recovered += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self._exhausted += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'retries': dict(self._retries),
+                'recovered': self._recovered,
+                'exhausted': self._exhausted
+            }
+
+    def clear(self):
+        with self._lock:
+            self._retries = {}
+            self._recovered = 0
+            self._exhausted = 0
+
+
+RETRY_STATS = RetryStats()
@@ -0,0 +1,125 @@
+"""Plant spacing analysis: live plants sitting closer together than their species' recommended spacing"""
+from dataclasses import dataclass
+import threading
+from typing import (
+    List,
+    Tuple
+)
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from sqlalchemy import func
+from sqlalchemy.sql import not_
+
+from plant_tracker.core.geodata import (
+    PlantSpatialIndex,
+    geodata_to_shape,
+    geodata_version,
+    plant_version
+)
+from plant_tracker.model import (
+    TableGeodata,
+    TablePlant,
+    TablePlantLocation,
+    TableSpecies
+)
+
+
+@dataclass(frozen=True)
+class CrowdedPair:
+    plant_id: int
+    plant_name: str
+    other_plant_id: int
+    other_plant_name: str
+    # Both in mm - plant points are measured from their center, plant groups from their edge
+    distance: float
+    required: float
+
+    @property
+    def shortfall(self) -> float:
+        return self.required - self.distance
+
+
+def find_crowded_pairs(plant_ids: np.ndarray, names: List[str], gids: np.ndarray, geoms: np.ndarray,
+                       spacings: np.ndarray) -> List[CrowdedPair]:
+    """Finds every pair of plants closer than the larger of their two spacings in one vectorized pass.
+
+    Each plant queries an STRtree of all plant geometries out to its own spacing (plants w/o one are only
+    ever found by others), so any pair closer than the larger spacing is found by the plant owning it.
+    Plants sharing a location (e.g., planted as a group) aren't compared with each other.
+    """
+    if len(plant_ids) < 2:
+        return []
+    src = np.flatnonzero(spacings > 0)
+    tree = STRtree(geoms)
+    src_idxs, hit_idxs = tree.query(geoms[src], predicate='dwithin', distance=spacings[src])
+    src_idxs = src[src_idxs]
+    pairs = np.unique(np.sort(np.column_stack([src_idxs, hit_idxs]), axis=1), axis=0)
+    pairs = pairs[gids[pairs[:, 0]] != gids[pairs[:, 1]]]
+    if len(pairs) == 0:
+        return []
+    left, right = pairs[:, 0], pairs[:, 1]
+    distances = shapely.distance(geoms[left], geoms[right])
+    required = np.maximum(spacings[left], spacings[right])
+    crowded = np.flatnonzero(distances < required)
+    # Worst first, going by how much of the spacing is missing
+    crowded = crowded[np.argsort(distances[crowded] / required[crowded], kind='stable')]
+    return [
+        CrowdedPair(int(plant_ids[left[i]]), names[left[i]], int(plant_ids[right[i]]), names[right[i]],
+                    round(float(distances[i]), 1), float(required[i]))
+        for i in crowded
+    ]
+
+
+def load_plant_geometries(session) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Live plants w/ a location on the map: their ids, names, geodata ids, geometries (a point's center or
+    a group's polygon) & species spacing (0 where unknown)"""
+    rows = session.query(TablePlant.plant_id, TableSpecies.common_name, TableSpecies.spacing_mm,
+                         TableGeodata.geodata_id, TableGeodata.data, TableGeodata.is_polygon)\
+        .join(TableSpecies, TablePlant.species_key == TableSpecies.species_id)\
+        .join(TablePlantLocation, TablePlant.plant_location_key == TablePlantLocation.plant_location_id)\
+        .join(TableGeodata, TablePlantLocation.geodata_key == TableGeodata.geodata_id)\
+        .filter(not_(TablePlant.is_dead), TableGeodata.geodata_type.in_(PlantSpatialIndex.GEO_TYPES),
+                TableGeodata.data.isnot(None))\
+        .order_by(TablePlant.plant_id.asc()).all()
+    return (
+        np.array([x[0] for x in rows], dtype=np.int64),
+        [f'{x[1]} #{x[0]}' for x in rows],
+        np.array([x[3] for x in rows], dtype=np.int64),
+        # A point's radius is only how it's drawn - its shape is the center, which is what spacing is measured from
+        np.array([geodata_to_shape(x[4], is_polygon=x[5]) for x in rows], dtype=object),
+        np.array([x[2] or 0 for x in rows], dtype=np.float64)
+    )
+
+
+def spacing_version(session) -> Tuple:
+    """Changes whenever a plant location moves, a plant is added/edited or a species' spacing is changed"""
+    species_version = session.query(func.count(TableSpecies.species_id), func.max(TableSpecies.update_date)).one()
+    return geodata_version(session, PlantSpatialIndex.GEO_TYPES) + plant_version(session) + tuple(species_version)
+
+
+class SpacingReport:
+    """Process-level cache of the crowded plant pairs, recomputed (in a single vectorized pass) when
+    plant locations, plants or species change"""
+
+    def __init__(self):
+        self._version = None
+        self._pairs = None  # List[CrowdedPair] once computed
+        self._lock = threading.Lock()
+
+    def get(self, session) -> List[CrowdedPair]:
+        version = spacing_version(session)
+        with self._lock:
+            if self._pairs is None or version != self._version:
+                self._pairs = find_crowded_pairs(*load_plant_geometries(session))
+                self._version = version
+            return list(self._pairs)
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._pairs = None
+
+
+SPACING_REPORT = SpacingReport()
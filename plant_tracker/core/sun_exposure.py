@@ -0,0 +1,254 @@
+"""Estimates hours of direct sun for each plant location from the shade cast by structures
+(other_polygon geodata w/ a height), and flags plants whose species wants a different amount of light.
+
+Structures are treated as flat-topped prisms, so a structure's shadow is its footprint swept
+`height / tan(altitude)` away from the sun.
+
+Estimates are stored (sun_estimate) w/ the shape & structure signature they're for, so only locations that
+changed since get shaded again - by scripts/estimate_sun.py across a process pool, or by the page for whatever
+it finds stale.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import hashlib
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+import shapely
+from sqlalchemy import insert
+from sqlalchemy.sql import (
+    not_,
+    or_
+)
+
+from plant_tracker.core.geodata import (
+    PlantSpatialIndex,
+    geodata_to_shape
+)
+from plant_tracker.core.utils import (
+    has_column,
+    has_table
+)
+from plant_tracker.model import (
+    GeodataType,
+    LightRequirementType,
+    TableGeodata,
+    TablePlant,
+    TablePlantLocation,
+    TableSpecies,
+    TableSunEstimate
+)
+
+# Days of the year (the 21st of each month, March - September) the estimate is averaged over
+DEFAULT_DAYS = (80, 111, 141, 172, 202, 233, 264)
+STEP_HOURS = 0.25
+# Sun positions handed to each worker at a time
+POSITIONS_PER_TASK = 16
+# Hours of direct sun each light requirement is happy with (upper bound excluded, None = no bound)
+SUN_HOURS_BY_REQUIREMENT = {
+    LightRequirementType.FULLSUN: (6, None),
+    LightRequirementType.PARTSUN: (4, 6),
+    LightRequirementType.PARTSHADE: (2, 4),
+    LightRequirementType.FULLSHADE: (0, 2),
+}
+TOO_LITTLE_SUN = 'too little sun'
+TOO_MUCH_SUN = 'too much sun'
+
+
+def sun_positions(latitude: float, days: Tuple[int, ...] = DEFAULT_DAYS, step_hours: float = STEP_HOURS) -> \
+        np.ndarray:
+    """Sun positions above the horizon as (altitude, azimuth, hours) rows, angles in radians & azimuth
+    clockwise from true north. Each row stands for `hours` of an average day across the given days of the year,
+    on solar time (the middle of each step is sampled)."""
+    day = np.repeat(np.asarray(days, dtype=np.float64), int(round(24 / step_hours)))
+    solar_time = np.tile(np.arange(step_hours / 2, 24, step_hours), len(days))
+    declination = np.radians(23.44) * np.sin(2 * np.pi * (284 + day) / 365)
+    hour_angle = np.radians(15 * (solar_time - 12))
+    lat = np.radians(latitude)
+    altitude = np.arcsin(np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    azimuth = np.arctan2(-np.sin(hour_angle), np.tan(declination) * np.cos(lat) - np.sin(lat) * np.cos(hour_angle))
+    is_up = altitude > 0
+    return np.column_stack([
+        altitude[is_up], np.mod(azimuth[is_up], 2 * np.pi), np.full(is_up.sum(), step_hours / len(days))
+    ])
+
+
+def structure_edges(structures: np.ndarray, heights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Every footprint edge as (start, end, height of its structure) arrays"""
+    starts, ends, edge_heights = [np.zeros((0, 2))], [np.zeros((0, 2))], [np.zeros(0)]
+    for structure, height in zip(structures, heights):
+        ring = shapely.get_coordinates(shapely.get_exterior_ring(structure))
+        starts.append(ring[:-1])
+        ends.append(ring[1:])
+        edge_heights.append(np.full(len(ring) - 1, height))
+    return np.concatenate(starts), np.concatenate(ends), np.concatenate(edge_heights)
+
+
+def sunlit_hours(points: np.ndarray, structures: np.ndarray, heights: np.ndarray, positions: np.ndarray,
+                 map_north_bearing: float = 0) -> np.ndarray:
+    """Hours of direct sun at each (x, y) point for the given sun positions. Map y grows downwards
+    (south, when the map's up is north).
+
+    For each sun position, every structure's shadow is built at once & merged into a single (prepared)
+    shape the points are tested against. A convex footprint's shadow is the hull of its corners & their shifted
+    copies; anything else is its footprint plus the parallelogram each edge sweeps.
+    Points inside a footprint (e.g., under a tree) are in shade all day.
+    """
+    hours = np.zeros(len(points), dtype=np.float64)
+    if len(points) == 0:
+        return hours
+    if len(structures) == 0:
+        return hours + positions[:, 2].sum()
+    is_convex = np.isclose(shapely.area(shapely.convex_hull(structures)), shapely.area(structures))
+    corners, corner_idxs = shapely.get_coordinates(structures[is_convex], return_index=True)
+    corner_heights = heights[is_convex][corner_idxs]
+    starts, ends, edge_heights = structure_edges(structures[~is_convex], heights[~is_convex])
+    bearing = np.radians(map_north_bearing)
+    for altitude, azimuth, weight in positions:
+        # Shadows fall away from the sun (in map coordinates), height / tan(altitude) long
+        direction = -np.array([np.sin(azimuth - bearing), -np.cos(azimuth - bearing)])
+        reach = 1 / np.tan(altitude)
+        corner_offsets = direction * (corner_heights * reach)[:, None]
+        hulls = shapely.convex_hull(shapely.multipoints(
+            np.stack([corners, corners + corner_offsets], axis=1).reshape(-1, 2), indices=np.repeat(corner_idxs, 2)))
+        edge_offsets = direction * (edge_heights * reach)[:, None]
+        sweeps = shapely.polygons(np.stack([starts, ends, ends + edge_offsets, starts + edge_offsets], axis=1))
+        shade = shapely.union_all(np.concatenate([hulls, structures[~is_convex], sweeps]))
+        shapely.prepare(shade)
+        hours[~shapely.intersects_xy(shade, points[:, 0], points[:, 1])] += weight
+    return hours
+
+
+def _sunlit_hours_task(args: Tuple) -> np.ndarray:
+    return sunlit_hours(*args)
+
+
+def estimate_sun_hours(points: np.ndarray, structures: np.ndarray, heights: np.ndarray, latitude: float,
+                       map_north_bearing: float = 0, workers: int = None) -> np.ndarray:
+    """Hours of direct sun on an average growing season day at each point. Sun positions are split across
+    a process pool, each worker casting the shadows of every structure for its share."""
+    positions = sun_positions(latitude)
+    chunks = [positions[i:i + POSITIONS_PER_TASK] for i in range(0, len(positions), POSITIONS_PER_TASK)]
+    tasks = [(points, structures, heights, x, map_north_bearing) for x in chunks]
+    if workers == 1 or len(points) == 0:
+        return sum((_sunlit_hours_task(x) for x in tasks), np.zeros(len(points)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_sunlit_hours_task, tasks), np.zeros(len(points)))
+
+
+def load_structure_rows(session) -> List[Tuple[str, int]]:
+    """Footprint data & heights of the other polygons that have a height set"""
+    if not has_column(session, TableGeodata, 'height_mm'):
+        # Nothing has a height before scripts/migrate_structure_heights.py has run
+        return []
+    rows = session.query(TableGeodata.data, TableGeodata.height_mm)\
+        .filter(TableGeodata.geodata_type == GeodataType.OTHER_POLYGON, TableGeodata.is_polygon,
+                TableGeodata.data.isnot(None), TableGeodata.height_mm > 0)\
+        .order_by(TableGeodata.geodata_id.asc()).all()
+    return [tuple(x) for x in rows]
+
+
+def estimate_signature(structure_rows: List[Tuple[str, int]], latitude: float, map_north_bearing: float) -> str:
+    """Fingerprint of everything besides a location's own shape that its estimate depends on"""
+    payload = repr((structure_rows, latitude, map_north_bearing, DEFAULT_DAYS, STEP_HOURS))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class StaleLocations:
+    """Plant locations that need (re-)estimating, w/ everything needed to shade them once the session's closed"""
+    signature: str
+    latitude: float
+    map_north_bearing: float
+    # (geodata id, data, is polygon)
+    rows: List[Tuple[int, str, bool]]
+    structure_rows: List[Tuple[str, int]]
+
+
+def find_stale_locations(session, latitude: float, map_north_bearing: float = 0, full: bool = False) -> \
+        StaleLocations:
+    """Plant locations w/o a stored estimate for their current shape & the current structures (all of them
+    when full)"""
+    structure_rows = load_structure_rows(session)
+    signature = estimate_signature(structure_rows, latitude=latitude, map_north_bearing=map_north_bearing)
+    query = session.query(TableGeodata.geodata_id, TableGeodata.data, TableGeodata.is_polygon)\
+        .outerjoin(TableSunEstimate, TableSunEstimate.geodata_key == TableGeodata.geodata_id)\
+        .filter(TableGeodata.geodata_type.in_(PlantSpatialIndex.GEO_TYPES), TableGeodata.data.isnot(None))
+    if not full:
+        query = query.filter(or_(TableSunEstimate.geodata_key.is_(None), TableSunEstimate.data != TableGeodata.data,
+                                 TableSunEstimate.signature != signature))
+    rows = query.order_by(TableGeodata.geodata_id.asc()).all()
+    return StaleLocations(signature=signature, latitude=latitude, map_north_bearing=map_north_bearing,
+                          rows=[tuple(x) for x in rows], structure_rows=structure_rows)
+
+
+def estimate_locations(stale: StaleLocations, workers: int = None) -> List[Dict]:
+    """Shades the stale locations, returning sun_estimate rows. Needs no session, so it can run between
+    the read & the write w/o a transaction held open."""
+    if len(stale.rows) == 0:
+        return []
+    structures = np.array([geodata_to_shape(x[0], is_polygon=True) for x in stale.structure_rows], dtype=object)
+    heights = np.array([x[1] for x in stale.structure_rows], dtype=np.float64)
+    # Plant groups are judged at a point inside them
+    points = shapely.get_coordinates(shapely.point_on_surface(
+        np.array([geodata_to_shape(x[1], is_polygon=x[2]) for x in stale.rows], dtype=object)))
+    hours = estimate_sun_hours(points, structures, heights, latitude=stale.latitude,
+                               map_north_bearing=stale.map_north_bearing, workers=workers)
+    return [
+        {'geodata_key': gid, 'data': data, 'signature': stale.signature, 'sun_hours': round(gid_hours, 2)}
+        for (gid, data, _), gid_hours in zip(stale.rows, hours.tolist())
+    ]
+
+
+def save_sun_estimates(session, estimates: List[Dict]) -> int:
+    """Replaces the stored estimates of the given locations"""
+    if len(estimates) == 0:
+        return 0
+    session.query(TableSunEstimate)\
+        .filter(TableSunEstimate.geodata_key.in_([x['geodata_key'] for x in estimates]))\
+        .delete(synchronize_session=False)
+    session.execute(insert(TableSunEstimate), estimates)
+    return len(estimates)
+
+
+@dataclass(frozen=True)
+class SunEstimate:
+    plant_id: int
+    plant_name: str
+    light_requirement: Optional[LightRequirementType]
+    sun_hours: float
+    # None when the requirement is met (or unknown)
+    mismatch: Optional[str]
+
+
+def check_light_requirement(light_requirement: Optional[LightRequirementType], hours: float) -> Optional[str]:
+    if light_requirement is None:
+        return None
+    low, high = SUN_HOURS_BY_REQUIREMENT[LightRequirementType(light_requirement)]
+    if hours < low:
+        return TOO_LITTLE_SUN
+    elif high is not None and hours >= high:
+        return TOO_MUCH_SUN
+    return None
+
+
+def get_sun_estimates(session) -> List[SunEstimate]:
+    """Stored sun hours for every live plant on the map, checked against its species' light requirement"""
+    if not has_table(session, TableSunEstimate):
+        return []
+    rows = session.query(TablePlant.plant_id, TableSpecies.common_name, TableSpecies.light_requirement,
+                         TableSunEstimate.sun_hours)\
+        .join(TableSpecies, TablePlant.species_key == TableSpecies.species_id)\
+        .join(TablePlantLocation, TablePlant.plant_location_key == TablePlantLocation.plant_location_id)\
+        .join(TableSunEstimate, TablePlantLocation.geodata_key == TableSunEstimate.geodata_key)\
+        .filter(not_(TablePlant.is_dead)).order_by(TablePlant.plant_id.asc()).all()
+    return [
+        SunEstimate(plant_id, f'{name} #{plant_id}', light_requirement, hours,
+                    check_light_requirement(light_requirement, hours))
+        for plant_id, name, light_requirement, hours in rows
+    ]
@@ -0,0 +1,223 @@
+"""Renders the map into the PNG tile pyramid described in core.tiles (needs the `tiles` extra, i.e. Pillow)"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import json
+import pathlib
+import re
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+from PIL import (
+    Image,
+    ImageColor,
+    ImageDraw
+)
+import shapely
+from shapely import STRtree
+
+from plant_tracker.core.geodata import (
+    GeodataPolygon,
+    get_all_geodata
+)
+from plant_tracker.core.tiles import (
+    DEFAULT_MAX_ZOOM,
+    EMPTY_TILE_NAME,
+    TILE_SIZE,
+    grid_size,
+    read_manifest,
+    tile_bounds,
+    tile_path,
+    tiles_for_bbox,
+    write_manifest,
+    zoom_scale
+)
+from plant_tracker.model import GeodataType
+
+MAP_CSS_PATH = pathlib.Path(__file__).parent.parent.joinpath('static/css/map.css')
+# Same order the map template draws its groups in
+RENDER_ORDER = [
+    GeodataType.REGION,
+    GeodataType.SUB_REGION,
+    GeodataType.OTHER_POLYGON,
+    GeodataType.OTHER_POINT,
+    GeodataType.PLANT_GROUP,
+    GeodataType.PLANT_POINT,
+]
+IRRIGATION_CLASS = 'irrigation'
+
+
+@dataclass(frozen=True)
+class TileStyle:
+    """The subset of an SVG style the tiles can draw. Widths are in map mm, like the SVG's user units."""
+    fill: Optional[Tuple[int, int, int]] = (0, 0, 0)
+    fill_opacity: float = 1.0
+    stroke: Optional[Tuple[int, int, int]] = None
+    stroke_width: float = 1.0
+
+    def rgba(self, color: Optional[Tuple[int, int, int]], opacity: float = 1.0) -> Optional[Tuple[int, ...]]:
+        return None if color is None else (*color, round(255 * opacity))
+
+
+def _parse_color(val: str) -> Optional[Tuple[int, int, int]]:
+    if val == 'none':
+        return None
+    return ImageColor.getrgb(val)[:3]
+
+
+def load_styles(css_path: pathlib.Path = MAP_CSS_PATH) -> Dict[str, TileStyle]:
+    """Pulls fill/stroke styles for each geodata type (and irrigation markers) from the map's stylesheet,
+    so the tiles look like the SVG map. Only plain class rules (e.g., `.region`) are taken - states like :hover
+    and the focus classes don't apply to tiles."""
+    css = re.sub(r'/\*.*?\*/', '', css_path.read_text(), flags=re.DOTALL)
+    classes = [x.value for x in GeodataType] + [IRRIGATION_CLASS]
+    decls = {x: {} for x in classes}
+    for selectors, body in re.findall(r'([^{}]+)\{([^{}]*)\}', css):
+        matched = [x.strip()[1:] for x in selectors.split(',') if x.strip()[1:] in classes and x.strip()[0] == '.']
+        for prop, val in [x.split(':', 1) for x in body.split(';') if ':' in x]:
+            for cls in matched:
+                decls[cls][prop.strip()] = val.replace('!important', '').strip()
+    styles = {}
+    for cls, props in decls.items():
+        styles[cls] = TileStyle(
+            fill=_parse_color(props.get('fill', 'black')),
+            fill_opacity=float(props.get('fill-opacity', 1)),
+            stroke=_parse_color(props.get('stroke', 'none')),
+            stroke_width=float(props.get('stroke-width', '1').removesuffix('px'))
+        )
+    return styles
+
+
+def _draw_item(draw: ImageDraw.ImageDraw, item: Dict, style: TileStyle, origin: Tuple[float, float], scale: float):
+    width = max(1, round(style.stroke_width / scale)) if style.stroke is not None else 0
+    fill = style.rgba(style.fill, style.fill_opacity)
+    outline = style.rgba(style.stroke)
+    if 'points' in item:
+        coords = GeodataPolygon.from_string(item['points'], name='', geo_type=None).coords
+        xy = [((x - origin[0]) / scale, (y - origin[1]) / scale) for x, y in coords.tolist()]
+        draw.polygon(xy, fill=fill, outline=outline, width=width)
+    else:
+        cx, cy, r = (item['x'] - origin[0]) / scale, (item['y'] - origin[1]) / scale, max(item['r'] / scale, 0.5)
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=fill, outline=outline, width=width)
+
+
+def render_tile(tile_dir: str, z: int, x: int, y: int, items: List[Tuple[str, Dict]],
+                styles: Dict[str, TileStyle]) -> bool:
+    """Draws one tile from its (geodata type, item) pairs. Tiles left with nothing on them are removed.
+    This runs in the worker processes, so it only gets plain data & never touches the database."""
+    path = tile_path(pathlib.Path(tile_dir), z, x, y)
+    if len(items) == 0:
+        path.unlink(missing_ok=True)
+        return False
+    scale = zoom_scale(z)
+    origin = tile_bounds(z, x, y)[:2]
+    img = Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0))
+    markers = []
+    for g_type in RENDER_ORDER:
+        type_items = [item for item_type, item in items if item_type == g_type]
+        if len(type_items) == 0:
+            continue
+        # One layer per type: fills don't blend with their own type, but do with the types drawn below
+        layer = Image.new('RGBA', img.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        for item in type_items:
+            _draw_item(draw, item, styles[g_type], origin=origin, scale=scale)
+            if item.get('is_irrigated'):
+                markers.append({'x': item['anchor'][0], 'y': item['anchor'][1],
+                                'r': item['r'] / 4 if 'r' in item else 50})
+        img.alpha_composite(layer)
+    if len(markers) > 0:
+        layer = Image.new('RGBA', img.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        for marker in markers:
+            _draw_item(draw, marker, styles[IRRIGATION_CLASS], origin=origin, scale=scale)
+        img.alpha_composite(layer)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    img.save(path, optimize=True)
+    return True
+
+
+def _render_tile_task(args: Tuple) -> bool:
+    return render_tile(*args)
+
+
+def fingerprint_items(features: Dict[GeodataType, List[Dict]]) -> Dict[str, Dict]:
+    """A hash & bbox for each geodata item, to tell which ones changed since the last render"""
+    fingerprints = {}
+    for items in features.values():
+        for item in items:
+            digest = hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()
+            fingerprints[str(item['gid'])] = {'hash': digest, 'bbox': item['bbox']}
+    return fingerprints
+
+
+def style_fingerprint(styles: Dict[str, TileStyle]) -> str:
+    return hashlib.sha1(json.dumps([styles[x].__dict__ for x in sorted(styles)] + [TILE_SIZE]).encode()).hexdigest()
+
+
+def _item_index(features: Dict[GeodataType, List[Dict]], margin: float) -> Tuple[List[Tuple[str, Dict]], STRtree]:
+    pairs = [(g_type, item) for g_type, items in features.items() for item in items]
+    boxes = shapely.box(*[[x[1]['bbox'][i] for x in pairs] for i in range(4)]) if len(pairs) > 0 else []
+    return pairs, STRtree(shapely.buffer(boxes, margin, cap_style='square', join_style='mitre'))
+
+
+def render_tiles(session, tile_dir: pathlib.Path, max_zoom: int = DEFAULT_MAX_ZOOM, workers: int = None,
+                 full: bool = False) -> Dict[str, int]:
+    """Renders the map into tile_dir/z/x/y.png for zooms 0 - max_zoom.
+
+    Only tiles touched by geodata that changed since the last render (going by the manifest) are redrawn,
+    using both the item's old & new bbox so that moved/removed items get erased. A changed stylesheet,
+    different max zoom or `full` redraws everything. Tiles are drawn in a process pool.
+    """
+    tile_dir.mkdir(parents=True, exist_ok=True)
+    styles = load_styles()
+    manifest = read_manifest(tile_dir)
+    fingerprints = fingerprint_items(get_all_geodata(session))
+    style_key = style_fingerprint(styles)
+    full = full or manifest['style'] != style_key or manifest['max_zoom'] != max_zoom
+
+    old_items = manifest['items']
+    changed = [gid for gid in old_items.keys() | fingerprints.keys()
+               if old_items.get(gid, {}).get('hash') != fingerprints.get(gid, {}).get('hash')]
+    dirty_bboxes = [x[gid]['bbox'] for gid in changed for x in [old_items, fingerprints] if gid in x]
+    # Strokes are drawn centered on the edge, so they spill over the bbox a bit
+    margin_mm = max(x.stroke_width for x in styles.values())
+
+    tasks = []
+    for z in range(max_zoom + 1):
+        if full:
+            nx, ny = grid_size(z)
+            dirty_tiles = {(x, y) for x in range(nx) for y in range(ny)}
+        else:
+            margin = margin_mm + zoom_scale(z)
+            dirty_tiles = {tile for bbox in dirty_bboxes for tile in
+                           tiles_for_bbox(z, (bbox[0] - margin, bbox[1] - margin, bbox[2] + margin, bbox[3] + margin))}
+        if len(dirty_tiles) == 0:
+            continue
+        pairs, tree = _item_index(get_all_geodata(session, scale=zoom_scale(z)), margin=margin_mm + zoom_scale(z))
+        for x, y in sorted(dirty_tiles):
+            idxs = sorted(tree.query(shapely.box(*tile_bounds(z, x, y))))
+            tasks.append((str(tile_dir), z, x, y, [pairs[i] for i in idxs], styles))
+
+    rendered = 0
+    if len(tasks) > 0:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = sum(pool.map(_render_tile_task, tasks, chunksize=16))
+
+    if not tile_dir.joinpath(EMPTY_TILE_NAME).exists():
+        Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0)).save(tile_dir.joinpath(EMPTY_TILE_NAME))
+    write_manifest(tile_dir, {
+        'version': manifest['version'] + (1 if len(tasks) > 0 else 0),
+        'style': style_key,
+        'max_zoom': max_zoom,
+        'items': fingerprints
+    })
+    return {
+        'items_changed': len(changed),
+        'tiles_checked': len(tasks),
+        'tiles_rendered': rendered,
+    }
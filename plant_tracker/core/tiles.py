@@ -0,0 +1,69 @@
+"""Tile grid & manifest for the pre-rendered (z/x/y) PNG map tiles. Rendering itself lives in tile_render."""
+import json
+import math
+import pathlib
+from typing import (
+    Dict,
+    List,
+    Tuple
+)
+
+from plant_tracker.core.geodata import (
+    MAP_HEIGHT_MM,
+    MAP_WIDTH_MM
+)
+
+TILE_SIZE = 256
+DEFAULT_MAX_ZOOM = 5
+MANIFEST_NAME = 'manifest.json'
+# Served in place of tiles with nothing on them
+EMPTY_TILE_NAME = 'empty.png'
+# Tile urls carry the manifest version, so they can be cached for as long as browsers allow
+TILE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def zoom_scale(z: int) -> float:
+    """mm per px at the zoom level. Zoom 0 fits the whole map in a single tile."""
+    return max(MAP_WIDTH_MM, MAP_HEIGHT_MM) / TILE_SIZE / 2 ** z
+
+
+def grid_size(z: int) -> Tuple[int, int]:
+    """Number of tile columns & rows needed to cover the map at the zoom level"""
+    tile_mm = TILE_SIZE * zoom_scale(z)
+    return math.ceil(MAP_WIDTH_MM / tile_mm), math.ceil(MAP_HEIGHT_MM / tile_mm)
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(minx, miny, maxx, maxy) of the tile, in map mm"""
+    tile_mm = TILE_SIZE * zoom_scale(z)
+    return x * tile_mm, y * tile_mm, (x + 1) * tile_mm, (y + 1) * tile_mm
+
+
+def tiles_for_bbox(z: int, bbox: Tuple[float, float, float, float]) -> List[Tuple[int, int]]:
+    """All (x, y) tiles at the zoom level that the (minx, miny, maxx, maxy) box touches"""
+    tile_mm = TILE_SIZE * zoom_scale(z)
+    nx, ny = grid_size(z)
+    x0, x1 = max(0, math.floor(bbox[0] / tile_mm)), min(nx - 1, math.floor(bbox[2] / tile_mm))
+    y0, y1 = max(0, math.floor(bbox[1] / tile_mm)), min(ny - 1, math.floor(bbox[3] / tile_mm))
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def tile_path(tile_dir: pathlib.Path, z: int, x: int, y: int) -> pathlib.Path:
+    return tile_dir.joinpath(str(z), str(x), f'{y}.png')
+
+
+def read_manifest(tile_dir: pathlib.Path) -> Dict:
+    """What the last render covered: its version, style & zoom levels, and a fingerprint & bbox per geodata item"""
+    path = tile_dir.joinpath(MANIFEST_NAME)
+    if not path.exists():
+        return {'version': 0, 'style': None, 'max_zoom': None, 'items': {}}
+    with path.open() as f:
+        return json.load(f)
+
+
+def write_manifest(tile_dir: pathlib.Path, manifest: Dict):
+    # Written to the side first, so a reader never sees half a manifest
+    tmp_path = tile_dir.joinpath(f'{MANIFEST_NAME}.tmp')
+    with tmp_path.open('w') as f:
+        json.dump(manifest, f)
+    tmp_path.replace(tile_dir.joinpath(MANIFEST_NAME))
@@ -1,3 +1,8 @@
+from sqlalchemy import inspect
+
+# (database url, table, column - None for the table itself) -> whether it's there
+COLUMN_STATUS = {}
+
 
 def default_if_prop_none(obj, prop_name: str, default: str = '') -> str:
     """Simple one-liner for logic if empty object property shouldn't be empty for form"""
@@ -9,3 +14,23 @@ def default_if_prop_none(obj, prop_name: str, default: str = '') -> str:
         else:
             return default_if_prop_none(sub_obj, prop_name_split[1])
     return default if getattr(obj, prop_name) is None else getattr(obj, prop_name)
+
+
+def has_column(session, table_obj, column_name: str) -> bool:
+    """Whether the bound database has the model's column yet. For columns added by a migration script,
+    so the pages using them still work before it's been run."""
+    bind = session.get_bind()
+    key = (str(bind.engine.url), table_obj.__table__.fullname, column_name)
+    if key not in COLUMN_STATUS:
+        columns = inspect(bind).get_columns(table_obj.__tablename__, schema=table_obj.__table__.schema)
+        COLUMN_STATUS[key] = column_name in {x['name'] for x in columns}
+    return COLUMN_STATUS[key]
+
+
+def has_table(session, table_obj) -> bool:
+    """Whether the bound database has the model's table yet, for tables added by a migration script"""
+    bind = session.get_bind()
+    key = (str(bind.engine.url), table_obj.__table__.fullname, None)
+    if key not in COLUMN_STATUS:
+        COLUMN_STATUS[key] = inspect(bind).has_table(table_obj.__tablename__, schema=table_obj.__table__.schema)
+    return COLUMN_STATUS[key]
@@ -0,0 +1,253 @@
+"""Geometry validation & repair for geodata, run over every shape at once with shapely's vectorized functions"""
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+from sqlalchemy.orm import aliased
+
+from plant_tracker.core.geodata import (
+    DEFAULT_POINT_RADIUS,
+    REGION_INDEX,
+    GeodataPoint,
+    GeodataPolygon,
+    RegionIndex,
+    geodata_to_shape,
+    invalidate_geodata_cache,
+    record_geodata_version,
+    set_geom
+)
+from plant_tracker.core.location_assignment import reassign_plant_locations
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TablePlantRegion,
+    TablePlantSubRegion
+)
+
+UNPARSEABLE = 'unparseable'
+TOO_FEW_POINTS = 'too_few_points'
+REPEATED_POINTS = 'repeated_points'
+INVALID = 'invalid'
+BAD_RADIUS = 'bad_radius'
+ESCAPES_REGION = 'escapes_region'
+# Problems fixed quietly when a shape is saved - everything else gets sent back to the form
+SAFE_REPAIRS = [REPEATED_POINTS, BAD_RADIUS]
+# Share of a sub region's area allowed outside its region before it counts as escaping (absorbs rounding)
+ESCAPE_TOLERANCE = 0.001
+
+# (geodata_id, name, geodata_type, is_polygon, data)
+GeodataRow = Tuple[Optional[int], str, GeodataType, bool, str]
+
+
+@dataclass(frozen=True)
+class GeometryIssue:
+    gid: Optional[int]
+    name: str
+    geo_type: GeodataType
+    problem: str
+    detail: str
+    is_repairable: bool
+
+
+def _dedupe_ring(coords: np.ndarray) -> np.ndarray:
+    """Drops vertices repeating the one before them, including a last vertex that closes the ring explicitly
+    (the stored format leaves the closing edge implied)"""
+    if len(coords) < 2:
+        return coords
+    keep = np.any(coords != np.roll(coords, 1, axis=0), axis=1)
+    if not keep.any():
+        return coords[:1]
+    return coords[keep]
+
+
+def _largest_polygon(geom: BaseGeometry) -> Optional[BaseGeometry]:
+    """The biggest polygon in whatever make_valid/intersection returned (stored shapes are single rings)"""
+    parts = [x for x in shapely.get_parts(geom) if x.geom_type == 'Polygon' and not x.is_empty]
+    if len(parts) == 0:
+        # GeometryCollections nest one level deeper
+        parts = [y for x in shapely.get_parts(geom) for y in shapely.get_parts(x)
+                 if y.geom_type == 'Polygon' and not y.is_empty]
+    if len(parts) == 0:
+        return None
+    return max(parts, key=lambda x: x.area)
+
+
+def _polygon_to_string(poly: BaseGeometry) -> str:
+    # Rings come back closed; the stored format leaves that implied
+    return GeodataPolygon.coords_to_string(shapely.get_coordinates(shapely.get_exterior_ring(poly))[:-1])
+
+
+def check_geometries(rows: List[GeodataRow], region_by_gid: Dict[int, BaseGeometry] = None) -> \
+        Tuple[List[GeometryIssue], Dict[int, BaseGeometry]]:
+    """Finds problems with all the given shapes in one vectorized pass.
+
+    Sub regions are also checked against the region they're assigned to (region_by_gid maps their geodata id
+    to that region's polygon). Returns the issues & the valid polygons by geodata id.
+    """
+    issues = []
+    polygon_rows = []
+    rings = []
+    for gid, name, geo_type, is_polygon, data in rows:
+        try:
+            if not is_polygon:
+                point = GeodataPoint.from_string(data, name=name, geo_type=geo_type, gid=gid)
+                if not point.r > 0:
+                    issues.append(GeometryIssue(gid, name, geo_type, BAD_RADIUS, f'Radius is {point.r}', True))
+                continue
+            coords = GeodataPolygon.from_string(data, name=name, geo_type=geo_type, gid=gid).coords
+        except ValueError:
+            issues.append(GeometryIssue(gid, name, geo_type, UNPARSEABLE,
+                                        'Expected one "x,y" pair per line (polygons) or "x,y,r" (points)', False))
+            continue
+        deduped = _dedupe_ring(coords)
+        if len(deduped) < 3:
+            issues.append(GeometryIssue(gid, name, geo_type, TOO_FEW_POINTS,
+                                        f'Only {len(deduped)} distinct points - polygons need at least 3', False))
+            continue
+        if len(deduped) < len(coords):
+            issues.append(GeometryIssue(gid, name, geo_type, REPEATED_POINTS,
+                                        f'{len(coords) - len(deduped)} repeated point(s)', True))
+        polygon_rows.append((gid, name, geo_type))
+        rings.append(deduped)
+
+    if len(rings) == 0:
+        return issues, {}
+    ring_idxs = np.repeat(np.arange(len(rings)), [len(x) for x in rings])
+    polygons = shapely.polygons(shapely.linearrings(np.concatenate(rings), indices=ring_idxs))
+    is_valid = shapely.is_valid(polygons)
+    for i in np.flatnonzero(~is_valid):
+        gid, name, geo_type = polygon_rows[i]
+        repaired = _largest_polygon(shapely.make_valid(polygons[i]))
+        issues.append(GeometryIssue(gid, name, geo_type, INVALID, shapely.is_valid_reason(polygons[i]),
+                                    repaired is not None))
+    valid_polygons = {polygon_rows[i][0]: polygons[i] for i in np.flatnonzero(is_valid)}
+
+    if region_by_gid:
+        sub_gids = [x for x in region_by_gid.keys() if x in valid_polygons]
+        subs = np.array([valid_polygons[x] for x in sub_gids], dtype=object)
+        regions = np.array([region_by_gid[x] for x in sub_gids], dtype=object)
+        outside = shapely.area(shapely.difference(subs, regions)) / np.maximum(shapely.area(subs), 1e-9) \
+            if len(sub_gids) > 0 else np.array([])
+        names = {x[0]: x[1] for x in polygon_rows}
+        for gid, share in zip(sub_gids, outside):
+            if share > ESCAPE_TOLERANCE:
+                issues.append(GeometryIssue(gid, names[gid], GeodataType.SUB_REGION, ESCAPES_REGION,
+                                            f'{share:.1%} of the sub region lies outside its region', True))
+    return issues, valid_polygons
+
+
+def repair_data(is_polygon: bool, data: str, region: BaseGeometry = None) -> Optional[str]:
+    """Fixes what can be fixed in a geodata string: repeated points, bad radii, self-intersections
+    (keeping the largest valid piece) and, when a region is given, clips the shape to it.
+    Returns None when nothing usable is left."""
+    if not is_polygon:
+        point = GeodataPoint.from_string(data, name='', geo_type=None)
+        if not point.r > 0:
+            point.r = DEFAULT_POINT_RADIUS
+        return point.to_string()
+    coords = _dedupe_ring(GeodataPolygon.from_string(data, name='', geo_type=None).coords)
+    if len(coords) < 3:
+        return None
+    poly = _largest_polygon(shapely.make_valid(shapely.polygons(coords)))
+    if poly is not None and region is not None:
+        poly = _largest_polygon(shapely.intersection(poly, region))
+    return None if poly is None else _polygon_to_string(poly)
+
+
+def load_geodata_rows(session) -> Tuple[List[GeodataRow], Dict[int, BaseGeometry]]:
+    """All geodata rows, along with the assigned region's polygon for each sub region (by its geodata id)"""
+    rows = [tuple(x) for x in session.query(TableGeodata.geodata_id, TableGeodata.name, TableGeodata.geodata_type,
+                                            TableGeodata.is_polygon, TableGeodata.data)
+            .filter(TableGeodata.data.isnot(None)).order_by(TableGeodata.geodata_id.asc()).all()]
+    region_geodata = aliased(TableGeodata)
+    sub_region_pairs = session.query(TablePlantSubRegion.geodata_key, region_geodata.data)\
+        .join(TablePlantRegion, TablePlantSubRegion.region_key == TablePlantRegion.region_id)\
+        .join(region_geodata, TablePlantRegion.geodata_key == region_geodata.geodata_id)\
+        .filter(TablePlantSubRegion.geodata_key.isnot(None), region_geodata.data.isnot(None)).all()
+    region_by_gid = {}
+    for gid, region_data in sub_region_pairs:
+        try:
+            region = geodata_to_shape(region_data, is_polygon=True)
+        except ValueError:
+            # The region itself is broken - that gets reported on its own
+            continue
+        if region.is_valid:
+            region_by_gid[gid] = region
+    return rows, region_by_gid
+
+
+def validate_all_geodata(session) -> List[GeometryIssue]:
+    """Checks every stored shape. Issues come back grouped by geodata id."""
+    rows, region_by_gid = load_geodata_rows(session)
+    issues, _ = check_geometries(rows, region_by_gid=region_by_gid)
+    return sorted(issues, key=lambda x: (x.gid, x.problem))
+
+
+def repair_geodata(session, issues: List[GeometryIssue]) -> Dict[str, int]:
+    """Repairs every shape with a repairable issue in bulk, then reassigns plant locations if any boundary moved.
+    Repaired shapes are saved like an edit (geometry column, history & caches all follow)."""
+    rows, region_by_gid = load_geodata_rows(session)
+    gids = {x.gid for x in issues if x.is_repairable}
+    escaping = {x.gid for x in issues if x.problem == ESCAPES_REGION}
+    geo_objs = {x.geodata_id: x for x in session.query(TableGeodata).filter(TableGeodata.geodata_id.in_(gids)).all()}
+    repaired = 0
+    failed = 0
+    is_boundary_changed = False
+    for gid, geo_obj in geo_objs.items():
+        new_data = repair_data(geo_obj.is_polygon, geo_obj.data,
+                               region=region_by_gid.get(gid) if gid in escaping else None)
+        if new_data is None:
+            failed += 1
+            continue
+        if new_data == geo_obj.data:
+            continue
+        geo_obj.data = new_data
+        set_geom(session, geo_obj, geodata_to_shape(new_data, is_polygon=geo_obj.is_polygon))
+        record_geodata_version(session, geo_obj)
+        invalidate_geodata_cache(gid)
+        repaired += 1
+        is_boundary_changed = is_boundary_changed or geo_obj.geodata_type in RegionIndex.GEO_TYPES
+    stats = {'repaired': repaired, 'failed': failed, 'locations_changed': 0}
+    if is_boundary_changed:
+        session.flush()
+        REGION_INDEX.clear()
+        stats['locations_changed'] = reassign_plant_locations(session)['locations_changed']
+    return stats
+
+
+def is_point_data(data: str) -> bool:
+    """Whether a submitted geodata string is a point - the same test saving it uses"""
+    try:
+        GeodataPoint.from_string(data, name='', geo_type=None)
+    except ValueError:
+        return False
+    return True
+
+
+def check_geodata(session, geo_type: GeodataType, data: str) -> Tuple[str, List[GeometryIssue]]:
+    """Inline check for a shape about to be saved.
+    Harmless problems (repeated points, bad radius) are fixed in the returned data; the rest come back as issues."""
+    is_polygon = not is_point_data(data)
+    region_by_gid = {}
+    if geo_type == GeodataType.SUB_REGION and is_polygon:
+        # Check against the region it's going to be assigned to (the one covering its first point)
+        try:
+            anchor = shapely.points(GeodataPolygon.from_string(data, name='', geo_type=None).coords[0])
+        except (ValueError, IndexError):
+            anchor = None
+        if anchor is not None:
+            region_index, _ = REGION_INDEX.get(session)
+            region_id = region_index.covering(anchor)
+            if region_id is not None:
+                region_by_gid[None] = region_index.polygons[np.flatnonzero(region_index.ids == region_id)[0]]
+    issues, _ = check_geometries([(None, '', geo_type, is_polygon, data)], region_by_gid=region_by_gid)
+    if any(x.problem in SAFE_REPAIRS for x in issues):
+        data = repair_data(is_polygon, data) or data
+    return data, [x for x in issues if x.problem not in SAFE_REPAIRS]
@@ -6,18 +6,23 @@ from typing import (
 from flask_wtf import FlaskForm
 from shapely.geometry import Point
 from wtforms import (
+    IntegerField,
     SelectField,
     StringField,
     SubmitField,
     TextAreaField
 )
-from wtforms.validators import DataRequired
+from wtforms.validators import (
+    DataRequired,
+    Optional
+)
 
 from plant_tracker.core.geodata import (
     GeodataPoint,
     GeodataPolygon,
     process_gdata_and_assign_location
 )
+from plant_tracker.core.utils import has_column
 from plant_tracker.model import (
     GeodataType,
     TableGeodata,
@@ -52,6 +57,8 @@ class AddGeodataForm(FlaskForm):
         render_kw={'disabled': ''}
     )
     data = TextAreaField(label='GeoData', validators=[DataRequired()])
+    # Only offered for other polygons, so structures can shade plants
+    height_mm = IntegerField(label='Height (mm)', validators=[Optional()])
 
     submit = SubmitField('Submit')
 
@@ -62,6 +69,9 @@ def populate_geodata_form(session, form: AddGeodataForm, geo_type_str: str, obj_
     form['geodata_type'].data = geo_type
     shape_type = 'point' if geo_type in [GeodataType.OTHER_POINT, GeodataType.PLANT_POINT] else 'polygon'
     form['shape_type'].data = shape_type
+    if geo_type != GeodataType.OTHER_POLYGON or not has_column(session, TableGeodata, 'height_mm'):
+        # Only structures get a height, & only once scripts/migrate_structure_heights.py has added the column
+        del form['height_mm']
     if obj_id is not None:
         obj_details = plant_shape_map[geo_type]
         pp: Union[TableGeodata, TablePlantSubRegion, TablePlantRegion]
@@ -86,6 +96,8 @@ def populate_geodata_form(session, form: AddGeodataForm, geo_type_str: str, obj_
             'name': geodata_obj.name,
             'data': data.to_string()
         }
+        if 'height_mm' in form:
+            form_field_map['height_mm'] = geodata_obj.height_mm
 
         # Any cleanup of data should happen here...
 
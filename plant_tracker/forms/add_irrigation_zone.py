@@ -0,0 +1,32 @@
+from flask_wtf import FlaskForm
+from wtforms import (
+    SelectField,
+    StringField,
+    SubmitField
+)
+from wtforms.validators import DataRequired
+
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TableIrrigationZone
+)
+
+
+class AddIrrigationZoneForm(FlaskForm):
+    """Add irrigation zone form"""
+    zone_name = StringField(label='Zone Name', validators=[DataRequired()])
+    geodata = SelectField(label='Zone Shape (Other Group)', validators=[DataRequired()], coerce=int)
+
+    submit = SubmitField('Submit')
+
+
+def populate_irrigation_zone_form(session, form: AddIrrigationZoneForm) -> AddIrrigationZoneForm:
+    """Offers every other_polygon map item that isn't a zone yet as the zone's shape"""
+    zoned = session.query(TableIrrigationZone.geodata_key)
+    form.geodata.choices = [
+        (x.geodata_id, x.name) for x in session.query(TableGeodata.geodata_id, TableGeodata.name)
+        .filter(TableGeodata.geodata_type == GeodataType.OTHER_POLYGON, TableGeodata.geodata_id.not_in(zoned))
+        .order_by(TableGeodata.name.asc()).all()
+    ]
+    return form
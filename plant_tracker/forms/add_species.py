@@ -1,12 +1,19 @@
+from typing import Dict
+
 from flask_wtf import FlaskForm
 from wtforms import (
+    IntegerField,
     SelectField,
     StringField,
     SubmitField,
     TextAreaField
 )
-from wtforms.validators import DataRequired
+from wtforms.validators import (
+    DataRequired,
+    Optional
+)
 
+from plant_tracker.core.utils import has_column
 from plant_tracker.model import (
     DurationType,
     LeafRetentionType,
@@ -78,6 +85,7 @@ species_attr_map = {
         'tbl_key': 'leaf_retention',
         'choices': LeafRetentionType
     },
+    'spacing_mm': 'spacing_mm',
     'usda_symbol': 'usda_symbol',
     'bloom_start_month': {
         'tbl_key': 'bloom_start_month',
@@ -93,6 +101,13 @@ species_attr_map = {
 }
 
 
+def get_species_attr_map(session) -> Dict:
+    """The species attribute map, less spacing until scripts/migrate_species_spacing.py has added its column"""
+    if has_column(session, TableSpecies, 'spacing_mm'):
+        return species_attr_map
+    return {k: v for k, v in species_attr_map.items() if k != 'spacing_mm'}
+
+
 class AddSpeciesForm(FlaskForm):
     """Add species form"""
 
@@ -127,6 +142,7 @@ class AddSpeciesForm(FlaskForm):
     is_drought_tolerant = SelectField(label='Drought Tolerant?', choices=bool_with_unknown_list, default='unknown')
     is_heat_tolerant = SelectField(label='Heat Tolerant?', choices=bool_with_unknown_list, default='unknown')
     is_freeze_tolerant = SelectField(label='Freeze Tolerant?', choices=bool_with_unknown_list, default='unknown')
+    spacing_mm = IntegerField(label='Spacing (mm)', validators=[Optional()])
     usda_symbol = StringField(label='USDA Symbol')
 
     bloom_start_month = SelectField(label='Bloom Start', choices=list_with_default(range(1, 13)), default='')
@@ -160,7 +176,7 @@ def populate_species_form(session, form: AddSpeciesForm, species_id: int = None)
         species_attr_map['family']['choices'] = fams
         species_attr_map['habit']['choices'] = habits
 
-        form_field_map = apply_field_data_to_form(species, species_attr_map)
+        form_field_map = apply_field_data_to_form(species, get_species_attr_map(session))
 
         # Any cleanup of data should happen here
 
@@ -183,7 +199,7 @@ def get_species_data_from_form(session, form_data, species_id: int = None) -> Ta
         species = TableSpecies()
 
     species = extract_form_data_to_obj(form_data=form_data, table_obj=species,
-                                       obj_attr_map=species_attr_map, session=session)
+                                       obj_attr_map=get_species_attr_map(session), session=session)
 
     # Handle genus/species migration into scientific name field
     genus = species.genus
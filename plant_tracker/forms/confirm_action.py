@@ -0,0 +1,15 @@
+from flask_wtf import FlaskForm
+from wtforms import (
+    BooleanField,
+    SubmitField,
+)
+from wtforms.validators import DataRequired
+
+
+class ConfirmActionForm(FlaskForm):
+    """Confirm (non-delete) action form"""
+    confirm = BooleanField(
+        label='Are you sure you want to run this?',
+        validators=[DataRequired()],
+    )
+    submit = SubmitField('Run')
@@ -0,0 +1,13 @@
+from flask_wtf import FlaskForm
+from wtforms import (
+    FileField,
+    SubmitField
+)
+from wtforms.validators import DataRequired
+
+
+class ImportGeodataForm(FlaskForm):
+    """Import geodata form"""
+    import_file = FileField(label='GeoJSON / KML File', validators=[DataRequired()])
+
+    submit = SubmitField('Import')
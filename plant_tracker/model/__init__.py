@@ -13,9 +13,12 @@ from .logs import (
 from .maps import (
     GeodataType,
     TableGeodata,
+    TableGeodataHistory,
+    TableIrrigationZone,
     TablePlantLocation,
     TablePlantRegion,
     TablePlantSubRegion,
+    TableSunEstimate,
 )
 from .plant import (
     PlantSourceType,
@@ -32,3 +35,12 @@ from .species import (
     TableSpecies,
     WaterRequirementType
 )
+# Loader options configure the mappers, so every model has to be imported first
+from .loaders import (
+    IMAGE_LIST_LOADERS,
+    IRRIGATION_ZONE_LIST_LOADERS,
+    PLANT_DETAIL_LOADERS,
+    PLANT_LIST_LOADERS,
+    SPECIES_DETAIL_LOADERS,
+    SPECIES_LIST_LOADERS
+)
@@ -0,0 +1,56 @@
+"""Named eager-loading profiles for the list & detail views.
+
+Each is the set of loader options a view's query needs so that everything it touches on each row is
+loaded up front - a list then renders in the same few queries however many rows it shows, and a detail page
+however long the item's history gets.
+"""
+from sqlalchemy.orm import (
+    joinedload,
+    selectinload
+)
+
+from .image import TableImage
+from .maps import (
+    TableIrrigationZone,
+    TablePlantLocation
+)
+from .plant import TablePlant
+from .species import TableSpecies
+
+# Species and the location's region & sub region, all joined into the plant query
+PLANT_LIST_LOADERS = (
+    joinedload(TablePlant.species),
+    joinedload(TablePlant.plant_location).joinedload(TablePlantLocation.region),
+    joinedload(TablePlant.plant_location).joinedload(TablePlantLocation.sub_region),
+)
+# Family joined in; plants (only their ids, they're just counted) in one more query
+SPECIES_LIST_LOADERS = (
+    joinedload(TableSpecies.plant_family),
+    selectinload(TableSpecies.plants).load_only(TablePlant.plant_id),
+)
+# Species images name their species, plant images their plant's species
+IMAGE_LIST_LOADERS = (
+    joinedload(TableImage.species),
+    joinedload(TableImage.plant).joinedload(TablePlant.species),
+)
+IRRIGATION_ZONE_LIST_LOADERS = (
+    joinedload(TableIrrigationZone.geodata),
+)
+# Many-to-ones joined into the plant row, then one batched select per collection
+PLANT_DETAIL_LOADERS = (
+    joinedload(TablePlant.species),
+    joinedload(TablePlant.plant_location),
+    selectinload(TablePlant.images),
+    selectinload(TablePlant.observation_logs),
+    selectinload(TablePlant.maintenance_logs),
+    selectinload(TablePlant.watering_logs),
+)
+SPECIES_DETAIL_LOADERS = (
+    joinedload(TableSpecies.plant_family),
+    joinedload(TableSpecies.habit),
+    selectinload(TableSpecies.alternate_names),
+    selectinload(TableSpecies.images),
+    selectinload(TableSpecies.scheduled_maintenance_logs),
+    # Plants are only counted & shown on the map
+    selectinload(TableSpecies.plants).load_only(TablePlant.plant_id).joinedload(TablePlant.plant_location),
+)
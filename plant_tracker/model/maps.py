@@ -1,15 +1,25 @@
 from dataclasses import dataclass
+import datetime
 from enum import StrEnum
 
+from geoalchemy2 import Geometry
 from sqlalchemy import (
+    TIMESTAMP,
     VARCHAR,
     Boolean,
     Column,
     Enum,
+    FetchedValue,
+    Float,
     ForeignKey,
     Integer,
+    func,
+)
+from sqlalchemy.orm import (
+    backref,
+    deferred,
+    relationship
 )
-from sqlalchemy.orm import relationship
 
 from .base import Base
 
@@ -34,6 +44,39 @@ class TableGeodata(Base):
     name: str = Column(VARCHAR, nullable=False)
     is_polygon: bool = Column(Boolean, nullable=False)
     data: str = Column(VARCHAR)
+    # Native copy of `data` for PostGIS. This is deferred & never sent unless explicitly set, so the table still
+    #   works on databases without PostGIS. It's left out of CREATE TABLE (system=True) - the column & its GiST
+    #   index are added by scripts/migrate_geodata_geom.py once PostGIS is there
+    geom = deferred(Column(Geometry(geometry_type='GEOMETRY', srid=0, spatial_index=False),
+                           server_default=FetchedValue(), system=True))
+    # How tall a structure (building, fence, tree...) drawn as an other_polygon is, for shading. Deferred
+    #   like geom, so it's only sent when set (see scripts/migrate_structure_heights.py)
+    height_mm = deferred(Column(Integer, server_default=FetchedValue()))
+
+    __mapper_args__ = {'eager_defaults': False}
+
+    def __repr__(self):
+        return self.build_repr_for_class(self)
+
+
+@dataclass
+class TableGeodataHistory(Base):
+    """geodata_history
+    Append-only copies of each version of a geodata row, valid over [valid_from, valid_to).
+    The current version is left open (valid_to is NULL).
+    """
+
+    history_id: int = Column(Integer, primary_key=True, autoincrement=True)
+    # Deliberately not a foreign key - history outlives the geodata it describes
+    geodata_key: int = Column(Integer, nullable=False, index=True)
+    geodata = relationship('TableGeodata',
+                           primaryjoin='foreign(TableGeodataHistory.geodata_key) == TableGeodata.geodata_id')
+    geodata_type: str = Column(Enum(GeodataType), nullable=False)
+    name: str = Column(VARCHAR, nullable=False)
+    is_polygon: bool = Column(Boolean, nullable=False)
+    data: str = Column(VARCHAR)
+    valid_from: datetime.datetime = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    valid_to: datetime.datetime = Column(TIMESTAMP)
 
     def __repr__(self):
         return self.build_repr_for_class(self)
@@ -82,3 +125,33 @@ class TablePlantLocation(Base):
 
     def __repr__(self):
         return self.build_repr_for_class(self)
+
+
+@dataclass
+class TableIrrigationZone(Base):
+    """irrigation_zone
+    An irrigated area, drawn as an other_polygon geodata item. Plants inside a zone count as irrigated.
+    """
+    zone_id: int = Column(Integer, primary_key=True, autoincrement=True)
+    zone_name: str = Column(VARCHAR, nullable=False)
+    geodata_key: int = Column(ForeignKey(TableGeodata.geodata_id, ondelete='CASCADE'), nullable=False)
+    geodata = relationship('TableGeodata', foreign_keys=[geodata_key],
+                           backref=backref('irrigation_zones', passive_deletes=True))
+
+    def __repr__(self):
+        return self.build_repr_for_class(self)
+
+
+@dataclass
+class TableSunEstimate(Base):
+    """sun_estimate
+    Estimated hours of direct sun at a plant location, w/ what it was estimated from. It's stale once the
+    location's shape (data) or the structures, latitude or bearing (signature) no longer match.
+    """
+    geodata_key: int = Column(ForeignKey(TableGeodata.geodata_id, ondelete='CASCADE'), primary_key=True)
+    data: str = Column(VARCHAR, nullable=False)
+    signature: str = Column(VARCHAR, nullable=False)
+    sun_hours: float = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return self.build_repr_for_class(self)
@@ -6,10 +6,14 @@ from sqlalchemy import (
     Boolean,
     Column,
     Enum,
+    FetchedValue,
     ForeignKey,
     Integer,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import (
+    deferred,
+    relationship
+)
 
 from .base import Base
 
@@ -88,6 +92,9 @@ class TableSpecies(Base):
     light_requirement: str = Column(Enum(LightRequirementType))
     soil_moisture: str = Column(Enum(SoilMoistureType))
     leaf_retention: str = Column(Enum(LeafRetentionType))
+    # Recommended distance between plants (center to center). Deferred & only sent when set, so species still
+    #   load before scripts/migrate_species_spacing.py has added it - check has_column before reading it
+    spacing_mm = deferred(Column(Integer, server_default=FetchedValue()))
     is_drought_tolerant: bool = Column(Boolean)
     is_heat_tolerant: bool = Column(Boolean)
     is_freeze_tolerant: bool = Column(Boolean)
@@ -103,6 +110,8 @@ class TableSpecies(Base):
     scheduled_maintenance_logs = relationship('TableScheduledMaintenanceLog', back_populates='species')
     scheduled_watering_logs = relationship('TableScheduledWateringLog', back_populates='species')
 
+    __mapper_args__ = {'eager_defaults': False}
+
     def __repr__(self) -> str:
         return self.build_repr_for_class(self)
 
@@ -26,55 +26,64 @@ bp_altname = Blueprint('altname', __name__, url_prefix='/species/<int:species_id
 def add_altname(species_id: int):
     eng = get_app_eng()
     form = AddNameForm()
-    with eng.session_mgr() as session:
-        form = populate_name_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_name_form(session=session, form=form)
             return render_template(
                 'pages/altname/add-altname.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint, species_id=species_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> int:
             altname = get_name_data_from_form(session=session, form_data=request.form)
             altname.species_key = species_id
             session.add(altname)
-            session.commit()
-            session.refresh(altname)
-            flash(f'Species alternative name {altname.alternate_name_id} successfully added', 'success')
-            return redirect(url_for('species.get_species', species_id=species_id))
+            session.flush()
+            return altname.alternate_name_id
+
+        alternate_name_id = eng.unit_of_work(save)
+        flash(f'Species alternative name {alternate_name_id} successfully added', 'success')
+        return redirect(url_for('species.get_species', species_id=species_id))
 
 
 @bp_altname.route('/<int:alternate_name_id>/edit', methods=['GET', 'POST'])
 def edit_altname(species_id: int = None, alternate_name_id: int = None):
     eng = get_app_eng()
     form = AddNameForm()
-    with eng.session_mgr() as session:
-        form = populate_name_form(session=session, form=form, alternate_name_id=alternate_name_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_name_form(session=session, form=form, alternate_name_id=alternate_name_id)
             return render_template(
                 'pages/altname/add-altname.jinja',
                 form=form,
                 is_edit=True,
                 post_endpoint_url=url_for(request.endpoint, species_id=species_id, alternate_name_id=alternate_name_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session):
             altname = get_name_data_from_form(session=session, form_data=request.form,
                                               alternate_name_id=alternate_name_id)
             session.add(altname)
-            flash(f'Alternate name #{altname.alternate_name_id} successfully updated', 'success')
-            return redirect(url_for('species.get_species', species_id=species_id))
+
+        eng.unit_of_work(save)
+        flash(f'Alternate name #{alternate_name_id} successfully updated', 'success')
+        return redirect(url_for('species.get_species', species_id=species_id))
+
+
+def get_altname(session, alternate_name_id: int) -> TableAlternateNames:
+    return session.query(TableAlternateNames). \
+        filter(TableAlternateNames.alternate_name_id == alternate_name_id).one_or_none()
 
 
 @bp_altname.route('/<int:alternate_name_id>/delete', methods=['GET', 'POST'])
 def delete_alt_name(species_id: int = None, alternate_name_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        altname: TableAlternateNames
-        altname = session.query(TableAlternateNames). \
-            filter(TableAlternateNames.alternate_name_id == alternate_name_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            altname = get_altname(session, alternate_name_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -83,8 +92,13 @@ def delete_alt_name(species_id: int = None, alternate_name_id: int = None):
                                     alternate_name_id=alternate_name_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            def remove(session) -> str:
+                altname = get_altname(session, alternate_name_id)
                 session.delete(altname)
-                flash(f'Species alternate name "{altname.name}" successfully removed', 'success')
+                return altname.name
+
+            name = eng.unit_of_work(remove)
+            flash(f'Species alternate name "{name}" successfully removed', 'success')
         return redirect(url_for('species.get_species', species_id=species_id))
@@ -1,3 +1,5 @@
+from typing import Tuple
+
 from flask import (
     Blueprint,
     flash,
@@ -30,54 +32,61 @@ bp_family = Blueprint('family', __name__, url_prefix='/family')
 def add_family():
     eng = get_app_eng()
     form = AddFamilyForm()
-    with eng.session_mgr() as session:
-        form = populate_family_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_family_form(session=session, form=form)
             return render_template(
                 'pages/family/add-family.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> Tuple[int, str]:
             family = get_family_data_from_form(session=session, form_data=request.form)
             session.add(family)
-            session.commit()
-            session.refresh(family)
-            flash(f'Family {family.scientific_name} successfully added', 'success')
-            return redirect(url_for('family.get_family', family_id=family.plant_family_id))
+            session.flush()
+            return family.plant_family_id, family.scientific_name
+
+        family_id, name = eng.unit_of_work(save)
+        flash(f'Family {name} successfully added', 'success')
+        return redirect(url_for('family.get_family', family_id=family_id))
 
 
 @bp_family.route('/<int:family_id>/edit', methods=['GET', 'POST'])
 def edit_family(family_id: int):
     eng = get_app_eng()
     form = AddFamilyForm()
-    with eng.session_mgr() as session:
-        form = populate_family_form(session=session, form=form, family_id=family_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_family_form(session=session, form=form, family_id=family_id)
             return render_template(
                 'pages/family/add-family.jinja',
                 form=form,
                 is_edit=True,
                 post_endpoint_url=url_for(request.endpoint, family_id=family_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> str:
             family = get_family_data_from_form(session=session, form_data=request.form, family_id=family_id)
             session.add(family)
-            flash(f'Family {family.scientific_name} successfully updated', 'success')
-            return redirect(url_for('family.get_all_families'))
+            return family.scientific_name
+
+        name = eng.unit_of_work(save)
+        flash(f'Family {name} successfully updated', 'success')
+        return redirect(url_for('family.get_all_families'))
 
 
 @bp_family.route('/<int:family_id>', methods=['GET'])
 def get_family(family_id: int):
-    with get_app_eng().session_mgr() as session:
+    with get_app_eng().read_session() as session:
         fam = session.query(TablePlantFamily).filter(TablePlantFamily.plant_family_id == family_id).one_or_none()
         return render_template('pages/family/family-info.jinja', data=fam)
 
 
 @bp_family.route('/all', methods=['GET'])
 def get_all_families():
-    with get_app_eng().session_mgr() as session:
+    with get_app_eng().read_session() as session:
         fams = session.query(TablePlantFamily).all()
         spp = session.query(TableSpecies).all()
         # Group species by family id
@@ -115,15 +124,18 @@ def get_all_families():
     ), 200
 
 
+def get_plant_family(session, family_id: int) -> TablePlantFamily:
+    return session.query(TablePlantFamily). \
+        filter(TablePlantFamily.plant_family_id == family_id).one_or_none()
+
+
 @bp_family.route('/<int:family_id>/delete', methods=['GET', 'POST'])
 def delete_family(family_id: int):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        family: TablePlantFamily
-        family = session.query(TablePlantFamily). \
-            filter(TablePlantFamily.plant_family_id == family_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            family = get_plant_family(session, family_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -131,8 +143,13 @@ def delete_family(family_id: int):
                 confirm_url=url_for('family.delete_family', family_id=family_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            def remove(session) -> str:
+                family = get_plant_family(session, family_id)
                 session.delete(family)
-                flash(f'Family {family.scientific_name} successfully removed', 'success')
+                return family.scientific_name
+
+            name = eng.unit_of_work(remove)
+            flash(f'Family {name} successfully removed', 'success')
         return redirect(url_for('family.get_all_families'))
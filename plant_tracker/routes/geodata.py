@@ -1,102 +1,209 @@
+import datetime
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
 from flask import (
     Blueprint,
+    Response,
+    abort,
+    current_app,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
+    send_from_directory,
+    stream_with_context,
     url_for
 )
 from sqlalchemy.sql import not_
 
-from plant_tracker.core.geodata import get_all_geodata
+from plant_tracker.core.geodata import (
+    IRRIGATION_COVERAGE,
+    MAP_HEIGHT_MM,
+    MAP_WIDTH_MM,
+    OVERVIEW_SCALE,
+    close_geodata_history,
+    encode_topology,
+    get_all_geodata,
+    get_geodata_as_of,
+    get_geodata_ids_in_bbox,
+    get_nearest_plants,
+    get_plants_at,
+    get_plants_within,
+    invalidate_geodata_cache,
+    tolerance_for_scale
+)
+from plant_tracker.core.geodata_export import (
+    EXPORT_FORMATS,
+    iter_binary,
+    iter_export_rows,
+    iter_geojson
+)
+from plant_tracker.core.geodata_import import (
+    detect_format,
+    import_geodata,
+    iter_features
+)
+from plant_tracker.core.location_assignment import (
+    reassign_for_boundary_change,
+    reassign_plant_locations
+)
+from plant_tracker.core.spacing import SPACING_REPORT
+from plant_tracker.core.sun_exposure import (
+    estimate_locations,
+    find_stale_locations,
+    get_sun_estimates,
+    save_sun_estimates
+)
+from plant_tracker.core.tiles import (
+    EMPTY_TILE_NAME,
+    TILE_MAX_AGE,
+    TILE_SIZE,
+    read_manifest,
+    tile_path
+)
+from plant_tracker.core.utils import (
+    has_column,
+    has_table
+)
+from plant_tracker.core.validation import (
+    repair_geodata,
+    validate_all_geodata
+)
 from plant_tracker.forms.add_geodata import (
     AddGeodataForm,
     get_geodata_data_from_form,
     plant_shape_map,
     populate_geodata_form
 )
+from plant_tracker.forms.add_irrigation_zone import (
+    AddIrrigationZoneForm,
+    populate_irrigation_zone_form
+)
+from plant_tracker.forms.confirm_action import ConfirmActionForm
 from plant_tracker.forms.confirm_delete import ConfirmDeleteForm
+from plant_tracker.forms.import_geodata import ImportGeodataForm
 from plant_tracker.model import (
+    IRRIGATION_ZONE_LIST_LOADERS,
     GeodataType,
-    TableGeodata
+    TableGeodata,
+    TableIrrigationZone,
+    TableSpecies,
+    TableSunEstimate
 )
 from plant_tracker.routes.helpers import (
+    check_form_geodata,
     get_app_logger,
-    get_app_eng
+    get_app_eng,
+    get_map_layers
 )
 
 bp_geodata = Blueprint('geodata', __name__, url_prefix='/geodata')
 
 
+def describe_geodata_item(geo_type: str, pp) -> str:
+    """How flash messages refer to a map item"""
+    if geo_type in [GeodataType.PLANT_GROUP.value, GeodataType.PLANT_POINT.value]:
+        return f'Plant location "{pp.plant_location_name}"'
+    elif geo_type == GeodataType.SUB_REGION.value:
+        return f'Sub region "{pp.sub_region_name}"'
+    elif geo_type == GeodataType.REGION.value:
+        return f'Region "{pp.region_name}"'
+    return f'Object "{pp.name}"'
+
+
 @bp_geodata.route('/<geo_type>/add', methods=['GET', 'POST'])
 @bp_geodata.route('/<geo_type>/plant/<int:plant_id>/add', methods=['GET', 'POST'])
 def add_geodata(geo_type: str, plant_id: int = None):
     eng = get_app_eng()
     form = AddGeodataForm()
-    with eng.session_mgr() as session:
+    form_data = request.form
+    with eng.read_session() as session:
         form = populate_geodata_form(session=session, form=form, geo_type_str=geo_type)
-        if request.method == 'GET':
+        if request.method == 'POST':
+            form_data = check_form_geodata(session, geo_type=GeodataType(geo_type), form_data=request.form)
+            if form_data is None:
+                form.data.data = request.form['data']
+        if request.method == 'GET' or form_data is None:
             return render_template(
                 'pages/geodata/add-geodata.jinja',
                 form=form,
                 is_edit=False,
-                map_points=get_all_geodata(session=session),
+                **get_map_layers(session, is_render_for_input=True),
                 post_endpoint_url=url_for(request.endpoint, geo_type=geo_type)
             )
-        elif request.method == 'POST':
-            pp = get_geodata_data_from_form(session=session, form_data=request.form, geo_type_str=geo_type)
-            pp = eng.commit_and_refresh_table_obj(session=session, table_obj=pp)
-            if geo_type in [GeodataType.PLANT_GROUP.value, GeodataType.PLANT_POINT.value]:
-                flash(f'Plant location "{pp.plant_location_name}" successfully added', 'success')
-            elif geo_type == GeodataType.SUB_REGION.value:
-                flash(f'Sub region "{pp.sub_region_name}" successfully added', 'success')
-            elif geo_type == GeodataType.REGION.value:
-                flash(f'Region "{pp.region_name}" successfully added', 'success')
-            else:
-                flash(f'Object "{pp.name}" successfully added', 'success')
-            return redirect(url_for('geodata.get_all', geo_type=geo_type))
+
+    def save(session) -> str:
+        pp = get_geodata_data_from_form(session=session, form_data=form_data, geo_type_str=geo_type)
+        session.add(pp)
+        if geo_type in [GeodataType.REGION.value, GeodataType.SUB_REGION.value]:
+            # A new boundary can pull in plants that were previously assigned elsewhere
+            reassign_for_boundary_change(session=session, old_data=None, new_data=pp.geodata.data)
+        session.flush()
+        return describe_geodata_item(geo_type, pp)
+
+    item = eng.unit_of_work(save)
+    flash(f'{item} successfully added', 'success')
+    return redirect(url_for('geodata.get_all', geo_type=geo_type))
 
 
 @bp_geodata.route('/<geo_type>/<int:obj_id>/edit', methods=['GET', 'POST'])
 def edit_geodata(geo_type: str, obj_id: int = None):
     eng = get_app_eng()
     form = AddGeodataForm()
-    with eng.session_mgr() as session:
+    form_data = request.form
+    with eng.read_session() as session:
         form = populate_geodata_form(session=session, form=form, geo_type_str=geo_type, obj_id=obj_id)
-        if request.method == 'GET':
+        if request.method == 'POST':
+            form_data = check_form_geodata(session, geo_type=GeodataType(geo_type), form_data=request.form)
+            if form_data is None:
+                form.data.data = request.form['data']
+        if request.method == 'GET' or form_data is None:
             return render_template(
                 'pages/geodata/add-geodata.jinja',
                 form=form,
                 is_edit=True,
-                map_points=get_all_geodata(session=session, focus_ids=[] if obj_id is None else [obj_id]),
+                **get_map_layers(session, focus_ids=[] if obj_id is None else [obj_id], is_render_for_input=True),
                 post_endpoint_url=url_for(request.endpoint, geo_type=geo_type, obj_id=obj_id)
             )
-        elif request.method == 'POST':
-            pp = get_geodata_data_from_form(session=session, form_data=request.form,
-                                            geo_type_str=geo_type, obj_id=obj_id)
-            pp = eng.commit_and_refresh_table_obj(session=session, table_obj=pp)
-            if geo_type in [GeodataType.PLANT_GROUP.value, GeodataType.PLANT_POINT.value]:
-                flash(f'Plant location "{pp.plant_location_name}" successfully edited', 'success')
-            elif geo_type == GeodataType.SUB_REGION.value:
-                flash(f'Sub region "{pp.sub_region_name}" successfully edited', 'success')
-            elif geo_type == GeodataType.REGION.value:
-                flash(f'Region "{pp.region_name}" successfully edited', 'success')
-            else:
-                flash(f'Object "{pp.value}" successfully edited', 'success')
-            return redirect(url_for('geodata.get_all', geo_type=geo_type))
+
+    def save(session) -> str:
+        old_data = session.query(TableGeodata.data).filter(TableGeodata.geodata_id == obj_id).scalar()
+        pp = get_geodata_data_from_form(session=session, form_data=form_data,
+                                        geo_type_str=geo_type, obj_id=obj_id)
+        if geo_type in [GeodataType.REGION.value, GeodataType.SUB_REGION.value] and old_data != pp.geodata.data:
+            # Only plants in the area between the old & new boundary can have changed parents
+            reassign_for_boundary_change(session=session, old_data=old_data, new_data=pp.geodata.data)
+        session.add(pp)
+        session.flush()
+        return describe_geodata_item(geo_type, pp)
+
+    item = eng.unit_of_work(save)
+    invalidate_geodata_cache(obj_id)
+    flash(f'{item} successfully edited', 'success')
+    return redirect(url_for('geodata.get_all', geo_type=geo_type))
+
+
+def get_geodata_item(session, geo_type: str, obj_id: int):
+    """The geodata row itself, or the plant location / region / sub region it's the shape of"""
+    pp_obj = plant_shape_map[geo_type]['obj']
+    if pp_obj is TableGeodata:
+        return session.query(TableGeodata).filter(TableGeodata.geodata_id == obj_id).one_or_none()
+    return session.query(pp_obj).filter(pp_obj.geodata_key == obj_id).one_or_none()
 
 
 @bp_geodata.route('/<geo_type>/<int:obj_id>/delete', methods=['GET', 'POST'])
 def delete_geodata(geo_type: str, obj_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        pp_obj = plant_shape_map[geo_type]['obj']
-        if pp_obj is TableGeodata:
-            pp = session.query(TableGeodata).filter(TableGeodata.geodata_id == obj_id).one_or_none()
-        else:
-            pp = session.query(pp_obj).filter(pp_obj.geodata_key == obj_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            pp = get_geodata_item(session, geo_type, obj_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -104,12 +211,19 @@ def delete_geodata(geo_type: str, obj_id: int = None):
                 confirm_url=url_for('geodata.delete_geodata', geo_type=geo_type, obj_id=obj_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            def remove(session) -> str:
+                pp = get_geodata_item(session, geo_type, obj_id)
                 session.delete(pp)
-                if pp_obj is not TableGeodata:
+                if not isinstance(pp, TableGeodata):
                     session.delete(pp.geodata)
-                flash(f'Geodata name "{pp}" successfully removed', 'success')
+                close_geodata_history(session, obj_id)
+                return str(pp)
+
+            name = eng.unit_of_work(remove)
+            invalidate_geodata_cache(obj_id)
+            flash(f'Geodata name "{name}" successfully removed', 'success')
         return redirect(url_for('geodata.get_all'))
 
 
@@ -117,7 +231,7 @@ def delete_geodata(geo_type: str, obj_id: int = None):
 @bp_geodata.route('/<geo_type>/all', methods=['GET', 'POST'])
 def get_all(geo_type: str = None):
     eng = get_app_eng()
-    with eng.session_mgr() as session:
+    with eng.read_session() as session:
         if geo_type:
             geos = session.query(TableGeodata).filter(TableGeodata.geodata_type == GeodataType(geo_type)).all()
         else:
@@ -149,11 +263,444 @@ def get_all(geo_type: str = None):
     ), 200
 
 
+def get_as_of_from_args() -> Optional[datetime.datetime]:
+    """Parses the optional as_of timestamp. A bare date means the end of that day."""
+    as_of = request.args.get('as_of')
+    if not as_of:
+        return None
+    try:
+        if len(as_of) == len('YYYY-MM-DD'):
+            return datetime.datetime.combine(datetime.date.fromisoformat(as_of), datetime.time.max)
+        return datetime.datetime.fromisoformat(as_of)
+    except ValueError:
+        abort(400, f'as_of should be an ISO date or timestamp (e.g., 2025-04-01), not "{as_of}"')
+
+
 @bp_geodata.route('/map', methods=['GET', 'POST'])
 def get_map():
-    eng = get_app_eng()
-    with eng.session_mgr() as session:
+    as_of = get_as_of_from_args()
+    if as_of is not None:
+        # Past versions come out of the history table in one go
+        with get_app_eng().read_session() as session:
+            map_points_dict = get_geodata_as_of(session, as_of=as_of, scale=OVERVIEW_SCALE)
         return render_template(
             'pages/geodata/map.jinja',
-            map_points_dict=get_all_geodata(session=session),
+            map_points_dict=map_points_dict,
+            features_url=None,
+            as_of=request.args['as_of']
+        )
+    # Features are pulled in for whatever part of the map is in view
+    return render_template(
+        'pages/geodata/map.jinja',
+        map_points_dict=None,
+        features_url=url_for('geodata.get_features'),
+        as_of=None
+    )
+
+
+def get_geo_types_from_args() -> Optional[List[GeodataType]]:
+    """Parses the optional comma-separated list of geodata types from the request args"""
+    types = request.args.get('types')
+    if not types:
+        return None
+    try:
+        return [GeodataType(x.strip()) for x in types.split(',')]
+    except ValueError:
+        abort(400, f'Unknown geodata type in "{types}". Expected any of: {", ".join(list(GeodataType))}')
+
+
+def add_feature_urls(features: Dict[GeodataType, List[Dict]]) -> Dict[GeodataType, List[Dict]]:
+    """Adds the same links the map template would build for each item"""
+    for g_type, items in features.items():
+        for item in items:
+            if g_type.startswith('plant_'):
+                if item.get('plant_id') is not None:
+                    item['url'] = url_for('plant.get_plant', plant_id=item['plant_id'])
+            else:
+                item['url'] = url_for('geodata.edit_geodata', geo_type=g_type, obj_id=item['gid'])
+    return features
+
+
+@bp_geodata.route('/api/features', methods=['GET'])
+def get_features():
+    """Gets all geodata items intersecting the bbox=minx,miny,maxx,maxy viewport.
+    An optional scale (mm per px) gets polygons at the matching level of detail.
+    With format=topology, items come back in the compact shared-arc encoding (see encode_topology)."""
+    try:
+        bbox = tuple(float(x) for x in request.args['bbox'].split(','))
+    except (KeyError, ValueError):
+        bbox = ()
+    if len(bbox) != 4:
+        abort(400, 'bbox is required as minx,miny,maxx,maxy')
+    geo_types = get_geo_types_from_args()
+    scale = request.args.get('scale', type=float)
+    payload_format = request.args.get('format', 'features')
+    if payload_format not in ['features', 'topology']:
+        abort(400, f'Unknown format "{payload_format}". Expected features or topology')
+    with get_app_eng().read_session() as session:
+        geodata_ids = get_geodata_ids_in_bbox(session, bbox=bbox, geo_types=geo_types)
+        if payload_format == 'topology':
+            # Arcs get simplified after they're shared, so the full resolution polygons are needed here
+            features = get_all_geodata(session=session, geodata_ids=geodata_ids)
+        else:
+            features = get_all_geodata(session=session, geodata_ids=geodata_ids, scale=scale)
+    features = add_feature_urls(features)
+    if payload_format == 'topology':
+        return jsonify({
+            'bbox': list(bbox),
+            'topology': encode_topology(features, tolerance=tolerance_for_scale(scale))
+        }), 200
+    return jsonify({
+        'bbox': list(bbox),
+        'features': features
+    }), 200
+
+
+def get_xy_from_args() -> Tuple[float, float]:
+    """Parses the required x & y (mm) map coordinates from the request args"""
+    try:
+        return float(request.args['x']), float(request.args['y'])
+    except (KeyError, ValueError):
+        abort(400, 'x and y are required as map coordinates (mm)')
+
+
+def plant_query_response(x: float, y: float, plants: List[Dict], **kwargs):
+    for plant in plants:
+        if plant['plant_id'] is not None:
+            plant['url'] = url_for('plant.get_plant', plant_id=plant['plant_id'])
+    return jsonify(dict(x=x, y=y, **kwargs, plants=plants)), 200
+
+
+@bp_geodata.route('/api/plants/at', methods=['GET'])
+def get_plants_at_point():
+    """Gets the plants whose point or group covers x,y - smallest first"""
+    x, y = get_xy_from_args()
+    with get_app_eng().read_session() as session:
+        plants = get_plants_at(session, x=x, y=y)
+    return plant_query_response(x, y, plants)
+
+
+@bp_geodata.route('/api/plants/within', methods=['GET'])
+def get_plants_within_distance():
+    """Gets the plants within distance (mm) of x,y - closest first"""
+    x, y = get_xy_from_args()
+    distance = request.args.get('distance', type=float)
+    if distance is None or distance < 0:
+        abort(400, 'distance (mm) is required and cannot be negative')
+    with get_app_eng().read_session() as session:
+        plants = get_plants_within(session, x=x, y=y, distance=distance)
+    return plant_query_response(x, y, plants, distance=distance)
+
+
+@bp_geodata.route('/api/plants/nearest', methods=['GET'])
+def get_plants_nearest():
+    """Gets the k (default 5) plants nearest to x,y - closest first"""
+    x, y = get_xy_from_args()
+    k = request.args.get('k', default=5, type=int)
+    if not 1 <= k <= 100:
+        abort(400, 'k should be between 1 and 100')
+    with get_app_eng().read_session() as session:
+        plants = get_nearest_plants(session, x=x, y=y, k=k)
+    return plant_query_response(x, y, plants, k=k)
+
+
+@bp_geodata.route('/tiles/tiles.json', methods=['GET'])
+def get_tiles_info():
+    """Describes the pre-rendered tile pyramid. Tile urls carry the render version, so they're safe to cache."""
+    manifest = read_manifest(current_app.config['TILE_DIR'])
+    if manifest['max_zoom'] is None:
+        abort(404, 'No tiles have been rendered yet. Run scripts/render_tiles.py')
+    tiles_url = url_for('geodata.get_tiles_info').rsplit('/', maxsplit=1)[0]
+    return jsonify({
+        'version': manifest['version'],
+        'tiles': [f'{tiles_url}/{{z}}/{{x}}/{{y}}.png?v={manifest["version"]}'],
+        'tile_size': TILE_SIZE,
+        'minzoom': 0,
+        'maxzoom': manifest['max_zoom'],
+        'bounds': [0, 0, MAP_WIDTH_MM, MAP_HEIGHT_MM]
+    }), 200
+
+
+@bp_geodata.route('/tiles/<int:z>/<int:x>/<int:y>.png', methods=['GET'])
+def get_tile(z: int, x: int, y: int):
+    """Serves a rendered map tile straight from disk. Tiles with nothing on them are served as a blank one."""
+    tile_dir = current_app.config['TILE_DIR']
+    path = tile_path(tile_dir, z, x, y)
+    if not path.exists():
+        path = tile_dir.joinpath(EMPTY_TILE_NAME)
+        if not path.exists():
+            abort(404)
+    response = send_from_directory(tile_dir, str(path.relative_to(tile_dir)), max_age=TILE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@bp_geodata.route('/reassign', methods=['GET', 'POST'])
+def reassign_locations():
+    eng = get_app_eng()
+    form = ConfirmActionForm()
+    if request.method == 'GET':
+        return render_template(
+            'pages/confirm.jinja',
+            confirm_title='Confirm recalculating regions & sub regions for ',
+            confirm_focus='all plant locations',
+            confirm_url=url_for('geodata.reassign_locations'),
+            form=form
+        )
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            stats = eng.unit_of_work(reassign_plant_locations)
+            flash(f'Checked {stats["locations_checked"]} plant locations: {stats["locations_changed"]} '
+                  f'locations and {stats["sub_regions_changed"]} sub regions reassigned', 'success')
+        return redirect(url_for('geodata.get_all'))
+
+
+@bp_geodata.route('/validate', methods=['GET'])
+def validate_geodata():
+    eng = get_app_eng()
+    with eng.read_session() as session:
+        issues = validate_all_geodata(session)
+    data_list = []
+    for issue in issues:
+        data_list.append([
+            issue.gid,
+            issue.name,
+            issue.geo_type,
+            issue.problem.replace('_', ' '),
+            issue.detail,
+            {'icon': f'bi-{"check" if issue.is_repairable else "x"}', 'val_class': 'icon bool'},
+            [
+                {'url': url_for('geodata.edit_geodata', geo_type=issue.geo_type, obj_id=issue.gid),
+                 'icon': 'bi-pencil', 'val_class': 'icon edit'}
+            ]
+        ])
+    return render_template(
+        'pages/geodata/validate-geodata.jinja',
+        order_list=[0, 'asc'],
+        data_rows=data_list,
+        headers=['ID', 'Geodata Name', 'Type', 'Problem', 'Detail', 'Repairable', ''],
+        table_id='validate-table',
+        n_repairable=len({x.gid for x in issues if x.is_repairable})
+    ), 200
+
+
+@bp_geodata.route('/spacing', methods=['GET'])
+def get_plant_spacing():
+    eng = get_app_eng()
+    with eng.read_session() as session:
+        if has_column(session, TableSpecies, 'spacing_mm'):
+            pairs = SPACING_REPORT.get(session)
+        else:
+            flash('Species spacing isn\'t set up yet - run scripts/migrate_species_spacing.py', 'warning')
+            pairs = []
+    data_list = []
+    for pair in pairs:
+        data_list.append([
+            {'url': url_for('plant.get_plant', plant_id=pair.plant_id), 'text': pair.plant_name},
+            {'url': url_for('plant.get_plant', plant_id=pair.other_plant_id), 'text': pair.other_plant_name},
+            pair.distance,
+            pair.required,
+            round(pair.shortfall, 1)
+        ])
+    return render_template(
+        'pages/geodata/plant-spacing.jinja',
+        order_list=[4, 'desc'],
+        data_rows=data_list,
+        headers=['Plant', 'Too Close To', 'Distance (mm)', 'Spacing (mm)', 'Shortfall (mm)'],
+        table_id='spacing-table'
+    ), 200
+
+
+@bp_geodata.route('/sun', methods=['GET'])
+def get_sun_exposure():
+    eng = get_app_eng()
+    stale = None
+    with eng.read_session() as session:
+        if not has_table(session, TableSunEstimate):
+            flash('Sun estimates aren\'t set up yet - run scripts/migrate_sun_estimates.py', 'warning')
+        else:
+            if not has_column(session, TableGeodata, 'height_mm'):
+                flash('Structure heights aren\'t set up yet - run scripts/migrate_structure_heights.py', 'warning')
+            stale = find_stale_locations(session, latitude=current_app.config['SUN_LATITUDE'],
+                                         map_north_bearing=current_app.config['MAP_NORTH_BEARING'])
+    if stale is not None and len(stale.rows) > 0:
+        # Only what changed since the stored estimates gets shaded, in this process & w/o a transaction open.
+        #   Re-estimating everything across every cpu is what scripts/estimate_sun.py is for
+        estimates = estimate_locations(stale, workers=1)
+        eng.unit_of_work(lambda session: save_sun_estimates(session, estimates))
+    with eng.read_session() as session:
+        sun_estimates = get_sun_estimates(session)
+    data_list = []
+    for est in sun_estimates:
+        data_list.append([
+            {'url': url_for('plant.get_plant', plant_id=est.plant_id), 'text': est.plant_name},
+            '' if est.light_requirement is None else est.light_requirement,
+            est.sun_hours,
+            {'text': est.mismatch or 'ok', 'val_class': 'zero' if est.mismatch is None else ''}
+        ])
+    return render_template(
+        'pages/geodata/sun-exposure.jinja',
+        order_list=[3, 'desc'],
+        data_rows=data_list,
+        headers=['Plant', 'Light Requirement', 'Sun Hours / Day', 'Fit'],
+        table_id='sun-table',
+        n_mismatched=len([x for x in sun_estimates if x.mismatch is not None])
+    ), 200
+
+
+@bp_geodata.route('/repair', methods=['GET', 'POST'])
+def repair_shapes():
+    eng = get_app_eng()
+    form = ConfirmActionForm()
+    if request.method == 'GET':
+        return render_template(
+            'pages/confirm.jinja',
+            confirm_title='Confirm repairing ',
+            confirm_focus='all shapes with repairable problems',
+            confirm_url=url_for('geodata.repair_shapes'),
+            form=form
+        )
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            stats = eng.unit_of_work(lambda session: repair_geodata(session, validate_all_geodata(session)))
+            flash(f'Repaired {stats["repaired"]} shapes ({stats["failed"]} could not be repaired), '
+                  f'{stats["locations_changed"]} plant locations reassigned', 'success')
+        return redirect(url_for('geodata.validate_geodata'))
+
+
+@bp_geodata.route('/import', methods=['GET', 'POST'])
+def import_geodata_file():
+    eng = get_app_eng()
+    form = ImportGeodataForm()
+    if request.method == 'GET':
+        return render_template(
+            'pages/geodata/import-geodata.jinja',
+            form=form,
+            post_endpoint_url=url_for('geodata.import_geodata_file')
         )
+    elif request.method == 'POST':
+        upload = request.files['import_file']
+        try:
+            file_format = detect_format(upload.filename)
+
+            def run_import(session) -> Dict:
+                # A replayed import reads the upload again from the top
+                upload.stream.seek(0)
+                return import_geodata(session, iter_features(upload.stream, file_format=file_format))
+
+            stats = eng.unit_of_work(run_import)
+        except ValueError as err:
+            flash(f'Import failed: {err}', 'danger')
+            return redirect(url_for('geodata.import_geodata_file'))
+        flash(f'Imported {stats["imported"]} map items ({stats["skipped"]} skipped), '
+              f'{stats["locations_changed"]} plant locations and {stats["sub_regions_changed"]} sub regions '
+              f'reassigned', 'success')
+        for reason in stats['skip_reasons']:
+            flash(f'Skipped {reason}', 'warning')
+        return redirect(url_for('geodata.get_all'))
+
+
+@bp_geodata.route('/export', methods=['GET'])
+def export_geodata():
+    """Streams all geodata (w/ plant, species & region details) as GeoJSON or, with ?format=binary, in the
+    indexed binary format"""
+    export_format = request.args.get('format', 'geojson')
+    if export_format not in EXPORT_FORMATS:
+        abort(400, f'format should be one of: {", ".join(EXPORT_FORMATS)}')
+    eng = get_app_eng()
+
+    def generate():
+        with eng.read_session() as session:
+            rows = iter_export_rows(session)
+            yield from iter_geojson(rows) if export_format == 'geojson' else iter_binary(rows)
+
+    filename = f'geodata-{datetime.date.today().isoformat()}.{EXPORT_FORMATS[export_format]["ext"]}'
+    return Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format]['mimetype'],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+@bp_geodata.route('/irrigation', methods=['GET'])
+def get_irrigation_zones():
+    eng = get_app_eng()
+    with eng.read_session() as session:
+        coverage, _ = IRRIGATION_COVERAGE.get(session)
+        plant_counts = {}
+        for zone_ids in coverage.values():
+            for zone_id in zone_ids:
+                plant_counts[zone_id] = plant_counts.get(zone_id, 0) + 1
+        data_list = []
+        zone: TableIrrigationZone
+        for zone in session.query(TableIrrigationZone).options(*IRRIGATION_ZONE_LIST_LOADERS).all():
+            data_list.append([
+                zone.zone_id,
+                zone.zone_name,
+                {'text': zone.geodata.name, 'url': url_for('geodata.edit_geodata', geo_type=zone.geodata.geodata_type,
+                                                           obj_id=zone.geodata_key)},
+                plant_counts.get(zone.zone_id, 0),
+                [
+                    {'url': url_for('geodata.delete_irrigation_zone', zone_id=zone.zone_id),
+                     'icon': 'bi-trash', 'val_class': 'icon delete'}
+                ]
+            ])
+    return render_template(
+        'pages/geodata/list-irrigation-zones.jinja',
+        order_list=[1, 'asc'],
+        data_rows=data_list,
+        headers=['ID', 'Zone Name', 'Shape', 'Plants Covered', ''],
+        table_id='irrigation-table'
+    ), 200
+
+
+@bp_geodata.route('/irrigation/add', methods=['GET', 'POST'])
+def add_irrigation_zone():
+    eng = get_app_eng()
+    form = AddIrrigationZoneForm()
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_irrigation_zone_form(session=session, form=form)
+            return render_template(
+                'pages/geodata/add-irrigation-zone.jinja',
+                form=form,
+                post_endpoint_url=url_for('geodata.add_irrigation_zone')
+            )
+    elif request.method == 'POST':
+        zone_name = request.form['zone_name']
+        eng.unit_of_work(lambda session: session.add(
+            TableIrrigationZone(zone_name=zone_name, geodata_key=int(request.form['geodata']))
+        ))
+        IRRIGATION_COVERAGE.clear()
+        flash(f'Irrigation zone "{zone_name}" successfully added', 'success')
+        return redirect(url_for('geodata.get_irrigation_zones'))
+
+
+def get_irrigation_zone(session, zone_id: int) -> TableIrrigationZone:
+    return session.query(TableIrrigationZone).filter(TableIrrigationZone.zone_id == zone_id).one_or_none()
+
+
+@bp_geodata.route('/irrigation/<int:zone_id>/delete', methods=['GET', 'POST'])
+def delete_irrigation_zone(zone_id: int):
+    eng = get_app_eng()
+    form = ConfirmDeleteForm()
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            zone = get_irrigation_zone(session, zone_id)
+            return render_template(
+                'pages/confirm.jinja',
+                confirm_title='Confirm delete of irrigation zone ',
+                confirm_focus=zone.zone_name,
+                confirm_url=url_for('geodata.delete_irrigation_zone', zone_id=zone_id),
+                form=form
+            )
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            def remove(session) -> str:
+                # Just the zone - its shape stays on the map as a plain other_polygon
+                zone = get_irrigation_zone(session, zone_id)
+                session.delete(zone)
+                return zone.zone_name
+
+            zone_name = eng.unit_of_work(remove)
+            IRRIGATION_COVERAGE.clear()
+            flash(f'Irrigation zone "{zone_name}" successfully removed', 'success')
+        return redirect(url_for('geodata.get_irrigation_zones'))
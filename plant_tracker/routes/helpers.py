@@ -1,30 +1,37 @@
 import time
-from typing import List
+from typing import (
+    Dict,
+    List,
+    Optional
+)
 
 from flask import (
     current_app,
+    flash,
     g,
+    get_template_attribute,
     redirect,
     request,
     make_response
 )
+from markupsafe import Markup
 from pukr import PukrLog
 
 from plant_tracker.core.db import DBAdmin
-
-
-def get_db_conn():
-    return current_app.config['db']
+from plant_tracker.core.geodata import (
+    MAP_LAYER_CACHE,
+    OVERVIEW_SCALE,
+    get_all_geodata,
+    map_version
+)
+from plant_tracker.core.validation import check_geodata
+from plant_tracker.model import GeodataType
 
 
 def get_app_eng() -> DBAdmin:
     return current_app.extensions['eng']
 
 
-def get_session():
-    return get_db_conn().session
-
-
 def get_app_logger() -> PukrLog:
     return current_app.extensions['logg']
 
@@ -65,4 +72,40 @@ def get_obj_attr_or_default(obj, attrs: List[str], default: str, layout: str = N
     if layout is None:
         return ','.join([getattr(obj, attr) for attr in attrs])
     else:
-        return layout.format(*[getattr(obj, attr) for attr in attrs])
\ No newline at end of file
+        return layout.format(*[getattr(obj, attr) for attr in attrs])
+
+
+def get_map_layers(session, focus_ids: List[int] = None, is_render_for_input: bool = False) -> Dict:
+    """Gets the template args for a map: the base layer with every item (rendered once per map version & cached)
+    and the focused items, which get drawn over it"""
+    variant = 'input' if is_render_for_input else 'static'
+    version = map_version(session)
+    base_layer = MAP_LAYER_CACHE.get(version, variant)
+    if base_layer is None:
+        map_items_builder = get_template_attribute('macros/svg.jinja', 'map_items_builder')
+        base_layer = Markup(map_items_builder(get_all_geodata(session=session, scale=OVERVIEW_SCALE),
+                                              is_render_for_input, caller=lambda: ''))
+        MAP_LAYER_CACHE.put(version, variant, base_layer)
+    return {
+        'map_base_layer': base_layer,
+        'map_points': get_all_geodata(session=session, focus_ids=focus_ids, geodata_ids=focus_ids or [])
+    }
+
+
+def check_form_geodata(session, geo_type: GeodataType, form_data, key: str = 'data') -> Optional[Dict]:
+    """Runs the inline geometry checks on a submitted shape (& a structure's height). Returns the form data with any
+    trivial fixes applied, or None after flashing the problems that need fixing by hand"""
+    data, issues = check_geodata(session, geo_type=geo_type, data=form_data[key])
+    if len(issues) > 0:
+        for issue in issues:
+            flash(f'Shape not saved - {issue.problem.replace("_", " ")}: {issue.detail}', 'danger')
+        return None
+    if geo_type == GeodataType.OTHER_POLYGON and form_data.get('height_mm') not in [None, '']:
+        try:
+            int(form_data['height_mm'])
+        except ValueError:
+            flash(f'Shape not saved - height must be a whole number of mm, not "{form_data["height_mm"]}"', 'danger')
+            return None
+    form_data = dict(form_data)
+    form_data[key] = data
+    return form_data
@@ -15,7 +15,10 @@ from plant_tracker.forms.add_image import (
     populate_image_form
 )
 from plant_tracker.forms.confirm_delete import ConfirmDeleteForm
-from plant_tracker.model import TableImage
+from plant_tracker.model import (
+    IMAGE_LIST_LOADERS,
+    TableImage
+)
 from plant_tracker.routes.helpers import (
     get_app_logger,
     get_app_eng
@@ -28,44 +31,54 @@ bp_image = Blueprint('image', __name__, url_prefix='/image')
 def add_image(item_type: str, item_id: int):
     eng = get_app_eng()
     form = AddImageForm()
-    with eng.session_mgr() as session:
-        form = populate_image_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_image_form(session=session, form=form)
             return render_template(
                 'pages/image/add-image.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint, item_type=item_type, item_id=item_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
 
-            image_dir = Path(current_app.root_path).joinpath(f'static/images/{item_type}/{item_id}/')
+        image_dir = Path(current_app.root_path).joinpath(f'static/images/{item_type}/{item_id}/')
 
-            image = get_image_data_from_form(request=request, image_dir=image_dir)
+        # The file only gets written once - the insert below may be replayed
+        image_path = get_image_data_from_form(request=request, image_dir=image_dir).image_path
+        if item_type == 'species':
+            url = url_for('species.get_species', species_id=item_id)
+        else:
+            url = url_for('plant.get_plant', plant_id=item_id)
+
+        def save(session) -> int:
+            image = TableImage(image_path=image_path)
             if item_type == 'species':
                 image.species_key = item_id
-                url = url_for('species.get_species', species_id=item_id)
             else:
                 image.plant_key = item_id
-                url = url_for('plant.get_plant', plant_id=item_id)
-            eng.commit_and_refresh_table_obj(session=session, table_obj=image)
-            flash(f'{item_type.title()} image {image.image_id} successfully added', 'success')
+            session.add(image)
+            session.flush()
+            return image.image_id
+
+        image_id = eng.unit_of_work(save)
+        flash(f'{item_type.title()} image {image_id} successfully added', 'success')
 
-            return redirect(url)
+        return redirect(url)
 
 
 @bp_image.route('/all', methods=['GET'])
 @bp_image.route('/by_<item_type>/<int:item_id>/all', methods=['GET'])
 def get_all_images(item_type: str = None, item_id: int = None):
-    with get_app_eng().session_mgr() as session:
+    with get_app_eng().read_session() as session:
         if item_id:
             if item_type == 'species':
                 id_filt = TableImage.species_key == item_id
             else:
                 id_filt = TableImage.plant_key == item_id
-            imgs = session.query(TableImage).filter(id_filt).all()
+            imgs = session.query(TableImage).options(*IMAGE_LIST_LOADERS).filter(id_filt).all()
         else:
-            imgs = session.query(TableImage).all()
+            imgs = session.query(TableImage).options(*IMAGE_LIST_LOADERS).all()
         data_list = []
         for img in imgs:
             img: TableImage
@@ -89,21 +102,25 @@ def get_all_images(item_type: str = None, item_id: int = None):
     ), 200
 
 
+def get_image(session, image_id: int) -> TableImage:
+    return session.query(TableImage).filter(TableImage.image_id == image_id).one_or_none()
+
+
 @bp_image.route('/<item_type>/<int:item_id>/delete', methods=['GET', 'POST'])
 def delete_image(item_type: str, item_id: int):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        img: TableImage
-
-        img = session.query(TableImage).filter(TableImage.image_id == item_id).one_or_none()
-        if item_type == 'species':
-            url = url_for('species.get_species', species_id=item_id)
-            qualifier = f'({item_type}:{img.species.common_name})'
-        else:
-            url = url_for('plant.get_plant', plant_id=item_id)
-            qualifier = f'({item_type}:{img.plant.species.common_name}#{img.plant_key})'
-        if request.method == 'GET':
+    if item_type == 'species':
+        url = url_for('species.get_species', species_id=item_id)
+    else:
+        url = url_for('plant.get_plant', plant_id=item_id)
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            img = get_image(session, item_id)
+            if item_type == 'species':
+                qualifier = f'({item_type}:{img.species.common_name})'
+            else:
+                qualifier = f'({item_type}:{img.plant.species.common_name}#{img.plant_key})'
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -111,8 +128,8 @@ def delete_image(item_type: str, item_id: int):
                 confirm_url=url_for('image.delete_image', item_type=item_type, item_id=item_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
-                session.delete(img)
-                flash(f'Image item #{img.image_id} successfully removed', 'success')
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            eng.unit_of_work(lambda session: session.delete(get_image(session, item_id)))
+            flash(f'Image item #{item_id} successfully removed', 'success')
         return redirect(url)
@@ -6,6 +6,7 @@ from flask import (
 )
 import pandas as pd
 
+from plant_tracker.core.retry import RETRY_STATS
 from plant_tracker.model import (
     TablePlant,
     TablePlantHabit,
@@ -25,7 +26,7 @@ bp_main = Blueprint('main', __name__)
 @bp_main.route('/home', methods=['GET'])
 def index():
     eng = get_app_eng()
-    with eng.session_mgr() as session:
+    with eng.read_session() as session:
         species_df = pd.read_sql(session.query(TableSpecies, TablePlantHabit.plant_habit).outerjoin(TablePlantHabit, TableSpecies.habit_key == TablePlantHabit.plant_habit_id).statement, session.connection())
         plants_df = pd.read_sql(session.query(TablePlant).statement, session.connection())
         mega_df = pd.merge(species_df, plants_df, left_on='species_id', right_on='species_key', how='left')
@@ -68,5 +69,7 @@ def index():
 def get_app_info():
     return jsonify({
         'app_name': current_app.name,
-        'version': current_app.config.get('VERSION')
+        'version': current_app.config.get('VERSION'),
+        # Replayed write transactions, for this worker process
+        'db_retries': RETRY_STATS.snapshot()
     }), 200
@@ -27,33 +27,36 @@ bp_maint = Blueprint('maintenance', __name__,
 def add_maintenance(plant_id: int = None):
     eng = get_app_eng()
     form = AddMaintenanceForm()
-    with eng.session_mgr() as session:
-        form = populate_maintenance_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_maintenance_form(session=session, form=form)
             return render_template(
                 'pages/maintenance/add-maintenance.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> int:
             maint = get_maintenance_data_from_form(session=session, form_data=request.form)
             maint.plant_key = plant_id
             session.add(maint)
-            session.commit()
-            session.refresh(maint)
-            flash(f'Maintenance item #{maint.maintenance_log_id} successfully added', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant_id))
+            session.flush()
+            return maint.maintenance_log_id
+
+        maintenance_log_id = eng.unit_of_work(save)
+        flash(f'Maintenance item #{maintenance_log_id} successfully added', 'success')
+        return redirect(url_for('plant.get_plant', plant_id=plant_id))
 
 
 @bp_maint.route('/<int:maintenance_log_id>/edit', methods=['GET', 'POST'])
 def edit_maintenance(plant_id: int = None, maintenance_log_id: int = None):
     eng = get_app_eng()
     form = AddMaintenanceForm()
-    with eng.session_mgr() as session:
-        form = populate_maintenance_form(session=session, form=form,
-                                         maintenance_log_id=maintenance_log_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_maintenance_form(session=session, form=form,
+                                             maintenance_log_id=maintenance_log_id)
             return render_template(
                 'pages/maintenance/add-maintenance.jinja',
                 form=form,
@@ -61,24 +64,30 @@ def edit_maintenance(plant_id: int = None, maintenance_log_id: int = None):
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id,
                                           maintenance_log_id=maintenance_log_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session):
             maint = get_maintenance_data_from_form(
                 session=session, form_data=request.form, maintenance_log_id=maintenance_log_id
             )
             session.add(maint)
-            flash(f'Maintenance item #{maint.maintenance_log_id} successfully updated', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant_id))
+
+        eng.unit_of_work(save)
+        flash(f'Maintenance item #{maintenance_log_id} successfully updated', 'success')
+        return redirect(url_for('plant.get_plant', plant_id=plant_id))
+
+
+def get_maintenance(session, maintenance_log_id: int) -> TableMaintenanceLog:
+    return session.query(TableMaintenanceLog). \
+        filter(TableMaintenanceLog.maintenance_log_id == maintenance_log_id).one_or_none()
 
 
 @bp_maint.route('/<int:maintenance_log_id>/delete', methods=['GET', 'POST'])
 def delete_maintenance(plant_id: int = None, maintenance_log_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        maint: TableMaintenanceLog
-        maint = session.query(TableMaintenanceLog). \
-            filter(TableMaintenanceLog.maintenance_log_id == maintenance_log_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            maint = get_maintenance(session, maintenance_log_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -87,8 +96,8 @@ def delete_maintenance(plant_id: int = None, maintenance_log_id: int = None):
                                     plant_id=plant_id, maintenance_log_id=maintenance_log_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
-                session.delete(maint)
-                flash(f'Maintenance item #{maint.maintenance_log_id} successfully removed', 'success')
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            eng.unit_of_work(lambda session: session.delete(get_maintenance(session, maintenance_log_id)))
+            flash(f'Maintenance item #{maintenance_log_id} successfully removed', 'success')
         return redirect(url_for('plant.get_plant', plant_id=plant_id))
@@ -26,31 +26,36 @@ bp_obs = Blueprint('observation', __name__, url_prefix='/plant/<int:plant_id>/ob
 def add_observation(plant_id: int = None):
     eng = get_app_eng()
     form = AddObservationForm()
-    with eng.session_mgr() as session:
-        form = populate_observation_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_observation_form(session=session, form=form)
             return render_template(
                 'pages/observation/add-observation.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> int:
             obs = get_observation_data_from_form(session=session, form_data=request.form)
             obs.plant_key = plant_id
-            obs = eng.commit_and_refresh_table_obj(session=session, table_obj=obs)
-            flash(f'Observation item #{obs.observation_log_id} successfully added', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant_id))
+            session.add(obs)
+            session.flush()
+            return obs.observation_log_id
+
+        observation_log_id = eng.unit_of_work(save)
+        flash(f'Observation item #{observation_log_id} successfully added', 'success')
+        return redirect(url_for('plant.get_plant', plant_id=plant_id))
 
 
 @bp_obs.route('/<int:observation_log_id>/edit', methods=['GET', 'POST'])
 def edit_observation(plant_id: int = None, observation_log_id: int = None):
     eng = get_app_eng()
     form = AddObservationForm()
-    with eng.session_mgr() as session:
-        form = populate_observation_form(session=session, form=form,
-                                         observation_log_id=observation_log_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_observation_form(session=session, form=form,
+                                             observation_log_id=observation_log_id)
             return render_template(
                 'pages/observation/add-observation.jinja',
                 form=form,
@@ -58,24 +63,30 @@ def edit_observation(plant_id: int = None, observation_log_id: int = None):
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id,
                                           observation_log_id=observation_log_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session):
             obs = get_observation_data_from_form(
                 session=session, form_data=request.form, observation_log_id=observation_log_id
             )
             session.add(obs)
-            flash(f'Observation item #{obs.observation_log_id} successfully updated', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant_id))
+
+        eng.unit_of_work(save)
+        flash(f'Observation item #{observation_log_id} successfully updated', 'success')
+        return redirect(url_for('plant.get_plant', plant_id=plant_id))
+
+
+def get_observation(session, observation_log_id: int) -> TableObservationLog:
+    return session.query(TableObservationLog). \
+        filter(TableObservationLog.observation_log_id == observation_log_id).one_or_none()
 
 
 @bp_obs.route('/<int:observation_log_id>/delete', methods=['GET', 'POST'])
 def delete_observation(plant_id: int = None, observation_log_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        obs: TableObservationLog
-        obs = session.query(TableObservationLog). \
-            filter(TableObservationLog.observation_log_id == observation_log_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            obs = get_observation(session, observation_log_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -84,8 +95,8 @@ def delete_observation(plant_id: int = None, observation_log_id: int = None):
                                     plant_id=plant_id, observation_log_id=observation_log_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
-                session.delete(obs)
-                flash(f'Observation item #{obs.observation_log_id} successfully removed', 'success')
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            eng.unit_of_work(lambda session: session.delete(get_observation(session, observation_log_id)))
+            flash(f'Observation item #{observation_log_id} successfully removed', 'success')
         return redirect(url_for('plant.get_plant', plant_id=plant_id))
@@ -1,5 +1,12 @@
+from typing import (
+    Dict,
+    Optional,
+    Tuple
+)
+
 from flask import (
     Blueprint,
+    abort,
     flash,
     redirect,
     render_template,
@@ -12,10 +19,13 @@ from sqlalchemy.sql import (
     not_
 )
 
+from plant_tracker.core.details import load_plant_detail
 from plant_tracker.core.utils import default_if_prop_none
 from plant_tracker.core.geodata import (
+    close_geodata_history,
+    get_irrigation_zones_for,
     process_gdata_and_assign_location,
-    get_all_geodata
+    invalidate_geodata_cache
 )
 from plant_tracker.forms.add_plant import (
     AddPlantForm,
@@ -24,26 +34,36 @@ from plant_tracker.forms.add_plant import (
 )
 from plant_tracker.forms.confirm_delete import ConfirmDeleteForm
 from plant_tracker.model import (
+    PLANT_LIST_LOADERS,
     GeodataType,
     TablePlant,
     TablePlantLocation,
     TableSpecies
 )
 from plant_tracker.routes.helpers import (
+    check_form_geodata,
     get_app_logger,
-    get_app_eng
+    get_app_eng,
+    get_map_layers
 )
 
 bp_plant = Blueprint('plant', __name__, url_prefix='/plant')
 
 
+def check_plant_geodata(session, form_data) -> Optional[Dict]:
+    gtype_val = 'group' if form_data['shape_type'] == 'polygon' else form_data['shape_type']
+    return check_form_geodata(session, geo_type=GeodataType(f'plant_{gtype_val}'), form_data=form_data,
+                              key='geodata')
+
+
 @bp_plant.route('/add', methods=['GET', 'POST'])
 @bp_plant.route('/by_species/<int:species_id>/add', methods=['GET', 'POST'])
 def add_plant(species_id: int = None):
     eng = get_app_eng()
     form = AddPlantForm()
     log = get_app_logger()
-    with eng.session_mgr() as session:
+    form_data = request.form
+    with eng.read_session() as session:
         form = populate_plant_form(session=session, form=form)
         if species_id:
             species = session.query(TableSpecies).filter(TableSpecies.species_id == species_id).one_or_none()
@@ -51,45 +71,51 @@ def add_plant(species_id: int = None):
                 form.species.data = species.common_name
                 form.species.render_kw = {'disabled': ''}
 
-        if request.method == 'GET':
+        if request.method == 'POST' and request.form.get('geodata'):
+            form_data = check_plant_geodata(session, form_data=request.form)
+        if request.method == 'GET' or form_data is None:
             return render_template(
                 'pages/plant/add-plant.jinja',
                 form=form,
                 is_edit=False,
-                map_points=get_all_geodata(session=session),
+                **get_map_layers(session, is_render_for_input=True),
                 post_endpoint_url=url_for(request.endpoint, species_id=species_id)
             )
-        elif request.method == 'POST':
-            if species_id:
-                # This isn't populated in the form by default since it's pre-populated
-                request_form = dict(request.form)
-                request_form['species'] = species.common_name
-                plant = get_plant_data_from_form(session=session, form_data=request_form)
-            else:
-                plant = get_plant_data_from_form(session=session, form_data=request.form)
-            plant = eng.commit_and_refresh_table_obj(session=session, table_obj=plant)
-            if request.form.get('geodata'):
-                # Ensure geodata is updated
-                log.debug('Ensuring plant geodata is synced with database object... ')
-                gtype_val = 'group' if request.form['shape_type'] == 'polygon' else request.form['shape_type']
-                gtype = GeodataType(f'plant_{gtype_val}')
-                loc_name = f'{plant.species.common_name}#{plant.plant_id}'
 
-                if plant.plant_location is None:
-                    log.debug('Creating new PlantLocation object...')
-                    plant.plant_location = TablePlantLocation(plant_location_name=loc_name)
+    def save(session) -> Tuple[int, str]:
+        if species_id:
+            # This isn't populated in the form by default since it's pre-populated
+            request_form = dict(request.form)
+            request_form['species'] = species.common_name
+            plant = get_plant_data_from_form(session=session, form_data=request_form)
+        else:
+            plant = get_plant_data_from_form(session=session, form_data=request.form)
+        session.add(plant)
+        session.flush()
+        if request.form.get('geodata'):
+            # Ensure geodata is updated
+            log.debug('Ensuring plant geodata is synced with database object... ')
+            gtype_val = 'group' if request.form['shape_type'] == 'polygon' else request.form['shape_type']
+            gtype = GeodataType(f'plant_{gtype_val}')
+            loc_name = f'{plant.species.common_name}#{plant.plant_id}'
 
-                plant.plant_location = process_gdata_and_assign_location(
-                    session=session,
-                    table_obj=plant.plant_location,
-                    form_data=request.form,
-                    geo_type=gtype,
-                    alt_name=loc_name
-                )
-                session.add(plant)
+            if plant.plant_location is None:
+                log.debug('Creating new PlantLocation object...')
+                plant.plant_location = TablePlantLocation(plant_location_name=loc_name)
+
+            plant.plant_location = process_gdata_and_assign_location(
+                session=session,
+                table_obj=plant.plant_location,
+                form_data=form_data,
+                geo_type=gtype,
+                alt_name=loc_name
+            )
+            session.add(plant)
+        return plant.plant_id, plant.species.scientific_name
 
-            flash(f'Plant {plant.species.scientific_name} ({plant.plant_id}) successfully added', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant.plant_id))
+    plant_id, name = eng.unit_of_work(save)
+    flash(f'Plant {name} ({plant_id}) successfully added', 'success')
+    return redirect(url_for('plant.get_plant', plant_id=plant_id))
 
 
 @bp_plant.route('/<int:plant_id>/edit', methods=['GET', 'POST'])
@@ -97,63 +123,78 @@ def edit_plant(plant_id: int = None):
     eng = get_app_eng()
     form = AddPlantForm()
     log = get_app_logger()
-    with eng.session_mgr() as session:
+    form_data = request.form
+    with eng.read_session() as session:
         form = populate_plant_form(session=session, form=form, plant_id=plant_id)
         plant = session.query(TablePlant).filter(TablePlant.plant_id == plant_id).one_or_none()
         if plant.plant_location:
             focus_ids = [plant.plant_location.geodata.geodata_id]
         else:
             focus_ids = None
-        if request.method == 'GET':
+        if request.method == 'POST' and request.form.get('geodata') and not request.form.get('is_dead'):
+            form_data = check_plant_geodata(session, form_data=request.form)
+            if form_data is None:
+                form.geodata.data = request.form['geodata']
+        if request.method == 'GET' or form_data is None:
             return render_template(
                 'pages/plant/add-plant.jinja',
                 form=form,
                 is_edit=True,
-                map_points=get_all_geodata(session=session, focus_ids=focus_ids),
+                **get_map_layers(session, focus_ids=focus_ids, is_render_for_input=True),
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id)
             )
-        elif request.method == 'POST':
-            plant = get_plant_data_from_form(session=session, form_data=request.form, plant_id=plant_id)
-            if request.form.get('geodata'):
-                if plant.is_dead and plant.plant_location:
-                    # Handle process of removing any geodata
-                    log.debug('Plant is marked dead - handling removal of location data')
-                    session.delete(plant.plant_location.geodata)
-                    session.delete(plant.plant_location)
-                else:
-                    # Ensure geodata is updated
-                    log.debug('Ensuring plant geodata is synced with database object... ')
-                    gtype = GeodataType(f'plant_{request.form["shape_type"]}')
 
-                    if plant.plant_location is None:
-                        log.debug('Creating new PlantLocation object...')
-                        plant.plant_location = TablePlantLocation()
+    def save(session) -> str:
+        plant = get_plant_data_from_form(session=session, form_data=request.form, plant_id=plant_id)
+        if request.form.get('geodata'):
+            if plant.is_dead and plant.plant_location:
+                # Handle process of removing any geodata
+                log.debug('Plant is marked dead - handling removal of location data')
+                close_geodata_history(session, plant.plant_location.geodata_key)
+                invalidate_geodata_cache(plant.plant_location.geodata_key)
+                session.delete(plant.plant_location.geodata)
+                session.delete(plant.plant_location)
+            else:
+                # Ensure geodata is updated
+                log.debug('Ensuring plant geodata is synced with database object... ')
+                gtype = GeodataType(f'plant_{request.form["shape_type"]}')
 
-                    plant.plant_location = process_gdata_and_assign_location(
-                        session=session,
-                        table_obj=plant.plant_location,
-                        form_data=request.form,
-                        geo_type=gtype,
-                        alt_name=f'{plant.species.common_name}#{plant_id}'
-                    )
+                if plant.plant_location is None:
+                    log.debug('Creating new PlantLocation object...')
+                    plant.plant_location = TablePlantLocation()
 
-            session.add(plant)
-            flash(f'Plant {plant.species.scientific_name} ({plant.plant_id}) successfully updated', 'success')
-            return redirect(url_for('plant.get_all_plants'))
+                plant.plant_location = process_gdata_and_assign_location(
+                    session=session,
+                    table_obj=plant.plant_location,
+                    form_data=form_data,
+                    geo_type=gtype,
+                    alt_name=f'{plant.species.common_name}#{plant_id}'
+                )
+
+        session.add(plant)
+        return plant.species.scientific_name
+
+    name = eng.unit_of_work(save)
+    flash(f'Plant {name} ({plant_id}) successfully updated', 'success')
+    return redirect(url_for('plant.get_all_plants'))
 
 
 @bp_plant.route('/<int:plant_id>', methods=['GET'])
 def get_plant(plant_id: int):
-    with get_app_eng().session_mgr() as session:
-        plant: TablePlant
-        plant = session.query(TablePlant).filter(TablePlant.plant_id == plant_id).one_or_none()
-        if plant.plant_location:
-            map_points = get_all_geodata(session=session, focus_ids=[plant.plant_location.geodata_key])
+    with get_app_eng().read_session() as session:
+        plant = load_plant_detail(session, plant_id=plant_id)
+        if plant is None:
+            abort(404, f'Plant {plant_id} not found')
+        if plant.geodata_key is not None:
+            map_layers = get_map_layers(session, focus_ids=[plant.geodata_key])
+            irrigation_zones = get_irrigation_zones_for(session, plant.geodata_key)
         else:
-            map_points = None
+            map_layers = {'map_points': None}
+            irrigation_zones = []
         return render_template(
             'pages/plant/plant-info.jinja',
             data=plant,
+            irrigation_zones=irrigation_zones,
             observation_info={
                 'headers': ['Type', 'Rating', 'Height mm', 'Width mm', 'Date', 'Notes'],
                 'rowdata': [
@@ -186,7 +227,7 @@ def get_plant(plant_id: int):
                     ] for x in plant.watering_logs
                 ]
             },
-            map_points=map_points
+            **map_layers
         )
 
 
@@ -194,7 +235,7 @@ def get_plant(plant_id: int):
 @bp_plant.route('/by_species/<int:species_id>/all', methods=['GET'])
 @bp_plant.route('/all', methods=['GET'])
 def get_all_plants(species_id: int = None):
-    with get_app_eng().session_mgr() as session:
+    with get_app_eng().read_session() as session:
         plant_filters = []
         is_dead = False
         if species_id:
@@ -204,7 +245,7 @@ def get_all_plants(species_id: int = None):
             plant_filters.append(TablePlant.is_dead)
         else:
             plant_filters.append(not_(TablePlant.is_dead))
-        plants = session.query(TablePlant).filter(and_(*plant_filters)).all()
+        plants = session.query(TablePlant).options(*PLANT_LIST_LOADERS).filter(and_(*plant_filters)).all()
         plant_list = []
         pt: TablePlant
         for pt in plants:
@@ -235,15 +276,18 @@ def get_all_plants(species_id: int = None):
     ), 200
 
 
+def get_one_plant(session, plant_id: int) -> TablePlant:
+    return session.query(TablePlant). \
+        filter(TablePlant.plant_id == plant_id).one_or_none()
+
+
 @bp_plant.route('/<int:plant_id>/delete', methods=['GET', 'POST'])
 def delete_plant(plant_id: int):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        plant: TablePlant
-        plant = session.query(TablePlant). \
-            filter(TablePlant.plant_id == plant_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            plant = get_one_plant(session, plant_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -251,8 +295,13 @@ def delete_plant(plant_id: int):
                 confirm_url=url_for('plant.delete_plant', plant_id=plant_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            def remove(session) -> str:
+                plant = get_one_plant(session, plant_id)
                 session.delete(plant)
-                flash(f'Plant {plant.species.scientific_name} ({plant.plant_id}) successfully removed', 'success')
+                return plant.species.scientific_name
+
+            name = eng.unit_of_work(remove)
+            flash(f'Plant {name} ({plant_id}) successfully removed', 'success')
         return redirect(url_for('plant.get_all_plants'))
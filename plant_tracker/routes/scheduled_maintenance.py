@@ -27,33 +27,36 @@ bp_schmaint = Blueprint('scheduled_maintenance', __name__,
 def add_scheduled_maintenance(species_id: int = None):
     eng = get_app_eng()
     form = AddScheduledMaintenanceForm()
-    with eng.session_mgr() as session:
-        form = populate_scheduled_maintenance_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_scheduled_maintenance_form(session=session, form=form)
             return render_template(
                 'pages/scheduled-maintenance/add-scheduled-maintenance.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint, species_id=species_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> int:
             schmaint = get_scheduled_maintenance_data_from_form(session=session, form_data=request.form)
             schmaint.species_key = species_id
             session.add(schmaint)
-            session.commit()
-            session.refresh(schmaint)
-            flash(f'Scheduled maintenace #{schmaint.maintenance_schedule_id} successfully added', 'success')
-            return redirect(url_for('species.get_species', species_id=species_id))
+            session.flush()
+            return schmaint.maintenance_schedule_id
+
+        maintenance_schedule_id = eng.unit_of_work(save)
+        flash(f'Scheduled maintenace #{maintenance_schedule_id} successfully added', 'success')
+        return redirect(url_for('species.get_species', species_id=species_id))
 
 
 @bp_schmaint.route('/<int:maintenance_schedule_id>/edit', methods=['GET', 'POST'])
 def edit_scheduled_maintenance(species_id: int = None, maintenance_schedule_id: int = None):
     eng = get_app_eng()
     form = AddScheduledMaintenanceForm()
-    with eng.session_mgr() as session:
-        form = populate_scheduled_maintenance_form(session=session, form=form,
-                                                   maintenance_schedule_id=maintenance_schedule_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_scheduled_maintenance_form(session=session, form=form,
+                                                       maintenance_schedule_id=maintenance_schedule_id)
             return render_template(
                 'pages/scheduled-maintenance/add-scheduled-maintenance.jinja',
                 form=form,
@@ -61,24 +64,30 @@ def edit_scheduled_maintenance(species_id: int = None, maintenance_schedule_id:
                 post_endpoint_url=url_for(request.endpoint, species_id=species_id,
                                           maintenance_schedule_id=maintenance_schedule_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session):
             schmaint = get_scheduled_maintenance_data_from_form(
                 session=session, form_data=request.form, maintenance_schedule_id=maintenance_schedule_id
             )
             session.add(schmaint)
-            flash(f'Scheduled maintenace #{schmaint.maintenance_schedule_id} successfully updated', 'success')
-            return redirect(url_for('species.get_species', species_id=species_id))
+
+        eng.unit_of_work(save)
+        flash(f'Scheduled maintenace #{maintenance_schedule_id} successfully updated', 'success')
+        return redirect(url_for('species.get_species', species_id=species_id))
+
+
+def get_scheduled_maintenance(session, maintenance_schedule_id: int) -> TableScheduledMaintenanceLog:
+    return session.query(TableScheduledMaintenanceLog). \
+        filter(TableScheduledMaintenanceLog.maintenance_schedule_id == maintenance_schedule_id).one_or_none()
 
 
 @bp_schmaint.route('/<int:maintenance_schedule_id>/delete', methods=['GET', 'POST'])
 def delete_scheduled_maintenance(species_id: int = None, maintenance_schedule_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        schmaint: TableScheduledMaintenanceLog
-        schmaint = session.query(TableScheduledMaintenanceLog). \
-            filter(TableScheduledMaintenanceLog.maintenance_schedule_id == maintenance_schedule_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            schmaint = get_scheduled_maintenance(session, maintenance_schedule_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -87,8 +96,10 @@ def delete_scheduled_maintenance(species_id: int = None, maintenance_schedule_id
                                     species_id=species_id, maintenance_schedule_id=maintenance_schedule_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
-                session.delete(schmaint)
-                flash(f'Scheduled maintenance #{schmaint.maintenance_schedule_id} successfully removed', 'success')
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            eng.unit_of_work(
+                lambda session: session.delete(get_scheduled_maintenance(session, maintenance_schedule_id))
+            )
+            flash(f'Scheduled maintenance #{maintenance_schedule_id} successfully removed', 'success')
         return redirect(url_for('species.get_species', species_id=species_id))
@@ -1,5 +1,8 @@
+from typing import Tuple
+
 from flask import (
     Blueprint,
+    abort,
     flash,
     jsonify,
     redirect,
@@ -8,8 +11,8 @@ from flask import (
     url_for
 )
 
+from plant_tracker.core.details import load_species_detail
 from plant_tracker.core.utils import default_if_prop_none
-from plant_tracker.core.geodata import get_all_geodata
 from plant_tracker.forms.add_species import (
     AddSpeciesForm,
     get_species_data_from_form,
@@ -17,6 +20,7 @@ from plant_tracker.forms.add_species import (
 )
 from plant_tracker.forms.confirm_delete import ConfirmDeleteForm
 from plant_tracker.model import (
+    SPECIES_LIST_LOADERS,
     LeafRetentionType,
     LightRequirementType,
     SoilMoistureType,
@@ -26,6 +30,7 @@ from plant_tracker.model import (
 from plant_tracker.routes.helpers import (
     get_app_logger,
     get_app_eng,
+    get_map_layers,
 )
 
 bp_species = Blueprint('species', __name__, url_prefix='/species')
@@ -35,49 +40,57 @@ bp_species = Blueprint('species', __name__, url_prefix='/species')
 def add_species(species_id: int = None):
     eng = get_app_eng()
     form = AddSpeciesForm()
-    with eng.session_mgr() as session:
-        form = populate_species_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_species_form(session=session, form=form)
             return render_template(
                 'pages/species/add-species.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> Tuple[int, str]:
             species = get_species_data_from_form(session=session, form_data=request.form)
             session.add(species)
-            session.commit()
-            session.refresh(species)
-            flash(f'Species {species.scientific_name} successfully added', 'success')
-            return redirect(url_for('species.get_species', species_id=species.species_id))
+            session.flush()
+            return species.species_id, species.scientific_name
+
+        species_id, name = eng.unit_of_work(save)
+        flash(f'Species {name} successfully added', 'success')
+        return redirect(url_for('species.get_species', species_id=species_id))
 
 
 @bp_species.route('/<int:species_id>/edit', methods=['GET', 'POST'])
 def edit_species(species_id: int = None):
     eng = get_app_eng()
     form = AddSpeciesForm()
-    with eng.session_mgr() as session:
-        form = populate_species_form(session=session, form=form, species_id=species_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_species_form(session=session, form=form, species_id=species_id)
             return render_template(
                 'pages/species/add-species.jinja',
                 form=form,
                 is_edit=True,
                 post_endpoint_url=url_for(request.endpoint, species_id=species_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> str:
             species = get_species_data_from_form(session=session, form_data=request.form, species_id=species_id)
             session.add(species)
-            flash(f'Species {species.scientific_name} successfully updated', 'success')
-            return redirect(url_for('species.get_species', species_id=species_id))
+            return species.scientific_name
+
+        name = eng.unit_of_work(save)
+        flash(f'Species {name} successfully updated', 'success')
+        return redirect(url_for('species.get_species', species_id=species_id))
 
 
 @bp_species.route('/<int:species_id>', methods=['GET'])
 def get_species(species_id: int):
-    with (get_app_eng().session_mgr() as session):
-        species: TableSpecies
-        species = session.query(TableSpecies).filter(TableSpecies.species_id == species_id).one_or_none()
+    with get_app_eng().read_session() as session:
+        species = load_species_detail(session, species_id=species_id)
+        if species is None:
+            abort(404, f'Species {species_id} not found')
         fam_text = 'Unknown' if species.plant_family is None else (f'{species.plant_family.scientific_name} '
                                                                    f'({species.plant_family.common_name})')
         # Here, assign icon classes for data we want to attribute as an icon
@@ -127,11 +140,12 @@ def get_species(species_id: int):
 
         basic_info = {
             'Family': {'value': fam_text},
-            'Habit': {'value': default_if_prop_none(species, 'habit.plant_habit', '?')},
+            'Habit': {'value': default_if_prop_none(species, 'habit', '?')},
             'Duration': {'value': default_if_prop_none(species, 'duration', '?')},
             'Drought Tolerant':  {'value': default_if_prop_none(species, 'is_drought_tolerant', '?')},
             'Heat Tolerant': {'value': default_if_prop_none(species, 'is_heat_tolerant', '?')},
-            'Freeze Tolerant': {'value': default_if_prop_none(species, 'is_freeze_tolerant', '?')}
+            'Freeze Tolerant': {'value': default_if_prop_none(species, 'is_freeze_tolerant', '?')},
+            'Spacing': {'value': '?' if species.spacing_mm is None else f'{species.spacing_mm} mm'}
         }
         scheduled_maint_info = {
             'headers': ["Type", "Freq", "Start", "End", "Notes", ""],
@@ -154,26 +168,20 @@ def get_species(species_id: int):
                 ] for x in species.scheduled_maintenance_logs]
         }
 
-        focus_ids = []
-        for plant in species.plants:
-            if plant.plant_location:
-                focus_ids.append(plant.plant_location.geodata_key)
-        map_points = get_all_geodata(session=session, focus_ids=focus_ids)
-
         return render_template(
             'pages/species/species-info.jinja',
             data=species,
             icon_class_map=icon_class_map,
             basic_info=basic_info,
             scheduled_maint_info=scheduled_maint_info,
-            map_points=map_points
+            **get_map_layers(session, focus_ids=list(species.geodata_keys))
         )
 
 
 @bp_species.route('/all', methods=['GET'])
 def get_all_species():
-    with get_app_eng().session_mgr() as session:
-        species = session.query(TableSpecies).all()
+    with get_app_eng().read_session() as session:
+        species = session.query(TableSpecies).options(*SPECIES_LIST_LOADERS).all()
         data_list = []
         sp: TableSpecies
         for sp in species:
@@ -213,15 +221,18 @@ def get_all_species():
     ), 200
 
 
+def get_one_species(session, species_id: int) -> TableSpecies:
+    return session.query(TableSpecies). \
+        filter(TableSpecies.species_id == species_id).one_or_none()
+
+
 @bp_species.route('/<int:species_id>/delete', methods=['GET', 'POST'])
 def delete_species(species_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        species: TableSpecies
-        species = session.query(TableSpecies). \
-            filter(TableSpecies.species_id == species_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            species = get_one_species(session, species_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -229,8 +240,13 @@ def delete_species(species_id: int = None):
                 confirm_url=url_for('species.delete_species', species_id=species_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            def remove(session) -> str:
+                species = get_one_species(session, species_id)
                 session.delete(species)
-                flash(f'Species {species.scientific_name} successfully removed', 'success')
+                return species.scientific_name
+
+            name = eng.unit_of_work(remove)
+            flash(f'Species {name} successfully removed', 'success')
         return redirect(url_for('species.get_all_species'))
@@ -26,31 +26,36 @@ bp_watering = Blueprint('watering', __name__, url_prefix='/plant/<int:plant_id>/
 def add_watering(plant_id: int = None):
     eng = get_app_eng()
     form = AddWateringForm()
-    with eng.session_mgr() as session:
-        form = populate_watering_form(session=session, form=form)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_watering_form(session=session, form=form)
             return render_template(
                 'pages/watering/add-watering.jinja',
                 form=form,
                 is_edit=False,
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session) -> int:
             obs = get_watering_data_from_form(session=session, form_data=request.form)
             obs.plant_key = plant_id
-            obs = eng.commit_and_refresh_table_obj(session=session, table_obj=obs)
-            flash(f'watering item #{obs.watering_log_id} successfully added', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant_id))
+            session.add(obs)
+            session.flush()
+            return obs.watering_log_id
+
+        watering_log_id = eng.unit_of_work(save)
+        flash(f'watering item #{watering_log_id} successfully added', 'success')
+        return redirect(url_for('plant.get_plant', plant_id=plant_id))
 
 
 @bp_watering.route('/<int:watering_log_id>/edit', methods=['GET', 'POST'])
 def edit_watering(plant_id: int = None, watering_log_id: int = None):
     eng = get_app_eng()
     form = AddWateringForm()
-    with eng.session_mgr() as session:
-        form = populate_watering_form(session=session, form=form,
-                                         watering_log_id=watering_log_id)
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            form = populate_watering_form(session=session, form=form,
+                                             watering_log_id=watering_log_id)
             return render_template(
                 'pages/watering/add-watering.jinja',
                 form=form,
@@ -58,24 +63,30 @@ def edit_watering(plant_id: int = None, watering_log_id: int = None):
                 post_endpoint_url=url_for(request.endpoint, plant_id=plant_id,
                                           watering_log_id=watering_log_id)
             )
-        elif request.method == 'POST':
+    elif request.method == 'POST':
+        def save(session):
             obs = get_watering_data_from_form(
                 session=session, form_data=request.form, watering_log_id=watering_log_id
             )
             session.add(obs)
-            flash(f'watering item #{obs.watering_log_id} successfully updated', 'success')
-            return redirect(url_for('plant.get_plant', plant_id=plant_id))
+
+        eng.unit_of_work(save)
+        flash(f'watering item #{watering_log_id} successfully updated', 'success')
+        return redirect(url_for('plant.get_plant', plant_id=plant_id))
+
+
+def get_watering(session, watering_log_id: int) -> TableWateringLog:
+    return session.query(TableWateringLog). \
+        filter(TableWateringLog.watering_log_id == watering_log_id).one_or_none()
 
 
 @bp_watering.route('/<int:watering_log_id>/delete', methods=['GET', 'POST'])
 def delete_watering(plant_id: int = None, watering_log_id: int = None):
     eng = get_app_eng()
     form = ConfirmDeleteForm()
-    with eng.session_mgr() as session:
-        obs: TableWateringLog
-        obs = session.query(TableWateringLog). \
-            filter(TableWateringLog.watering_log_id == watering_log_id).one_or_none()
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with eng.read_session() as session:
+            obs = get_watering(session, watering_log_id)
             return render_template(
                 'pages/confirm.jinja',
                 confirm_title=f'Confirm delete of ',
@@ -84,8 +95,8 @@ def delete_watering(plant_id: int = None, watering_log_id: int = None):
                                     plant_id=plant_id, watering_log_id=watering_log_id),
                 form=form
             )
-        elif request.method == 'POST':
-            if request.form['confirm']:
-                session.delete(obs)
-                flash(f'watering item #{obs.watering_log_id} successfully removed', 'success')
+    elif request.method == 'POST':
+        if request.form['confirm']:
+            eng.unit_of_work(lambda session: session.delete(get_watering(session, watering_log_id)))
+            flash(f'watering item #{watering_log_id} successfully removed', 'success')
         return redirect(url_for('plant.get_plant', plant_id=plant_id))
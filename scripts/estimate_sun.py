@@ -0,0 +1,44 @@
+"""Estimates hours of direct sun for every plant from the shade of structures (other polygons w/ a height)
+and lists the plants getting a different amount of light than their species wants.
+Only plant locations whose shape (or the structures) changed since their stored estimate get shaded again
+unless --full is given."""
+import argparse
+import time
+
+from pukr import get_logger
+
+from plant_tracker.config import DevelopmentConfig
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.sun_exposure import (
+    estimate_locations,
+    find_stale_locations,
+    get_sun_estimates,
+    save_sun_estimates
+)
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--latitude', type=float, default=DevelopmentConfig.SUN_LATITUDE)
+parser.add_argument('--north-bearing', type=float, default=DevelopmentConfig.MAP_NORTH_BEARING,
+                    help='Compass bearing of the map\'s "up", in degrees')
+parser.add_argument('--workers', type=int, default=None, help='Shading processes (default: one per cpu)')
+parser.add_argument('--full', action='store_true', help='Re-estimate every plant location')
+args = parser.parse_args()
+
+log = get_logger('estimate_sun', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+start = time.perf_counter()
+with db.read_session() as session:
+    stale = find_stale_locations(session, latitude=args.latitude, map_north_bearing=args.north_bearing,
+                                 full=args.full)
+log.debug(f'Shading {len(stale.rows)} plant locations...')
+# No transaction is held open while shading
+estimates = estimate_locations(stale, workers=args.workers)
+n_saved = db.unit_of_work(lambda session: save_sun_estimates(session, estimates))
+with db.read_session() as session:
+    sun_estimates = get_sun_estimates(session)
+mismatched = [x for x in sun_estimates if x.mismatch is not None]
+for est in mismatched:
+    log.info(f'{est.plant_name}: {est.sun_hours:.1f}h of sun for {est.light_requirement} - {est.mismatch}')
+log.info(f'Estimated sun for {n_saved} plant locations in {time.perf_counter() - start:.1f}s. '
+         f'{len(mismatched)} of {len(sun_estimates)} plants mismatched')
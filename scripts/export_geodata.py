@@ -0,0 +1,33 @@
+"""Exports all geodata (w/ plant, species & region details) as GeoJSON or the indexed binary format,
+streamed from the database so memory use stays flat however many features there are"""
+import argparse
+import pathlib
+
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.geodata_export import (
+    EXPORT_FORMATS,
+    iter_export_rows,
+    iter_geojson,
+    write_binary
+)
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('path', type=pathlib.Path)
+parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='geojson')
+args = parser.parse_args()
+
+log = get_logger('export_geodata', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+with db.session_mgr() as session:
+    rows = iter_export_rows(session)
+    if args.format == 'geojson':
+        with args.path.open('w') as f:
+            f.writelines(iter_geojson(rows))
+    else:
+        with args.path.open('wb') as f:
+            write_binary(rows, f)
+
+log.info(f'Exported geodata to {args.path}')
@@ -0,0 +1,29 @@
+"""Bulk imports map items from a GeoJSON FeatureCollection or KML file (coordinates in map mm).
+Each feature's type comes from its `geodata_type` property; regions & sub regions get assigned afterward."""
+import argparse
+import pathlib
+
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.geodata_import import (
+    detect_format,
+    import_geodata,
+    iter_features
+)
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('path', type=pathlib.Path)
+parser.add_argument('--format', choices=['geojson', 'kml'], default=None, help='Default: from the file extension')
+args = parser.parse_args()
+
+log = get_logger('import_geodata', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+with args.path.open('rb') as f, db.session_mgr() as session:
+    stats = import_geodata(session, iter_features(f, file_format=args.format or detect_format(args.path.name)))
+
+for reason in stats['skip_reasons']:
+    log.warning(f'Skipped {reason}')
+log.info(f'Imported {stats["imported"]} map items ({stats["skipped"]} skipped). Reassigned '
+         f'{stats["locations_changed"]} plant locations and {stats["sub_regions_changed"]} sub regions.')
@@ -0,0 +1,9 @@
+"""Adds the native PostGIS geometry column to geodata, filled from the existing text data"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+
+log = get_logger('migrate_geodata_geom', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+db.migrate_geodata_geom()
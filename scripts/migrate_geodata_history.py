@@ -0,0 +1,9 @@
+"""Adds the geodata history table (for /geodata/map?as_of=...), seeded with the current state of all geodata"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+
+log = get_logger('migrate_geodata_history', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+db.migrate_geodata_history()
@@ -0,0 +1,9 @@
+"""Adds the irrigation zone table (zones are drawn as other_polygon map items & set up under /geodata/irrigation)"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+
+log = get_logger('migrate_irrigation_zones', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+db.migrate_irrigation_zones()
@@ -0,0 +1,9 @@
+"""Adds the species spacing column (recommended distance between plants, used by /geodata/spacing)"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+
+log = get_logger('migrate_species_spacing', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+db.migrate_species_spacing()
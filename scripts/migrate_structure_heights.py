@@ -0,0 +1,9 @@
+"""Adds the geodata height column (set on other_polygon structures so they cast shade, see /geodata/sun)"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+
+log = get_logger('migrate_structure_heights', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+db.migrate_structure_heights()
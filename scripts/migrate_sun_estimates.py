@@ -0,0 +1,9 @@
+"""Adds the sun estimate table (hours of sun per plant location, filled by scripts/estimate_sun.py & /geodata/sun)"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+
+log = get_logger('migrate_sun_estimates', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+db.migrate_sun_estimates()
@@ -0,0 +1,14 @@
+"""Recomputes region & sub-region keys for all plant locations, e.g., after a boundary was redrawn"""
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.location_assignment import reassign_plant_locations
+
+log = get_logger('reassign_locations', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+with db.session_mgr() as session:
+    stats = reassign_plant_locations(session)
+
+log.info(f'Checked {stats["locations_checked"]} plant locations. Changed {stats["locations_changed"]} plant '
+         f'locations and {stats["sub_regions_changed"]} sub regions.')
@@ -0,0 +1,37 @@
+"""Renders the garden map into a PNG tile pyramid (z/x/y), served under /geodata/tiles.
+Only tiles touched by changed geodata get redrawn unless --full is given. Needs the `tiles` extra (Pillow)."""
+import argparse
+import pathlib
+
+from pukr import get_logger
+
+from plant_tracker.config import (
+    DevelopmentConfig,
+    ProductionConfig
+)
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.tile_render import render_tiles
+from plant_tracker.core.tiles import DEFAULT_MAX_ZOOM
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--max-zoom', type=int, default=DEFAULT_MAX_ZOOM)
+parser.add_argument('--workers', type=int, default=None, help='Render processes (default: one per cpu)')
+parser.add_argument('--full', action='store_true', help='Redraw every tile')
+parser.add_argument('--env', choices=['dev', 'prod'], default='dev', help='Database & config to render from')
+parser.add_argument('--tile-dir', type=pathlib.Path, default=None,
+                    help="Where to write the tiles (default: the environment's TILE_DIR)")
+args = parser.parse_args()
+
+# Same pick DBAdmin makes for the database
+conf = ProductionConfig if args.env == 'prod' else DevelopmentConfig
+tile_dir = conf.TILE_DIR if args.tile_dir is None else args.tile_dir
+tile_dir.mkdir(parents=True, exist_ok=True)
+
+log = get_logger('render_tiles', base_level='DEBUG')
+db = DBAdmin(log, env=args.env, tables=[])
+
+with db.session_mgr() as session:
+    stats = render_tiles(session, tile_dir=tile_dir, max_zoom=args.max_zoom, workers=args.workers, full=args.full)
+
+log.info(f'{stats["items_changed"]} geodata items changed. Rendered {stats["tiles_rendered"]} of '
+         f'{stats["tiles_checked"]} affected tiles into {tile_dir}')
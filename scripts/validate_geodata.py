@@ -0,0 +1,29 @@
+"""Checks every stored shape for problems (self-intersections, too few points, sub regions escaping their region...)
+and, with --repair, fixes the ones that can be fixed automatically"""
+import argparse
+
+from pukr import get_logger
+
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.validation import (
+    repair_geodata,
+    validate_all_geodata
+)
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--repair', action='store_true', help='Repair all shapes with repairable problems')
+args = parser.parse_args()
+
+log = get_logger('validate_geodata', base_level='DEBUG')
+db = DBAdmin(log, tables=[])
+
+with db.session_mgr() as session:
+    issues = validate_all_geodata(session)
+    for issue in issues:
+        log.info(f'[{issue.gid}] {issue.name} ({issue.geo_type}): {issue.problem} - {issue.detail}'
+                 f'{"" if issue.is_repairable else " (needs fixing by hand)"}')
+    log.info(f'Found {len(issues)} problems across {len({x.gid for x in issues})} shapes')
+    if args.repair and len(issues) > 0:
+        stats = repair_geodata(session, issues)
+        log.info(f'Repaired {stats["repaired"]} shapes ({stats["failed"]} could not be repaired). '
+                 f'Reassigned {stats["locations_changed"]} plant locations.')
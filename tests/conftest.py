@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import (
+    create_engine,
+    event
+)
+from sqlalchemy.orm import sessionmaker
+
+from plant_tracker.core import location_assignment
+from plant_tracker.core.geodata import (
+    GEOMETRY_CACHE,
+    MAP_LAYER_CACHE,
+    POSTGIS_STATUS,
+    REGION_INDEX,
+    GeodataIndexCache
+)
+from plant_tracker.core.utils import COLUMN_STATUS
+from plant_tracker.model import Base
+
+
+def _sqlite_connect(dbapi_conn, conn_record):
+    # The models live in the 'app' schema
+    dbapi_conn.execute("ATTACH DATABASE ':memory:' AS app")
+    # GeoAlchemy registers geodata.geom w/ SpatiaLite after creating the table; there's no SpatiaLite here,
+    #   and nothing reads geom off PostGIS anyway
+    dbapi_conn.create_function('RecoverGeometryColumn', 5, lambda *args: 1)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A session on a fresh in-memory database, w/ the process-level geodata & schema caches emptied"""
+    for cache in [GEOMETRY_CACHE, MAP_LAYER_CACHE, REGION_INDEX]:
+        cache.clear()
+    POSTGIS_STATUS.clear()
+    COLUMN_STATUS.clear()
+    monkeypatch.setattr('plant_tracker.core.geodata.GEODATA_INDEX', GeodataIndexCache())
+    monkeypatch.setattr(location_assignment, 'PLANT_ANCHOR_INDEX', location_assignment.PlantAnchorIndex())
+
+    eng = create_engine('sqlite://')
+    event.listen(eng, 'connect', _sqlite_connect)
+    Base.metadata.create_all(eng)
+    session = sessionmaker(bind=eng)()
+    try:
+        yield session
+    finally:
+        session.close()
+        eng.dispose()
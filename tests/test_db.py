@@ -0,0 +1,52 @@
+import logging
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata
+)
+
+
+@pytest.fixture
+def eng(session, monkeypatch):
+    """A DBAdmin on the test database, w/o loading any config"""
+    db = DBAdmin.__new__(DBAdmin)
+    db.log = logging.getLogger(__name__)
+    db.eng = session.get_bind()
+    db.session = sessionmaker(bind=db.eng)
+    # SQLite only knows its own isolation levels; its default (no dirty reads) is the nearest to READ COMMITTED
+    monkeypatch.setattr(db.eng.dialect, '_isolation_lookup', {**db.eng.dialect._isolation_lookup, 'READ COMMITTED': 0})
+    return db
+
+
+def _add_bench(session) -> int:
+    bench = TableGeodata(geodata_type=GeodataType.OTHER_POINT, name='bench', is_polygon=False, data='0,0,10')
+    session.add(bench)
+    session.commit()
+    return bench.geodata_id
+
+
+def test_read_session_asks_for_a_read_only_transaction(eng):
+    with eng.read_session() as session:
+        options = session.connection().get_execution_options()
+        assert options['isolation_level'] == 'READ COMMITTED'
+        assert options['postgresql_readonly'] is True
+
+
+def test_read_session_never_writes(session, eng):
+    gid = _add_bench(session)
+
+    with eng.read_session() as read_session:
+        bench = read_session.get(TableGeodata, gid)
+        assert bench.name == 'bench'
+        bench.name = 'moved'
+        read_session.add(TableGeodata(geodata_type=GeodataType.OTHER_POINT, name='stool', is_polygon=False,
+                                      data='5,5,10'))
+        # Nothing gets flushed on the way to a query
+        assert read_session.query(TableGeodata.name).all() == [('bench', )]
+
+    with eng.session_mgr() as write_session:
+        assert write_session.query(TableGeodata.name).all() == [('bench', )]
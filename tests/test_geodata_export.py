@@ -0,0 +1,66 @@
+import io
+import json
+
+import shapely
+
+from plant_tracker.core.geodata_export import (
+    iter_export_rows,
+    iter_geojson,
+    search_binary,
+    write_binary
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TablePlantLocation,
+    TablePlantRegion
+)
+
+
+def _build_grid(session, n: int = 10):
+    """A region w/ an n x n grid of plant locations 100mm apart"""
+    session.add(TablePlantRegion(region_name='front', geodata=TableGeodata(
+        geodata_type=GeodataType.REGION, name='front', is_polygon=True,
+        data=f'-50,-50\n{n * 100},-50\n{n * 100},{n * 100}\n-50,{n * 100}')))
+    session.add_all([
+        TablePlantLocation(plant_location_name=f'{i},{j}', geodata=TableGeodata(
+            geodata_type=GeodataType.PLANT_POINT, name=f'{i},{j}', is_polygon=False, data=f'{i * 100},{j * 100},10'))
+        for i in range(n) for j in range(n)
+    ])
+    session.commit()
+
+
+def test_geojson_export_round_trip(session):
+    _build_grid(session, n=3)
+
+    features = json.loads(''.join(iter_geojson(iter_export_rows(session, batch_size=4))))['features']
+
+    assert len(features) == 10
+    region = features[0]
+    assert region['geometry']['coordinates'][0][0] == region['geometry']['coordinates'][0][-1]
+    assert region['properties']['region_name'] == 'front'
+    points = {x['properties']['name']: x for x in features[1:]}
+    assert points['2,1']['geometry'] == {'type': 'Point', 'coordinates': [200, 100]}
+    assert points['2,1']['properties']['r'] == 10
+    assert points['2,1']['properties']['geodata_type'] == str(GeodataType.PLANT_POINT)
+
+
+def test_binary_search_matches_a_full_scan(session):
+    _build_grid(session)
+    f = io.BytesIO()
+    # Small nodes, so the index is a few levels deep
+    assert write_binary(iter_export_rows(session), f, node_size=4) == 101
+
+    f.seek(0)
+    everything = list(search_binary(f))
+    assert len(everything) == 101
+    assert {x[1]['name'] for x in everything[1:]} == {f'{i},{j}' for i in range(10) for j in range(10)}
+
+    bbox = (150, 250, 420, 450)
+    expected = {x[1]['geodata_id'] for x in everything
+                if shapely.from_wkb(x[0]).buffer(x[1]['r'] or 0).intersects(shapely.box(*bbox))}
+    f.seek(0)
+    found = {x[1]['geodata_id'] for x in search_binary(f, bbox)}
+    # The region & the 3x2 plants inside the box
+    assert found == expected
+    assert len(found) == 7
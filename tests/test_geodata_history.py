@@ -0,0 +1,82 @@
+import datetime
+
+from plant_tracker.core.geodata import (
+    get_geodata_as_of,
+    history_valid_at,
+    record_geodata_version
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TableGeodataHistory
+)
+
+MARCH = datetime.datetime(2026, 3, 1)
+APRIL = datetime.datetime(2026, 4, 1)
+
+
+def _version(gid: int, data: str, valid_from: datetime.datetime, valid_to: datetime.datetime = None) -> \
+        TableGeodataHistory:
+    return TableGeodataHistory(geodata_key=gid, geodata_type=GeodataType.PLANT_POINT, name=f'plant {gid}',
+                               is_polygon=False, data=data, valid_from=valid_from, valid_to=valid_to)
+
+
+def _build_history(session):
+    session.add_all([
+        # Moved on April 1st
+        _version(1, '0,0,10', MARCH, APRIL),
+        _version(1, '500,0,10', APRIL),
+        # Removed on April 1st
+        _version(2, '100,100,10', MARCH, APRIL),
+        # Planted on April 1st
+        _version(3, '0,0,5', APRIL),
+    ])
+    session.commit()
+
+
+def _valid_at(session, as_of: datetime.datetime):
+    return session.query(TableGeodataHistory.geodata_key, TableGeodataHistory.data)\
+        .filter(history_valid_at(session, as_of)).order_by(TableGeodataHistory.geodata_key.asc()).all()
+
+
+def test_history_valid_at_picks_the_version_in_effect(session):
+    _build_history(session)
+
+    assert _valid_at(session, MARCH - datetime.timedelta(seconds=1)) == []
+    assert _valid_at(session, MARCH) == [(1, '0,0,10'), (2, '100,100,10')]
+    # Ranges are half open, so the edit's timestamp already sees the new version
+    assert _valid_at(session, APRIL - datetime.timedelta(seconds=1)) == [(1, '0,0,10'), (2, '100,100,10')]
+    assert _valid_at(session, APRIL) == [(1, '500,0,10'), (3, '0,0,5')]
+
+
+def test_map_as_of_draws_each_item_as_it_was(session):
+    _build_history(session)
+
+    def plants_as_of(as_of: datetime.datetime):
+        return [(x['gid'], x['x'], x['y'], x['r']) for x in get_geodata_as_of(session, as_of)[GeodataType.PLANT_POINT]]
+
+    assert plants_as_of(datetime.datetime(2026, 3, 15)) == [(1, 0, 0, 10), (2, 100, 100, 10)]
+    assert plants_as_of(datetime.datetime(2026, 5, 1)) == [(1, 500, 0, 10), (3, 0, 0, 5)]
+    assert get_geodata_as_of(session, datetime.datetime(2026, 5, 1))[GeodataType.REGION] == []
+
+
+def test_only_changed_saves_add_a_version(session):
+    geo = TableGeodata(geodata_type=GeodataType.OTHER_POINT, name='bench', is_polygon=False, data='0,0,10')
+    session.add(geo)
+    session.flush()
+    record_geodata_version(session, geo)
+    session.commit()
+
+    # Saving the same shape again is a no-op
+    record_geodata_version(session, geo)
+    session.commit()
+    assert session.query(TableGeodataHistory).count() == 1
+
+    geo.data = '50,0,10'
+    record_geodata_version(session, geo)
+    session.commit()
+    versions = session.query(TableGeodataHistory.data, TableGeodataHistory.valid_to)\
+        .order_by(TableGeodataHistory.history_id.asc()).all()
+    assert [x[0] for x in versions] == ['0,0,10', '50,0,10']
+    assert versions[0][1] is not None
+    assert versions[1][1] is None
@@ -0,0 +1,76 @@
+import io
+import json
+
+from plant_tracker.core.geodata import DEFAULT_POINT_RADIUS
+from plant_tracker.core.geodata_import import (
+    import_geodata,
+    iter_features
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TableGeodataHistory,
+    TablePlantLocation,
+    TablePlantRegion
+)
+
+
+def _feature(shape_type: str, coords, **properties):
+    return {'type': 'Feature', 'properties': properties, 'geometry': {'type': shape_type, 'coordinates': coords}}
+
+
+GEOJSON = {
+    'type': 'FeatureCollection',
+    'features': [
+        _feature('Polygon', [[[0, 0], [1000, 0], [1000, 1000], [0, 1000], [0, 0]]], name='front', type='region'),
+        _feature('Point', [500, 500], name='winecup', type='plant_point', r=50),
+        # Bowtie
+        _feature('Polygon', [[[0, 0], [10, 10], [10, 0], [0, 10], [0, 0]]], name='tangle'),
+        _feature('LineString', [[0, 0], [10, 10]], name='fence'),
+        _feature('Point', [1, 1], name='squashed', type='region'),
+        _feature('Point', [2000, 2000], name='bench', radius=0),
+    ]
+}
+
+KML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+  <Placemark><name>bed</name><ExtendedData><Data name="type"><value>sub_region</value></Data></ExtendedData>
+    <Polygon><outerBoundaryIs><LinearRing>
+      <coordinates>0,0 100,0 100,100 0,100 0,0</coordinates>
+    </LinearRing></outerBoundaryIs></Polygon>
+  </Placemark>
+  <Placemark><name>sliver</name>
+    <Polygon><outerBoundaryIs><LinearRing><coordinates>0,0 10,0 0,0</coordinates></LinearRing></outerBoundaryIs></Polygon>
+  </Placemark>
+  <Placemark><name>nowhere</name></Placemark>
+</Document></kml>"""
+
+
+def test_geojson_import_skips_bad_features(session):
+    f = io.BytesIO(json.dumps(GEOJSON).encode('utf-8'))
+
+    stats = import_geodata(session, iter_features(f, 'geojson'), batch_size=2)
+    session.commit()
+
+    assert (stats['imported'], stats['skipped']) == (3, 3)
+    assert sorted(x.split(' ', 1)[0] for x in stats['skip_reasons']) == ['#3', '#4:', '#5:']
+    assert session.query(TableGeodata.name, TableGeodata.geodata_type).order_by(TableGeodata.geodata_id).all() == [
+        ('front', GeodataType.REGION), ('winecup', GeodataType.PLANT_POINT), ('bench', GeodataType.OTHER_POINT)]
+    assert session.query(TableGeodataHistory).count() == 3
+    # The zero radius got the default instead of skipping the point
+    assert session.query(TableGeodata.data).filter(TableGeodata.name == 'bench').scalar() == \
+        f'2000.0,2000.0,{DEFAULT_POINT_RADIUS}'
+    # & the new location was placed in the new region
+    location = session.query(TablePlantLocation).one()
+    assert location.plant_location_name == 'winecup'
+    assert location.region_key == session.query(TablePlantRegion.region_id).scalar()
+    assert stats['locations_changed'] == 1
+
+
+def test_kml_import_skips_bad_placemarks(session):
+    stats = import_geodata(session, iter_features(io.BytesIO(KML), 'kml'))
+    session.commit()
+
+    assert (stats['imported'], stats['skipped']) == (1, 2)
+    assert session.query(TableGeodata.name, TableGeodata.geodata_type, TableGeodata.data).one() == \
+        ('bed', GeodataType.SUB_REGION, '0.0,0.0\n100.0,0.0\n100.0,100.0\n0.0,100.0')
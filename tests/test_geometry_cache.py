@@ -0,0 +1,48 @@
+import datetime
+
+from plant_tracker.core.geodata import (
+    GeometryCache,
+    ParsedGeodata
+)
+
+
+def _parsed(name: str) -> ParsedGeodata:
+    return ParsedGeodata(json={'name': name}, lod_points={})
+
+
+def test_geometry_cache_is_keyed_by_update_date():
+    cache = GeometryCache()
+    first, second = datetime.datetime(2026, 1, 1), datetime.datetime(2026, 1, 2)
+    cache.put(1, first, _parsed('old'))
+
+    assert cache.get(1, first).json == {'name': 'old'}
+    assert cache.get(1, second) is None
+
+    # A newer version replaces the old one rather than sitting next to it
+    cache.put(1, second, _parsed('new'))
+    assert len(cache) == 1
+    assert cache.get(1, first) is None
+    assert cache.get(1, second).json == {'name': 'new'}
+
+    cache.invalidate(1)
+    assert len(cache) == 0
+
+
+def test_geometry_cache_evicts_least_recently_used():
+    cache = GeometryCache(max_size=2)
+    when = datetime.datetime(2026, 1, 1)
+    cache.put(1, when, _parsed('a'))
+    cache.put(2, when, _parsed('b'))
+    # Reading 1 makes 2 the oldest
+    cache.get(1, when)
+    cache.put(3, when, _parsed('c'))
+
+    assert len(cache) == 2
+    assert cache.get(2, when) is None
+    assert cache.get(1, when) is not None
+    assert cache.get(3, when) is not None
+
+    # An evicted id can be cached again (& invalidated) like any other
+    cache.put(2, when, _parsed('b'))
+    cache.invalidate(2)
+    assert cache.get(2, when) is None
@@ -0,0 +1,73 @@
+import pytest
+
+from plant_tracker.core.geodata import (
+    IrrigationCoverage,
+    get_irrigated_geodata_ids,
+    get_irrigation_zones_for,
+    process_gdata_and_assign_location
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TableIrrigationZone,
+    TablePlantLocation
+)
+
+
+@pytest.fixture
+def coverage(monkeypatch):
+    coverage = IrrigationCoverage()
+    monkeypatch.setattr('plant_tracker.core.geodata.IRRIGATION_COVERAGE', coverage)
+    return coverage
+
+
+def _location(name: str, data: str) -> TablePlantLocation:
+    return TablePlantLocation(plant_location_name=name, geodata=TableGeodata(
+        geodata_type=GeodataType.PLANT_POINT, name=name, is_polygon=False, data=data))
+
+
+def _build_garden(session):
+    """A drip zone over the west half, w/ a plant on either side of it"""
+    drip = TableGeodata(geodata_type=GeodataType.OTHER_POLYGON, name='drip', is_polygon=True,
+                        data='0,0\n1000,0\n1000,1000\n0,1000')
+    west = _location('west', '500,500,10')
+    east = _location('east', '1500,500,10')
+    session.add_all([drip, west, east])
+    session.commit()
+    return drip, west, east
+
+
+def _save(session, table_obj, form_data: dict, geo_type: GeodataType):
+    process_gdata_and_assign_location(session, table_obj=table_obj, form_data=form_data, geo_type=geo_type)
+    session.commit()
+
+
+def test_plants_follow_their_zones(session, coverage):
+    drip, west, east = _build_garden(session)
+    assert get_irrigated_geodata_ids(session) is None
+
+    session.add(TableIrrigationZone(zone_name='drip', geodata=drip))
+    session.commit()
+    coverage.clear()
+    assert get_irrigated_geodata_ids(session) == {west.geodata_key}
+    assert get_irrigation_zones_for(session, west.geodata_key) == ['drip']
+    assert get_irrigation_zones_for(session, east.geodata_key) == []
+
+
+def test_edits_invalidate_the_coverage(session, coverage):
+    drip, west, east = _build_garden(session)
+    session.add(TableIrrigationZone(zone_name='drip', geodata=drip))
+    session.commit()
+    assert get_irrigated_geodata_ids(session) == {west.geodata_key}
+
+    # Saves land within the same second as the cached timestamps, so these only show up through the invalidation
+    _save(session, east, {'geodata': '900,500,10', 'name': 'east'}, GeodataType.PLANT_POINT)
+    assert get_irrigated_geodata_ids(session) == {west.geodata_key, east.geodata_key}
+
+    _save(session, drip, {'data': '0,0\n600,0\n600,1000\n0,1000', 'name': 'drip'}, GeodataType.OTHER_POLYGON)
+    assert get_irrigated_geodata_ids(session) == {west.geodata_key}
+
+    session.delete(west)
+    session.delete(west.geodata)
+    session.commit()
+    assert get_irrigated_geodata_ids(session) == set()
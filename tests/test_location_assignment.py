@@ -0,0 +1,116 @@
+from plant_tracker.core.geodata import (
+    REGION_INDEX,
+    process_gdata_and_assign_location
+)
+from plant_tracker.core.location_assignment import (
+    get_changed_area,
+    reassign_plant_locations
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TablePlantLocation,
+    TablePlantRegion,
+    TablePlantSubRegion
+)
+
+WEST = '0,0\n100,0\n100,100\n0,100'
+EAST = '100,0\n200,0\n200,100\n100,100'
+# Anchored (first point) in the west region, near the border
+BED = '90,10\n99,10\n99,20\n90,20'
+
+
+def _geodata(geo_type: GeodataType, data: str) -> TableGeodata:
+    return TableGeodata(geodata_type=geo_type, name=f'{geo_type}', is_polygon=geo_type != GeodataType.PLANT_POINT,
+                        data=data)
+
+
+def _build_garden(session):
+    west = TablePlantRegion(region_name='west', geodata=_geodata(GeodataType.REGION, WEST))
+    east = TablePlantRegion(region_name='east', geodata=_geodata(GeodataType.REGION, EAST))
+    bed = TablePlantSubRegion(sub_region_name='bed', geodata=_geodata(GeodataType.SUB_REGION, BED))
+    locations = {
+        'in_bed': TablePlantLocation(plant_location_name='in_bed',
+                                     geodata=_geodata(GeodataType.PLANT_POINT, '95,15,5')),
+        'east': TablePlantLocation(plant_location_name='east', geodata=_geodata(GeodataType.PLANT_POINT, '150,50,5')),
+        'outside': TablePlantLocation(plant_location_name='outside',
+                                      geodata=_geodata(GeodataType.PLANT_POINT, '500,500,5')),
+    }
+    session.add_all([west, east, bed, *locations.values()])
+    session.commit()
+    return west, east, bed, locations
+
+
+def test_assigns_every_location_and_writes_only_changes(session):
+    west, east, bed, locations = _build_garden(session)
+
+    stats = reassign_plant_locations(session)
+    session.commit()
+    session.expire_all()
+
+    assert stats == {'locations_checked': 3, 'locations_changed': 2, 'sub_regions_changed': 1}
+    assert bed.region_key == west.region_id
+    assert locations['in_bed'].sub_region_key == bed.sub_region_id
+    assert locations['in_bed'].region_key == west.region_id
+    assert (locations['east'].sub_region_key, locations['east'].region_key) == (None, east.region_id)
+    assert (locations['outside'].sub_region_key, locations['outside'].region_key) == (None, None)
+
+    # Nothing moved, so nothing gets written the second time around
+    assert reassign_plant_locations(session) == {'locations_checked': 3, 'locations_changed': 0,
+                                                 'sub_regions_changed': 0}
+
+
+def test_changed_area_only_rechecks_locations_inside_it(session):
+    _build_garden(session)
+    reassign_plant_locations(session)
+    session.commit()
+
+    stats = reassign_plant_locations(session, changed_area=get_changed_area(EAST, '100,0\n300,0\n300,100\n100,100'))
+
+    assert stats == {'locations_checked': 0, 'locations_changed': 0, 'sub_regions_changed': 0}
+
+
+def test_sub_region_moving_regions_carries_its_locations(session):
+    west, east, bed, locations = _build_garden(session)
+    reassign_plant_locations(session)
+    session.commit()
+
+    # Shrinking the west region drops the bed (& the plant in it) into the widened east region
+    old_west = west.geodata.data
+    west.geodata.data = '0,0\n80,0\n80,100\n0,100'
+    east.geodata.data = '80,0\n200,0\n200,100\n80,100'
+    session.commit()
+    # As saving a boundary does - the edit can land in the same second as the last version
+    REGION_INDEX.clear()
+    stats = reassign_plant_locations(session, changed_area=get_changed_area(old_west, west.geodata.data))
+    session.commit()
+    session.expire_all()
+
+    assert stats['sub_regions_changed'] == 1
+    assert stats['locations_changed'] == 1
+    assert bed.region_key == east.region_id
+    assert locations['in_bed'].sub_region_key == bed.sub_region_id
+    assert locations['in_bed'].region_key == east.region_id
+    assert locations['east'].region_key == east.region_id
+
+
+def test_saving_a_location_agrees_with_the_bulk_job(session):
+    west, east, bed, locations = _build_garden(session)
+    reassign_plant_locations(session)
+    session.commit()
+    bulk = {name: (x.sub_region_key, x.region_key) for name, x in locations.items()}
+
+    # Re-saving has to get rid of keys left over from wherever these used to be, just as the bulk job does
+    for name, loc in locations.items():
+        loc.sub_region_key, loc.region_key = bed.sub_region_id, east.region_id
+        process_gdata_and_assign_location(session, table_obj=loc, form_data={'geodata': loc.geodata.data,
+                                                                             'name': name},
+                                          geo_type=GeodataType.PLANT_POINT)
+    session.commit()
+
+    assert {name: (x.sub_region_key, x.region_key) for name, x in locations.items()} == bulk == {
+        'in_bed': (bed.sub_region_id, west.region_id),
+        'east': (None, east.region_id),
+        'outside': (None, None),
+    }
+    assert reassign_plant_locations(session)['locations_changed'] == 0
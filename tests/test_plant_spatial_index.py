@@ -0,0 +1,78 @@
+from plant_tracker.core.geodata import PlantSpatialIndex
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata
+)
+
+
+def _point(x: float, y: float, gid: int = None) -> TableGeodata:
+    return TableGeodata(geodata_id=gid, geodata_type=GeodataType.PLANT_POINT, name=f'{x},{y}', is_polygon=False,
+                        data=f'{x},{y},10')
+
+
+def _add_row_of_points(session, n: int):
+    points = [_point(1000 * i, 0) for i in range(n)]
+    session.add_all(points)
+    session.commit()
+    return points
+
+
+def _ids_at(snapshot, x: float, y: float):
+    return [gid for gid, _ in snapshot.at(x, y)]
+
+
+def test_delete_then_re_add_of_the_same_id(session):
+    first, second, _ = _add_row_of_points(session, 3)
+    index = PlantSpatialIndex()
+    assert _ids_at(index.get(session), 0, 0) == [first.geodata_id]
+
+    gid = first.geodata_id
+    session.delete(first)
+    session.commit()
+    snapshot = index.get(session)
+    assert len(snapshot) == 2
+    assert snapshot.tombstones == {gid}
+    assert _ids_at(snapshot, 0, 0) == []
+
+    # Same id back, somewhere else - the tree's copy has to stay buried
+    session.add(_point(5000, 0, gid=gid))
+    session.commit()
+    index.mark_stale()
+    snapshot = index.get(session)
+    assert len(snapshot) == 3
+    assert snapshot.tombstones == {gid}
+    assert snapshot.delta_ids.tolist() == [gid]
+    assert _ids_at(snapshot, 0, 0) == []
+    assert _ids_at(snapshot, 5000, 0) == [gid]
+    assert [x[0] for x in snapshot.nearest(0, 0, k=1)] == [second.geodata_id]
+    assert [x[0] for x in snapshot.within(5000, 0, 50)] == [gid]
+
+
+def test_edits_stay_in_the_delta_until_the_rebuild_threshold(session):
+    points = _add_row_of_points(session, 10)
+    index = PlantSpatialIndex()
+    index.MIN_REBUILD_SIZE = 2
+    index.get(session)
+
+    # One edit: a tombstone & a delta entry, which doesn't cross max(2, 10% of 10)
+    points[0].data = '0,5000,10'
+    session.commit()
+    index.mark_stale()
+    snapshot = index.get(session)
+    assert snapshot.tombstones == {points[0].geodata_id}
+    assert snapshot.delta_ids.tolist() == [points[0].geodata_id]
+    assert _ids_at(snapshot, 0, 5000) == [points[0].geodata_id]
+    assert _ids_at(snapshot, 0, 0) == []
+
+    # A second one crosses it, so the tree gets rebuilt w/ everything's current footprint
+    points[1].data = '1000,5000,10'
+    session.commit()
+    index.mark_stale()
+    snapshot = index.get(session)
+    assert snapshot.tombstones == frozenset()
+    assert len(snapshot.delta_ids) == 0
+    assert sorted(snapshot.ids.tolist()) == sorted(x.geodata_id for x in points)
+    assert _ids_at(snapshot, 0, 5000) == [points[0].geodata_id]
+    assert _ids_at(snapshot, 1000, 5000) == [points[1].geodata_id]
+    assert _ids_at(snapshot, 1000, 0) == []
+    assert [x[0] for x in snapshot.nearest(2000, 0, k=2)] == [points[2].geodata_id, points[3].geodata_id]
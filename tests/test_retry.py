@@ -0,0 +1,137 @@
+import logging
+import random
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from plant_tracker.core.db import DBAdmin
+from plant_tracker.core.retry import (
+    RETRY_STATS,
+    backoff_delay,
+    is_retryable
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata
+)
+
+
+class _DriverError(Exception):
+    """Stands in for the driver's error, which carries the SQLSTATE"""
+
+    def __init__(self, pgcode: str):
+        super().__init__(f'SQLSTATE {pgcode}')
+        self.pgcode = pgcode
+
+
+def _db_error(sqlstate: str) -> OperationalError:
+    return OperationalError('UPDATE app.geodata SET data = ?', {}, _DriverError(sqlstate))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits = []
+    monkeypatch.setattr('plant_tracker.core.db.time.sleep', waits.append)
+    return waits
+
+
+@pytest.fixture
+def eng(session):
+    """A DBAdmin on the test database, w/o loading any config, that counts its rollbacks"""
+    db = DBAdmin.__new__(DBAdmin)
+    db.log = logging.getLogger(__name__)
+    db.session = sessionmaker(bind=session.get_bind())
+    db.retry_attempts = 3
+    db.retry_backoff = 0.05
+    db.retry_max_backoff = 0.08
+    db.rollbacks = []
+    event.listen(db.session, 'after_rollback', db.rollbacks.append)
+    RETRY_STATS.clear()
+    yield db
+    RETRY_STATS.clear()
+
+
+def _save_then_fail(attempts: list, errors: list):
+    """A unit of work that writes a row each attempt, then fails w/ the next of the errors (if any are left)"""
+    def func(session) -> str:
+        attempts.append(session)
+        session.add(TableGeodata(geodata_type=GeodataType.OTHER_POINT, name=f'try {len(attempts)}',
+                                 is_polygon=False, data='0,0'))
+        session.flush()
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return f'saved on try {len(attempts)}'
+    return func
+
+
+def _saved_names(session):
+    return [x[0] for x in session.query(TableGeodata.name).all()]
+
+
+def test_conflicts_are_rolled_back_and_replayed(session, eng, sleeps):
+    attempts = []
+
+    result = eng.unit_of_work(_save_then_fail(attempts, [_db_error('40001'), _db_error('40P01')]))
+
+    assert result == 'saved on try 3'
+    # Each replay gets a fresh session, after the last one's writes were rolled back
+    assert len(set(attempts)) == 3
+    assert len(eng.rollbacks) == 2
+    assert _saved_names(session) == ['try 3']
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.05 and 0 <= sleeps[1] <= 0.08
+    assert RETRY_STATS.snapshot() == {'retries': {'40001': 1, '40P01': 1}, 'recovered': 1, 'exhausted': 0}
+
+
+def test_gives_up_after_the_last_attempt(session, eng, sleeps):
+    attempts = []
+
+    with pytest.raises(OperationalError):
+        eng.unit_of_work(_save_then_fail(attempts, [_db_error('40001')] * 5))
+
+    assert len(attempts) == 3
+    assert len(eng.rollbacks) == 3
+    assert _saved_names(session) == []
+    # No wait after the last attempt
+    assert len(sleeps) == 2
+    assert RETRY_STATS.snapshot() == {'retries': {'40001': 2}, 'recovered': 0, 'exhausted': 1}
+
+
+def test_other_errors_are_not_replayed(session, eng, sleeps):
+    attempts = []
+
+    # undefined_table
+    with pytest.raises(OperationalError):
+        eng.unit_of_work(_save_then_fail(attempts, [_db_error('42P01')]))
+
+    assert len(attempts) == 1
+    assert len(eng.rollbacks) == 1
+    assert sleeps == []
+    assert RETRY_STATS.snapshot() == {'retries': {}, 'recovered': 0, 'exhausted': 0}
+
+
+def test_first_try_success_isnt_counted(session, eng, sleeps):
+    assert eng.unit_of_work(_save_then_fail([], [])) == 'saved on try 1'
+
+    assert eng.rollbacks == []
+    assert _saved_names(session) == ['try 1']
+    assert RETRY_STATS.snapshot() == {'retries': {}, 'recovered': 0, 'exhausted': 0}
+
+
+def test_sqlstate_from_either_driver_is_retryable():
+    psycopg3_error = Exception('could not serialize access')
+    psycopg3_error.sqlstate = '40001'
+
+    assert is_retryable(OperationalError('SELECT 1', {}, psycopg3_error))
+    assert is_retryable(_db_error('40P01'))
+    assert not is_retryable(_db_error('42P01'))
+    assert not is_retryable(_DriverError('40001'))
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    # The longest wait each attempt can get
+    monkeypatch.setattr(random, 'uniform', lambda low, high: high)
+
+    assert [backoff_delay(x, base=0.05, cap=0.5) for x in range(1, 6)] == [0.05, 0.1, 0.2, 0.4, 0.5]
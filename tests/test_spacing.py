@@ -0,0 +1,69 @@
+import datetime
+
+import numpy as np
+import shapely
+
+from plant_tracker.core.spacing import (
+    SpacingReport,
+    find_crowded_pairs
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TablePlant,
+    TablePlantLocation,
+    TableSpecies
+)
+
+LATER = datetime.datetime(2100, 1, 1)
+
+
+def test_pairs_are_judged_by_the_larger_spacing():
+    geoms = shapely.points([[0, 0], [300, 0], [1000, 0], [1000, 0], [5000, 0]])
+    pairs = find_crowded_pairs(
+        plant_ids=np.array([1, 2, 3, 4, 5]),
+        names=['oak', 'sage', 'rue', 'rue', 'yarrow'],
+        # 3 & 4 were planted together
+        gids=np.array([10, 20, 30, 30, 50]),
+        geoms=geoms,
+        spacings=np.array([500, 0, 800, 800, 0], dtype=np.float64)
+    )
+
+    # Only sage has no spacing, so oak's is the one that counts
+    assert [(x.plant_id, x.other_plant_id, x.distance, x.required) for x in pairs] == [
+        (1, 2, 300, 500),
+        (2, 3, 700, 800),
+        (2, 4, 700, 800),
+    ]
+    assert pairs[0].shortfall == 200
+
+
+def _plant(species: TableSpecies, data: str, **kwargs) -> TablePlant:
+    return TablePlant(species=species, date_planted=datetime.date(2026, 4, 1), **kwargs,
+                      plant_location=TablePlantLocation(plant_location_name=data, geodata=TableGeodata(
+                          geodata_type=GeodataType.PLANT_POINT, name=data, is_polygon=False, data=data)))
+
+
+def test_report_covers_live_plants_on_the_map(session):
+    sage = TableSpecies(common_name='sage', spacing_mm=900)
+    near = _plant(sage, '0,0,10')
+    close = _plant(sage, '400,0,10')
+    dead = _plant(sage, '200,0,10', is_dead=True)
+    far = _plant(sage, '5000,0,10')
+    session.add_all([near, close, dead, far])
+    session.commit()
+
+    report = SpacingReport()
+    assert [(x.plant_id, x.other_plant_id) for x in report.get(session)] == [(near.plant_id, close.plant_id)]
+    assert report.get(session)[0].plant_name == f'sage #{near.plant_id}'
+
+    # Changes to the spacing, plants or their locations make it recompute. (SQLite stamps saves to the second,
+    #   so these are stamped as the later saves they'd be)
+    sage.spacing_mm = 300
+    sage.update_date = LATER
+    session.commit()
+    assert report.get(session) == []
+    far.plant_location.geodata.data = '100,0,10'
+    far.plant_location.geodata.update_date = LATER
+    session.commit()
+    assert [(x.plant_id, x.other_plant_id) for x in report.get(session)] == [(near.plant_id, far.plant_id)]
@@ -0,0 +1,116 @@
+import datetime
+
+import numpy as np
+import pytest
+import shapely
+
+from plant_tracker.core.sun_exposure import (
+    TOO_LITTLE_SUN,
+    estimate_locations,
+    find_stale_locations,
+    get_sun_estimates,
+    save_sun_estimates,
+    sun_positions,
+    sunlit_hours
+)
+from plant_tracker.model import (
+    GeodataType,
+    LightRequirementType,
+    TableGeodata,
+    TablePlant,
+    TablePlantLocation,
+    TableSpecies
+)
+
+LATITUDE = 30.27
+# An hour of sun due south, 45 degrees up - shadows reach as far north as their structure is tall
+SOUTHERN_SUN = np.array([[np.pi / 4, np.pi, 1.0]])
+
+
+def test_sun_positions_cover_the_day():
+    # Around 12h of daylight at the equinox, more in the summer
+    assert sun_positions(0, days=(80, )).sum(axis=0)[2] == pytest.approx(12, abs=0.25)
+    assert sun_positions(LATITUDE, days=(172, )).sum(axis=0)[2] > 13
+
+
+def test_shadows_fall_away_from_the_sun():
+    shed = np.array([shapely.box(0, 0, 10, 10)])
+    points = np.array([[5, -5], [5, -15], [5, 5], [5, 15]])
+
+    assert sunlit_hours(points, shed, np.array([10.0]), SOUTHERN_SUN).tolist() == [0, 1, 0, 1]
+    assert sunlit_hours(points, shed[:0], np.zeros(0), SOUTHERN_SUN).tolist() == [1, 1, 1, 1]
+    # With the map's up pointing east, north is to the left
+    assert sunlit_hours(np.array([[-5, 5], [5, -5]]), shed, np.array([10.0]), SOUTHERN_SUN,
+                        map_north_bearing=90).tolist() == [0, 1]
+
+
+def test_concave_structures_leave_their_notches_lit():
+    ell = np.array([shapely.Polygon([(0, 0), (20, 0), (20, 10), (10, 10), (10, 20), (0, 20)])])
+    # In the notch, north of the short arm & north of the long arm
+    points = np.array([[15, 15], [15, -5], [5, -15]])
+
+    assert sunlit_hours(points, ell, np.array([10.0]), SOUTHERN_SUN).tolist() == [1, 0, 1]
+
+
+def _plant(species: TableSpecies, name: str, data: str) -> TablePlant:
+    geodata = TableGeodata(geodata_type=GeodataType.PLANT_POINT, name=name, is_polygon=False, data=data)
+    return TablePlant(species=species, date_planted=datetime.date(2026, 4, 1),
+                      plant_location=TablePlantLocation(plant_location_name=name, geodata=geodata))
+
+
+def _build_yard(session):
+    """A 10m tall wall w/ one plant tight against its north face & one well away from it"""
+    wall = TableGeodata(geodata_type=GeodataType.OTHER_POLYGON, name='wall', is_polygon=True,
+                        data='0,1000\n10000,1000\n10000,1200\n0,1200', height_mm=10000)
+    species = TableSpecies(common_name='winecup', light_requirement=LightRequirementType.FULLSUN)
+    shaded = _plant(species, 'shaded', '5000,900,10')
+    sunny = _plant(species, 'sunny', '5000,-50000,10')
+    session.add_all([wall, shaded, sunny])
+    session.commit()
+    return wall, shaded, sunny
+
+
+def _refresh(session) -> int:
+    stale = find_stale_locations(session, latitude=LATITUDE)
+    n_saved = save_sun_estimates(session, estimate_locations(stale, workers=1))
+    session.commit()
+    return n_saved
+
+
+def _stale_ids(session, **kwargs):
+    return [x[0] for x in find_stale_locations(session, latitude=LATITUDE, **kwargs).rows]
+
+
+def test_estimates_are_stored_and_flag_mismatches(session):
+    wall, shaded, sunny = _build_yard(session)
+
+    assert _refresh(session) == 2
+    estimates = {x.plant_id: x for x in get_sun_estimates(session)}
+
+    assert estimates[sunny.plant_id].sun_hours > estimates[shaded.plant_id].sun_hours
+    assert estimates[sunny.plant_id].mismatch is None
+    assert estimates[shaded.plant_id].mismatch == TOO_LITTLE_SUN
+    # Nothing changed, so nothing's stale
+    assert _refresh(session) == 0
+
+
+def test_only_changed_locations_go_stale(session):
+    wall, shaded, sunny = _build_yard(session)
+    _refresh(session)
+
+    sunny.plant_location.geodata.data = '5000,-40000,10'
+    session.commit()
+    assert _stale_ids(session) == [sunny.plant_location.geodata_key]
+    assert len(_stale_ids(session, full=True)) == 2
+
+
+def test_structure_changes_make_every_location_stale(session):
+    wall, shaded, sunny = _build_yard(session)
+    _refresh(session)
+
+    wall.height_mm = 500
+    session.commit()
+    assert len(_stale_ids(session)) == 2
+    # As does estimating for somewhere else
+    _refresh(session)
+    assert len(find_stale_locations(session, latitude=45.0).rows) == 2
@@ -0,0 +1,94 @@
+from typing import (
+    Dict,
+    List,
+    Tuple
+)
+
+import numpy as np
+
+from plant_tracker.core.geodata import encode_topology
+from plant_tracker.model import GeodataType
+
+# A region w/ a sub region sharing its western edge, offset from the origin
+REGION = '1000,2000\n1100,2000\n1100,2100\n1000,2100'
+SUB_REGION = '1000,2000\n1050,2000\n1050,2100\n1000,2100'
+
+
+def _normalized(ring: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    start = ring.index(min(ring))
+    return ring[start:] + ring[:start]
+
+
+def _ring(points: str) -> List[Tuple[float, float]]:
+    return _normalized([tuple(float(v) for v in x.split(',')) for x in points.split('\n')])
+
+
+def _decode_rings(topology: Dict) -> Dict[int, List[Tuple[float, float]]]:
+    """Mirrors the map's decoder: un-delta the arcs, walk each polygon's arcs & undo the transform"""
+    scale = np.array(topology['transform']['scale'])
+    translate = np.array(topology['transform']['translate'])
+    arcs = [np.cumsum(np.array(arc), axis=0) for arc in topology['arcs']]
+    rings = {}
+    for items in topology['objects'].values():
+        for obj in items:
+            if 'arcs' not in obj:
+                continue
+            pts = []
+            for i in obj['arcs']:
+                arc = arcs[i] if i >= 0 else arcs[~i][::-1]
+                # Each arc ends where the next one starts
+                pts.extend(arc[:-1].tolist())
+            rings[obj['gid']] = _normalized([tuple(x) for x in (np.array(pts) * scale + translate).tolist()])
+    return rings
+
+
+def _features() -> Dict[GeodataType, List[Dict]]:
+    return {
+        GeodataType.REGION: [{'gid': 1, 'name': 'front', 'class': GeodataType.REGION, 'points': REGION}],
+        GeodataType.SUB_REGION: [{'gid': 2, 'name': 'bed', 'class': 'sub_region focus', 'points': SUB_REGION}],
+        GeodataType.PLANT_POINT: [{'gid': 3, 'name': 'winecup', 'x': 1010.0, 'y': 2020.0, 'r': 5.0}],
+    }
+
+
+def test_shared_edge_is_sent_once_and_decodes_back():
+    topology = encode_topology(_features())
+
+    # Each polygon's own three sides, plus the one edge they share
+    assert len(topology['arcs']) == 3
+    region_arcs = set(topology['objects'][GeodataType.REGION][0]['arcs'])
+    sub_region_arcs = set(topology['objects'][GeodataType.SUB_REGION][0]['arcs'])
+    assert len(region_arcs & sub_region_arcs) + len({~x for x in region_arcs} & sub_region_arcs) == 1
+    assert _decode_rings(topology) == {1: _ring(REGION), 2: _ring(SUB_REGION)}
+
+
+def test_points_and_properties_are_translated_and_trimmed():
+    topology = encode_topology(_features())
+
+    assert topology['transform']['translate'] == [1000.0, 2000.0]
+    point = topology['objects'][GeodataType.PLANT_POINT][0]
+    assert point == {'gid': 3, 'name': 'winecup', 'r': 5.0, 'coordinates': [10, 20]}
+    # A class that's just the type is left for the decoder to fill back in
+    assert 'class' not in topology['objects'][GeodataType.REGION][0]
+    assert topology['objects'][GeodataType.SUB_REGION][0]['class'] == 'sub_region focus'
+
+
+def test_quantizing_snaps_to_the_grid():
+    features = {GeodataType.OTHER_POLYGON: [{'gid': 1, 'name': 'shed', 'points': '0,0\n104,0\n104,96\n0,96'}]}
+
+    topology = encode_topology(features, quantum=10)
+
+    assert _decode_rings(topology) == {1: _ring('0,0\n100,0\n100,100\n0,100')}
+
+
+def test_simplifying_keeps_neighbours_stitched():
+    # A wobbly shared edge that simplification flattens
+    region = '0,0\n100,0\n100,100\n0,100\n1,75\n0,50\n1,25'
+    sub_region = '0,0\n1,25\n0,50\n1,75\n0,100\n-50,100\n-50,0'
+    features = {
+        GeodataType.REGION: [{'gid': 1, 'name': 'a', 'points': region}],
+        GeodataType.SUB_REGION: [{'gid': 2, 'name': 'b', 'points': sub_region}],
+    }
+
+    rings = _decode_rings(encode_topology(features, tolerance=5))
+
+    assert rings == {1: _ring('0,0\n100,0\n100,100\n0,100'), 2: _ring('0,0\n0,100\n-50,100\n-50,0')}
@@ -0,0 +1,86 @@
+import shapely
+
+from plant_tracker.core.geodata import (
+    DEFAULT_POINT_RADIUS,
+    geodata_to_shape
+)
+from plant_tracker.core.validation import (
+    BAD_RADIUS,
+    ESCAPES_REGION,
+    INVALID,
+    REPEATED_POINTS,
+    TOO_FEW_POINTS,
+    UNPARSEABLE,
+    check_geometries,
+    repair_data,
+    repair_geodata,
+    validate_all_geodata
+)
+from plant_tracker.model import (
+    GeodataType,
+    TableGeodata,
+    TablePlantRegion,
+    TablePlantSubRegion
+)
+
+SQUARE = '0,0\n10,0\n10,10\n0,10'
+BOWTIE = '0,0\n10,10\n10,0\n0,10'
+REPEATED = '0,0\n0,0\n10,0\n10,10'
+# Two thirds of it hangs out of SQUARE
+ESCAPING = '5,5\n20,5\n20,8\n5,8'
+
+
+def test_check_geometries_finds_each_problem():
+    rows = [
+        (1, 'fine', GeodataType.OTHER_POLYGON, True, SQUARE),
+        (2, 'bowtie', GeodataType.OTHER_POLYGON, True, BOWTIE),
+        (3, 'repeated', GeodataType.OTHER_POLYGON, True, REPEATED),
+        (4, 'sliver', GeodataType.OTHER_POLYGON, True, '0,0\n10,0\n0,0'),
+        (5, 'no radius', GeodataType.PLANT_POINT, False, '5,5,0'),
+        (6, 'junk', GeodataType.OTHER_POLYGON, True, 'not a shape'),
+        (7, 'bed', GeodataType.SUB_REGION, True, ESCAPING),
+    ]
+
+    issues, valid_polygons = check_geometries(rows, region_by_gid={7: geodata_to_shape(SQUARE, is_polygon=True)})
+
+    assert sorted((x.gid, x.problem, x.is_repairable) for x in issues) == [
+        (2, INVALID, True),
+        (3, REPEATED_POINTS, True),
+        (4, TOO_FEW_POINTS, False),
+        (5, BAD_RADIUS, True),
+        (6, UNPARSEABLE, False),
+        (7, ESCAPES_REGION, True),
+    ]
+    assert sorted(valid_polygons.keys()) == [1, 3, 7]
+
+
+def test_repair_data_fixes_what_it_can():
+    untangled = geodata_to_shape(repair_data(True, BOWTIE), is_polygon=True)
+    assert untangled.is_valid and untangled.area == 25
+
+    assert repair_data(True, REPEATED) == '0.0,0.0\n10.0,0.0\n10.0,10.0'
+    assert repair_data(False, '5,5,0') == f'5.0,5.0,{DEFAULT_POINT_RADIUS}'
+    # Clipped to the part inside its region
+    clipped = geodata_to_shape(repair_data(True, ESCAPING, region=shapely.box(0, 0, 10, 10)), is_polygon=True)
+    assert clipped.equals(shapely.box(5, 5, 10, 8))
+    # Nothing usable left
+    assert repair_data(True, '0,0\n10,0\n0,0') is None
+
+
+def test_repairing_stored_shapes_leaves_only_manual_fixes(session):
+    region = TablePlantRegion(region_name='front', geodata=TableGeodata(
+        geodata_type=GeodataType.REGION, name='front', is_polygon=True, data=SQUARE))
+    bed = TablePlantSubRegion(sub_region_name='bed', region=region, geodata=TableGeodata(
+        geodata_type=GeodataType.SUB_REGION, name='bed', is_polygon=True, data=ESCAPING))
+    bowtie = TableGeodata(geodata_type=GeodataType.OTHER_POLYGON, name='bowtie', is_polygon=True, data=BOWTIE)
+    sliver = TableGeodata(geodata_type=GeodataType.OTHER_POLYGON, name='sliver', is_polygon=True,
+                          data='0,0\n10,0\n0,0')
+    session.add_all([region, bed, bowtie, sliver])
+    session.commit()
+
+    stats = repair_geodata(session, validate_all_geodata(session))
+    session.commit()
+
+    assert stats == {'repaired': 2, 'failed': 0, 'locations_changed': 0}
+    assert geodata_to_shape(bed.geodata.data, is_polygon=True).equals(shapely.box(5, 5, 10, 8))
+    assert [(x.gid, x.problem) for x in validate_all_geodata(session)] == [(sliver.geodata_id, TOO_FEW_POINTS)]
@@ -1,5 +1,4 @@
 from plant_tracker.config import ProductionConfig
-ProductionConfig().build_db_engine()
 from plant_tracker.app import create_app
 
 